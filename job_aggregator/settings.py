@@ -48,6 +48,8 @@ INSTALLED_APPS = [
 # MIDDLEWARE
 # ---------------------------
 MIDDLEWARE = [
+    'jobs.middleware.RequestTimingMiddleware',  # no-op unless REQUEST_TIMING_ENABLED
+    'jobs.middleware.CompressionMiddleware',  # brotli/gzip for JSON responses
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -59,6 +61,14 @@ MIDDLEWARE = [
     
 ]
 
+# ---------------------------
+# REQUEST TIMING (opt-in)
+# ---------------------------
+# Server-Timing headers + slow request logging; see jobs/middleware.py
+REQUEST_TIMING_ENABLED = os.environ.get("REQUEST_TIMING_ENABLED", "False") == "True"
+REQUEST_TIMING_SAMPLE_RATE = float(os.environ.get("REQUEST_TIMING_SAMPLE_RATE", "1.0"))
+REQUEST_TIMING_SLOW_MS = float(os.environ.get("REQUEST_TIMING_SLOW_MS", "500"))
+
 # ---------------------------
 # URLS & WSGI
 # ---------------------------
@@ -87,13 +97,37 @@ TEMPLATES = [
 # ---------------------------
 # DATABASE
 # ---------------------------
+# SQLite storage profile applied to every connection: "default" or "production"
+# (WAL, tuned pragmas, persistent connections); see jobs/db.py
+DB_PROFILE = os.environ.get("DB_PROFILE", "default")
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Seconds to keep a connection open across requests (0 = reconnect per request)
+        'CONN_MAX_AGE': int(os.environ.get("DB_CONN_MAX_AGE", "600" if DB_PROFILE == "production" else "0")),
+        'CONN_HEALTH_CHECKS': DB_PROFILE == "production",
     }
 }
 
+# Optional read replica for the search/listing/details API; see jobs/routers.py.
+# DB_READ_REPLICA is the path of a replica SQLite file, or "local" for a
+# read-only connection to the primary file (use with DB_PROFILE=production:
+# in WAL mode its reads don't block ingestion's writes).
+DB_READ_REPLICA = os.environ.get("DB_READ_REPLICA", "")
+if DB_READ_REPLICA:
+    _replica_path = DATABASES['default']['NAME'] if DB_READ_REPLICA == "local" else DB_READ_REPLICA
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': f"file:{_replica_path}?mode=ro",
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['jobs.routers.ReadReplicaRouter']
+# How far the replica may be behind; rows written more recently are read from the primary
+REPLICA_LAG_SECONDS = float(os.environ.get("REPLICA_LAG_SECONDS", "5"))
+
 # ---------------------------
 # PASSWORD VALIDATORS
 # ---------------------------
@@ -126,6 +160,15 @@ STATICFILES_DIRS = [
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# ---------------------------
+# SNAPSHOTS
+# ---------------------------
+# Unfiltered search pages and the company directory, prerendered under
+# MEDIA_ROOT/snapshots after each ingestion run; see jobs/snapshots.py.
+# "off", "redirect" (to MEDIA_URL, for a CDN/web server to serve) or "serve" (from Django)
+SNAPSHOT_MODE = os.environ.get("SNAPSHOT_MODE", "off")
+SNAPSHOT_SEARCH_PAGES = int(os.environ.get("SNAPSHOT_SEARCH_PAGES", "5"))
+
 # ---------------------------
 # DEFAULT AUTO FIELD
 # ---------------------------
@@ -136,7 +179,8 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # ---------------------------
 REST_FRAMEWORK = {
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        # DRF's JSONRenderer output via orjson (falls back to it without orjson); see jobs/renderers.py
+        'jobs.renderers.ORJSONRenderer',
     ]
 }
 
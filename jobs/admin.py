@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Job
+from .models import ArchivedJob, Board, BoardFetchResult, BoardState, FetchRun, Job
 
 
 @admin.register(Job)
@@ -8,3 +8,67 @@ class JobAdmin(admin.ModelAdmin):
 	list_filter = ("platform", "company", "is_active")
 	search_fields = ("title", "company", "location")
 	ordering = ("-posted_at", "-fetched_at")
+
+
+@admin.register(ArchivedJob)
+class ArchivedJobAdmin(admin.ModelAdmin):
+	list_display = ("title", "company", "platform", "posted_at", "last_seen_at", "archived_at")
+	list_filter = ("platform",)
+	search_fields = ("title", "external_job_id")
+	date_hierarchy = "archived_at"
+	exclude = ("description_compressed",)
+
+
+@admin.register(Board)
+class BoardAdmin(admin.ModelAdmin):
+	list_display = ("name", "platform", "handle", "url", "enabled", "priority", "max_postings", "timeout_seconds")
+	list_filter = ("platform", "enabled")
+	search_fields = ("name", "handle", "url")
+	list_editable = ("enabled", "priority")
+
+
+class BoardFetchResultInline(admin.TabularInline):
+	model = BoardFetchResult
+	extra = 0
+	can_delete = False
+	fields = (
+		"company_name", "platform", "board", "succeeded", "http_status", "latency_seconds",
+		"payload_bytes", "postings_count", "rows_upserted", "rows_deactivated", "error_class",
+	)
+	readonly_fields = fields
+
+
+@admin.register(FetchRun)
+class FetchRunAdmin(admin.ModelAdmin):
+	list_display = (
+		"id", "command", "status", "started_at", "duration_seconds", "boards_total",
+		"boards_failed", "jobs_upserted", "jobs_deactivated", "bytes_downloaded",
+	)
+	list_filter = ("command", "status")
+	date_hierarchy = "started_at"
+	readonly_fields = ("started_at",)
+	inlines = [BoardFetchResultInline]
+
+
+@admin.register(BoardFetchResult)
+class BoardFetchResultAdmin(admin.ModelAdmin):
+	list_display = (
+		"company_name", "platform", "board", "started_at", "succeeded", "http_status",
+		"latency_seconds", "payload_bytes", "postings_count", "error_class",
+	)
+	list_filter = ("platform", "succeeded", "error_class")
+	search_fields = ("company_name", "board", "error_message")
+	date_hierarchy = "started_at"
+	list_select_related = ("run",)
+
+
+@admin.register(BoardState)
+class BoardStateAdmin(admin.ModelAdmin):
+	list_display = (
+		"company_name", "platform", "board", "next_due_at", "interval_seconds", "change_rate",
+		"checks", "changes", "last_changed_at", "breaker_state", "consecutive_failures",
+		"breaker_open_until", "lease_owner", "lease_expires_at",
+	)
+	list_filter = ("platform", "breaker_state")
+	search_fields = ("company_name", "board")
+	ordering = ("next_due_at",)
@@ -0,0 +1,128 @@
+"""
+Retention for inactive jobs.
+
+Deactivated jobs used to stay in ``jobs_job`` forever, descriptions and raw
+payloads included, so the table every API query filters on ``is_active`` kept
+growing with history. The ``archive_jobs`` command applies the retention
+policy in two steps:
+
+1. ``purge_raw``: inactive jobs lose their raw API payload (the bulk of a
+   row) once they have been gone for a few days;
+2. ``archive_inactive``: jobs gone for longer than the retention period move
+   to ``ArchivedJob``, optionally with a zlib-compressed description.
+
+A job's ``fetched_at`` is when its board last listed it (deactivation doesn't
+touch it), so that is what "gone for N days" is measured from.
+
+If an archived job shows up on its board again, ingestion restores it under
+its old id (``archived_for`` then ``discard``) instead of inserting a new row.
+
+Both steps change what the API returns (job details show ``raw``, archived
+ids stop resolving), so both bump the change sequence: purged rows get a new
+``change_seq``, and ETags and snapshots keyed on the data version move on.
+"""
+import logging
+import zlib
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import changes
+from .models import ArchivedJob, Job
+
+logger = logging.getLogger(__name__)
+
+RAW_RETENTION_DAYS = 7
+RETENTION_DAYS = 90
+BATCH_SIZE = 1000
+
+
+def _inactive_since(days, now=None):
+    cutoff = (now or timezone.now()) - timedelta(days=days)
+    return Job.objects.filter(is_active=False, fetched_at__lt=cutoff)
+
+
+def purge_raw(days=RAW_RETENTION_DAYS, now=None):
+    """Drop the raw payload of jobs inactive for more than ``days``. Returns the number of rows updated."""
+    jobs = _inactive_since(days, now).exclude(raw=None)
+    with transaction.atomic():
+        if not jobs.exists():
+            return 0
+        return jobs.update(raw=None, change_seq=changes.next_seq())
+
+
+def archived_row(job, compress=False):
+    row = ArchivedJob(
+        original_id=job.pk,
+        company_id=job.company_id,
+        platform=job.platform,
+        external_job_id=job.external_job_id,
+        title=job.title,
+        location=job.location,
+        location_country=job.location_country,
+        description=job.description,
+        structured_description=job.structured_description,
+        apply_url=job.apply_url,
+        company_logo=job.company_logo,
+        posted_at=job.posted_at,
+        last_seen_at=job.fetched_at,
+    )
+    if compress and job.description:
+        row.description_compressed = zlib.compress(job.description.encode("utf-8"))
+        row.description = None
+    return row
+
+
+def archive_inactive(days=RETENTION_DAYS, compress=False, batch_size=BATCH_SIZE, now=None):
+    """
+    Move jobs inactive for more than ``days`` to ``ArchivedJob``, one
+    transaction per ``batch_size`` jobs. Returns the number of jobs archived.
+    """
+    # Ids up front: re-running the filter per batch would rescan the table each time
+    ids = list(_inactive_since(days, now).order_by("id").values_list("id", flat=True))
+    archived = 0
+    for start in range(0, len(ids), batch_size):
+        batch = ids[start:start + batch_size]
+        with transaction.atomic():
+            jobs = Job.objects.filter(pk__in=batch, is_active=False).defer("raw")
+            rows = [archived_row(job, compress) for job in jobs]
+            ArchivedJob.objects.bulk_create(
+                rows,
+                update_conflicts=True,
+                unique_fields=["platform", "external_job_id"],
+                update_fields=[
+                    "original_id", "company", "title", "location", "location_country", "description",
+                    "description_compressed", "structured_description", "apply_url", "company_logo",
+                    "posted_at", "last_seen_at", "archived_at",
+                ],
+            )
+            Job.objects.filter(pk__in=[row.original_id for row in rows]).delete()
+            if rows:
+                changes.next_seq()
+        archived += len(rows)
+        logger.info("Archived %d/%d inactive job(s)", archived, len(ids))
+    return archived
+
+
+def vacuum():
+    """Give the space freed by archiving back to the filesystem (SQLite only)."""
+    if connection.vendor == "sqlite":
+        with connection.cursor() as cursor:
+            cursor.execute("VACUUM")
+
+
+def archived_for(platform, external_job_ids):
+    """external_job_id -> ArchivedJob for those of ``external_job_ids`` that are archived."""
+    if not external_job_ids:
+        return {}
+    return {
+        row.external_job_id: row
+        for row in ArchivedJob.objects.filter(platform=platform, external_job_id__in=external_job_ids)
+    }
+
+
+def discard(platform, external_job_ids):
+    """Remove restored jobs from the archive."""
+    if external_job_ids:
+        ArchivedJob.objects.filter(platform=platform, external_job_id__in=external_job_ids).delete()
@@ -0,0 +1,7 @@
+"""
+In-repo benchmark suite. Run with ``python manage.py benchmark``.
+
+Importing this package registers the benchmarks defined in ``cases``.
+"""
+from . import cases  # noqa: F401  (registers benchmarks)
+from .suite import BENCHMARKS, benchmark  # noqa: F401
@@ -0,0 +1,324 @@
+"""
+Benchmarks for the API hot paths and the ingestion pipeline.
+"""
+import multiprocessing
+import random
+
+from django.db.models import Prefetch
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from jobs import ingest, transport
+from jobs.models import Company, Job
+from jobs.renderers import ORJSONRenderer
+from jobs.serializers import NESTED_JOB_VALUES, CompanyJobsSerializer, NestedJobSerializer, nested_job_rows
+from jobs.utils import parse_structured_description, parse_timestamp
+from jobs.views import JobsGroupedByCompany, JobSearchView
+
+from . import datagen
+from .suite import benchmark
+
+
+# ---------------------------
+# Search endpoint
+# ---------------------------
+
+@benchmark("search_default", iterations=30)
+def search_default(ctx):
+    """/api/search with no filters, first page (20 results)."""
+    yield lambda: ctx.get(JobSearchView, "/api/search")
+
+
+@benchmark("search_query", iterations=20)
+def search_query(ctx):
+    """/api/search?query=python engineer (icontains over title/description/company)."""
+    yield lambda: ctx.get(JobSearchView, "/api/search", data={"query": "python engineer"})
+
+
+@benchmark("search_country_month", iterations=20)
+def search_country_month(ctx):
+    """/api/search filtered by country and date_posted=month."""
+    yield lambda: ctx.get(JobSearchView, "/api/search", data={"country": "us", "date_posted": "month"})
+
+
+@benchmark("search_page_100_items", iterations=20)
+def search_page_100_items(ctx):
+    """/api/search with the maximum page size (100 results)."""
+    yield lambda: ctx.get(JobSearchView, "/api/search", data={"num_pages": 100})
+
+
+@benchmark("search_deep_page", iterations=20)
+def search_deep_page(ctx):
+    """/api/search deep into the result set (OFFSET cost)."""
+    page = max(1, ctx.total_jobs // 40)
+    yield lambda: ctx.get(JobSearchView, "/api/search", data={"page": page})
+
+
+# ---------------------------
+# Grouped listing
+# ---------------------------
+
+@benchmark("grouped_listing", iterations=3, warmup=1)
+def grouped_listing(ctx):
+    """/api/ - every company with all of its active jobs."""
+    def run():
+        response = ctx.get(JobsGroupedByCompany, "/api/")
+        return {"response_bytes": len(response.content)}
+    yield run
+
+
+# ---------------------------
+# Serialization
+# ---------------------------
+
+@benchmark("serialize_company_jobs_50", iterations=10, group="serialization")
+def serialize_company_jobs(ctx):
+    """CompanyJobsSerializer over 50 companies with prefetched active jobs."""
+    def run():
+        companies = Company.objects.prefetch_related(
+            Prefetch("jobs", queryset=Job.objects.filter(is_active=True))
+        ).order_by("id")[:50]
+        return {"companies": len(CompanyJobsSerializer(companies, many=True).data)}
+    yield run
+
+
+@benchmark("serialize_nested_100", iterations=30, group="serialization")
+def serialize_nested(ctx):
+    """NestedJobSerializer over 100 already-loaded jobs (no DB time)."""
+    jobs = list(Job.objects.select_related("company").order_by("id")[:100])
+    yield lambda: NestedJobSerializer(jobs, many=True).data
+
+
+@benchmark("render_nested_100", iterations=30, group="serialization")
+def render_nested(ctx):
+    """NestedJobSerializer + DRF's JSONRenderer over 100 already-loaded jobs."""
+    jobs = list(Job.objects.select_related("company").order_by("id")[:100])
+    renderer = JSONRenderer()
+    yield lambda: renderer.render(NestedJobSerializer(jobs, many=True).data)
+
+
+@benchmark("render_rows_100", iterations=30, group="serialization")
+def render_rows(ctx):
+    """The same 100 jobs as .values() rows: nested_job_rows + ORJSONRenderer (the list endpoints' path)."""
+    rows = list(Job.objects.order_by("id").values(*NESTED_JOB_VALUES)[:100])
+    renderer = ORJSONRenderer()
+    yield lambda: renderer.render(nested_job_rows(rows))
+
+
+# ---------------------------
+# Ingestion
+# ---------------------------
+
+@benchmark("parse_structured_description_200", iterations=10, group="ingestion")
+def parse_descriptions(ctx):
+    """parse_structured_description over 200 HTML descriptions."""
+    rng = random.Random(ctx.seed)
+    descriptions = [datagen.description_html(rng) for _ in range(200)]
+
+    def run():
+        for description in descriptions:
+            parse_structured_description(description)
+    yield run
+
+
+@benchmark("parse_timestamps_1000", iterations=20, group="ingestion")
+def parse_timestamps(ctx):
+    """parse_timestamp over 1000 posting dates in each platform's upstream format."""
+    rng = random.Random(ctx.seed)
+    now = timezone.now()
+    samples = [
+        (datagen.upstream_timestamp(rng, platform, now), platform)
+        for platform in (*datagen.PLATFORMS, "rss")
+        for _ in range(1000 // (len(datagen.PLATFORMS) + 1))
+    ]
+
+    def run():
+        for value, platform in samples:
+            parse_timestamp(value, platform)
+    yield run
+
+
+@benchmark("parse_timestamps_dateutil_1000", iterations=20, group="ingestion")
+def parse_timestamps_dateutil(ctx):
+    """Baseline for parse_timestamps_1000: dateutil on the same dates (Lever's epoch ms as strings)."""
+    from dateutil import parser as date_parser
+
+    rng = random.Random(ctx.seed)
+    now = timezone.now()
+    samples = [
+        str(datagen.upstream_timestamp(rng, platform, now))
+        for platform in (*datagen.PLATFORMS, "rss")
+        for _ in range(1000 // (len(datagen.PLATFORMS) + 1))
+    ]
+
+    def run():
+        for value in samples:
+            try:
+                date_parser.parse(value)
+            except (ValueError, OverflowError):
+                pass
+    yield run
+
+
+@benchmark("ingest_board_500", iterations=5, warmup=1, group="ingestion")
+def ingest_board(ctx):
+    """ingest.ingest_company for a 500-posting board: first sync then a re-sync of the same postings."""
+    rng = random.Random(ctx.seed)
+    counter = {"n": 0}
+    names = []
+
+    def run():
+        counter["n"] += 1
+        name = f"Benchmark Ingest {counter['n']}"
+        names.append(name)
+        comp = {"name": name, "platform": "greenhouse", "handle": f"bench-ingest-{counter['n']}"}
+        now = timezone.now()
+        postings = [datagen.posting_dict(rng, name, "greenhouse", i, now) for i in range(500)]
+        ingest.ingest_company(comp, jobs_data=postings)
+        ingest.ingest_company(comp, jobs_data=postings)
+        return {"postings_per_iteration": 1000}
+
+    try:
+        yield run
+    finally:
+        Job.objects.filter(company__name__in=names).delete()
+        Company.objects.filter(name__in=names).delete()
+
+
+@benchmark("deactivate_board_40000", iterations=5, warmup=1, group="ingestion")
+def deactivate_large_board(ctx):
+    """Stamp the 39,000 postings a pass saw on a 40,000-job board, then ingest.deactivate_missing the rest."""
+    name = "Benchmark Deactivation"
+    comp = {"name": name, "platform": "greenhouse", "handle": "bench-deactivation"}
+    company, _ = Company.objects.get_or_create(name=name)
+    Job.objects.bulk_create(
+        [
+            Job(company=company, platform="greenhouse", external_job_id=f"bench-deactivation-{i}", title="Engineer")
+            for i in range(40000)
+        ],
+        batch_size=2000,
+    )
+    board = Job.objects.filter(company=company, platform="greenhouse")
+    missing = list(board.order_by("?").values_list("pk", flat=True)[:1000])
+
+    def run():
+        board_pass = ingest.BoardPass()
+        board_pass.seen = 39000
+        board.update(is_active=True, last_seen_run=board_pass.run_id)
+        board.filter(pk__in=missing).update(last_seen_run=None)
+        ingest.deactivate_missing(comp, company, board_pass, complete=True)
+
+    try:
+        yield run
+    finally:
+        board.delete()
+        company.delete()
+
+
+@benchmark("pipeline_stub_8_boards", iterations=3, warmup=1, group="ingestion")
+def pipeline_stub(ctx):
+    """fetch -> parse -> upsert for 8 boards x 100 postings served by the local ATS stub."""
+    from jobs.stub_server import StubConfig, start_in_thread
+
+    server, base_url = start_in_thread(config=StubConfig(postings=100, seed=ctx.seed))
+    transport.configure(base_url=base_url)
+    boards = [
+        {"name": f"Stub Board {platform} {i}", "platform": platform, "handle": f"stub-{platform}-{i}"}
+        for platform in ("greenhouse", "lever", "ashby", "workable")
+        for i in range(2)
+    ]
+
+    def run():
+        rows = sum(ingest.ingest_company(comp) for comp in boards)
+        return {"rows_per_iteration": rows}
+
+    try:
+        yield run
+    finally:
+        transport.configure()
+        server.shutdown()
+        server.server_close()
+        names = [comp["name"] for comp in boards]
+        Job.objects.filter(company__name__in=names).delete()
+        Company.objects.filter(name__in=names).delete()
+
+
+# ---------------------------
+# Storage
+# ---------------------------
+
+def _ingest_writer(profile, boards, started, stop, ingested):
+    """Body of the writer process: ingest ``boards`` round-robin until ``stop`` is set."""
+    from django.db import connection
+
+    from jobs import db
+
+    db.apply_pragmas(connection, dict(db.SQLITE_DEFAULTS, **db.PROFILES[profile]))
+    try:
+        while not stop.is_set():
+            comp, postings = boards[ingested.value % len(boards)]
+            started.set()
+            ingest.ingest_company(comp, jobs_data=postings)
+            with ingested.get_lock():
+                ingested.value += 1
+    finally:
+        started.set()
+        connection.close()
+
+
+def _search_during_ingest(ctx, profile):
+    """
+    Time /api/search on this process's connection while a separate writer
+    process keeps bulk-ingesting 500-posting boards into the same file, as
+    the API and fetch_jobs do in production. Forked, so Linux/macOS only.
+    """
+    from django.db import connection
+
+    from jobs import db
+
+    rng = random.Random(ctx.seed)
+    now = timezone.now()
+    names = [f"Benchmark Storage {i}" for i in range(4)]
+    boards = [
+        ({"name": name, "platform": "greenhouse", "handle": f"bench-storage-{i}"},
+         [datagen.posting_dict(rng, name, "greenhouse", n, now) for n in range(500)])
+        for i, name in enumerate(names)
+    ]
+    # The journal mode belongs to the file: set it before the writer opens it
+    db.apply_pragmas(connection, dict(db.SQLITE_DEFAULTS, **db.PROFILES[profile]))
+    # A forked child must not share the parent's SQLite handle
+    connection.close()
+    mp = multiprocessing.get_context("fork")
+    started, stop, ingested = mp.Event(), mp.Event(), mp.Value("i", 0)
+    writer = mp.Process(
+        target=_ingest_writer, args=(profile, boards, started, stop, ingested), name="bench-ingest", daemon=True
+    )
+    writer.start()
+    started.wait()
+    db.apply_pragmas(connection, dict(db.SQLITE_DEFAULTS, **db.PROFILES[profile]))
+
+    def run():
+        ctx.get(JobSearchView, "/api/search", data={"query": "engineer"})
+        return {"boards_ingested": ingested.value}
+
+    try:
+        yield run
+    finally:
+        stop.set()
+        writer.join()
+        Job.objects.filter(company__name__in=names).delete()
+        Company.objects.filter(name__in=names).delete()
+        db.apply_pragmas(connection, db.SQLITE_DEFAULTS)
+        db.apply_profile(connection)
+
+
+@benchmark("search_during_ingest_default", iterations=300, warmup=5, group="storage")
+def search_during_ingest_default(ctx):
+    """/api/search?query=engineer while another process bulk-ingests, SQLite defaults (rollback journal)."""
+    yield from _search_during_ingest(ctx, "default")
+
+
+@benchmark("search_during_ingest_production", iterations=300, warmup=5, group="storage")
+def search_during_ingest_production(ctx):
+    """/api/search?query=engineer while another process bulk-ingests, production profile (WAL, tuned pragmas)."""
+    yield from _search_during_ingest(ctx, "production")
@@ -0,0 +1,207 @@
+"""
+Deterministic synthetic data for benchmarks.
+
+Everything is driven by a seeded ``random.Random`` so the same ``--scale`` and
+``--seed`` always produce the same companies, jobs and descriptions, which
+keeps results comparable across runs and machines.
+"""
+import random
+import zlib
+from datetime import timedelta
+from email.utils import format_datetime
+
+from django.utils import timezone
+
+SCALES = {
+    "1k": 1_000,
+    "10k": 10_000,
+    "100k": 100_000,
+    "1m": 1_000_000,
+}
+
+JOBS_PER_COMPANY = 40
+PLATFORMS = ["greenhouse", "lever", "ashby", "workable", "smartrecruiters"]
+
+COMPANY_PREFIXES = [
+    "Acme", "Blue", "Bright", "Cloud", "Core", "Data", "Deep", "Edge", "Flux", "Green",
+    "Hyper", "Iron", "Kite", "Lumen", "Meta", "Nova", "Open", "Pixel", "Quant", "Red",
+    "Silver", "Swift", "Terra", "Ultra", "Vector", "Wave", "Zen",
+]
+COMPANY_SUFFIXES = [
+    "Labs", "Systems", "Works", "Analytics", "Health", "Pay", "Logistics", "AI", "Cloud",
+    "Robotics", "Security", "Media", "Energy", "Bio", "Games", "Finance",
+]
+
+TITLE_LEVELS = ["Junior", "Mid-level", "Senior", "Staff", "Principal", "Lead", ""]
+TITLE_ROLES = [
+    "Software Engineer", "Backend Engineer", "Frontend Engineer", "Data Scientist",
+    "Data Engineer", "Product Manager", "Product Designer", "DevOps Engineer",
+    "Site Reliability Engineer", "Machine Learning Engineer", "Security Engineer",
+    "Customer Success Manager", "Account Executive", "Technical Writer", "QA Engineer",
+]
+
+LOCATIONS = [
+    ("Remote", None), ("New York, NY, United States", "us"), ("San Francisco, CA, USA", "us"),
+    ("Austin, TX, United States", "us"), ("London, United Kingdom", "uk"), ("Manchester, England", "uk"),
+    ("Toronto, Canada", "ca"), ("Berlin, Germany", "de"), ("Tbilisi, Georgia", "ge"),
+    ("Amsterdam, Netherlands", "nl"), ("Dublin, Ireland", "ie"), ("Remote - Europe", None),
+    ("Paris, France", "fr"), ("Warsaw, Poland", "pl"), ("Singapore", "sg"),
+]
+COUNTRY_BY_LOCATION = dict(LOCATIONS)
+
+SKILLS = [
+    "Python", "Django", "PostgreSQL", "Redis", "Kubernetes", "Docker", "AWS", "GCP",
+    "TypeScript", "React", "Go", "Rust", "Terraform", "Kafka", "Elasticsearch", "GraphQL",
+    "Java", "Spring", "Node.js", "Machine Learning", "CI/CD", "GitHub Actions",
+]
+
+RESPONSIBILITIES = [
+    "Design, build and operate services that handle millions of requests per day",
+    "Collaborate with product and design to ship features end to end",
+    "Own the reliability and performance of critical systems",
+    "Mentor other engineers and contribute to technical direction",
+    "Write clear documentation and participate in code reviews",
+    "Improve observability, alerting and on-call processes",
+    "Break down ambiguous problems into well-scoped deliverables",
+    "Partner with customers to understand their workflows and pain points",
+]
+
+REQUIREMENTS = [
+    "3+ years of professional experience in a similar role",
+    "Strong communication skills and a bias for action",
+    "Experience with distributed systems and relational databases",
+    "Comfort working in a fast-paced, remote-first environment",
+    "A track record of shipping high quality software",
+    "Experience with cloud infrastructure and infrastructure as code",
+]
+
+BENEFITS = [
+    "Competitive salary and meaningful equity",
+    "Flexible working hours and a fully remote option",
+    "Comprehensive health, dental and vision insurance",
+    "Generous learning and development budget",
+    "25 days of paid vacation plus public holidays",
+    "Home office setup allowance",
+]
+
+
+def scale_to_count(scale):
+    if scale in SCALES:
+        return SCALES[scale]
+    return int(scale)
+
+
+def company_names(count, rng):
+    names = []
+    seen = set()
+    i = 0
+    while len(names) < count:
+        name = f"{rng.choice(COMPANY_PREFIXES)}{rng.choice(COMPANY_SUFFIXES)}"
+        if name in seen:
+            i += 1
+            name = f"{name} {i}"
+        seen.add(name)
+        names.append(name)
+    return names
+
+
+def description_html(rng):
+    """A realistic ATS-style HTML job description."""
+    skills = rng.sample(SKILLS, 5)
+    parts = [
+        "<p><strong>About the role</strong></p>",
+        f"<p>We are looking for someone to join our {rng.choice(['platform', 'growth', 'core', 'data', 'payments'])} "
+        f"team. You will work {rng.choice(['fully remote', 'in a hybrid setup', 'on-site in our office'])} "
+        f"with a small, senior team using {', '.join(skills[:3])}.</p>",
+        "<h3>Responsibilities</h3><ul>",
+        *[f"<li>{item}</li>" for item in rng.sample(RESPONSIBILITIES, 4)],
+        "</ul><h3>Requirements</h3><ul>",
+        *[f"<li>{item}</li>" for item in rng.sample(REQUIREMENTS, 3)],
+        f"<li>Hands-on experience with {skills[3]} and {skills[4]}</li>",
+        "</ul><h3>Benefits</h3><ul>",
+        *[f"<li>{item}</li>" for item in rng.sample(BENEFITS, 3)],
+        "</ul>",
+    ]
+    if rng.random() < 0.4:
+        low = rng.randrange(60, 180) * 1000
+        parts.append(f"<p>Salary range: ${low:,} - ${low + rng.randrange(20, 60) * 1000:,} USD</p>")
+    return "".join(parts)
+
+
+def posting_dict(rng, company_name, platform, index, now):
+    """A normalized posting as the fetchers return it."""
+    level = rng.choice(TITLE_LEVELS)
+    title = f"{level} {rng.choice(TITLE_ROLES)}".strip()
+    location = rng.choice(LOCATIONS)[0]
+    external_id = f"{platform}-{zlib.crc32(company_name.encode()):08x}-{index}"
+    return {
+        "title": title,
+        "company": company_name,
+        "location": location,
+        "description": description_html(rng),
+        "apply_url": f"https://jobs.example.com/{company_name.replace(' ', '').lower()}/{index}",
+        "posted_at": now - timedelta(minutes=rng.randrange(0, 60 * 24 * 90)),
+        "platform": platform,
+        "external_job_id": external_id,
+        "raw": {"id": external_id, "source": "benchmark"},
+        "logo": None,
+    }
+
+
+def upstream_timestamp(rng, platform, now):
+    """A posting date the way ``platform``'s API sends it."""
+    posted = now - timedelta(seconds=rng.randrange(0, 60 * 60 * 24 * 90))
+    if platform == "lever":
+        return int(posted.timestamp() * 1000)
+    if platform in ("workable", "rss"):
+        return format_datetime(posted)
+    if platform == "smartrecruiters":
+        return posted.strftime("%Y-%m-%dT%H:%M:%S.000Z")
+    return posted.isoformat()
+
+
+def generate(total_jobs, seed=42, batch_size=5000, stdout=None):
+    """Populate the current database with ``total_jobs`` jobs. Returns (companies, jobs)."""
+    from jobs.fetchers import get_logo_url
+    from jobs.models import Company, Job
+
+    rng = random.Random(seed)
+    now = timezone.now()
+    n_companies = max(1, total_jobs // JOBS_PER_COMPANY)
+
+    companies = [
+        Company(name=name, logo=get_logo_url(name), platform=rng.choice(PLATFORMS))
+        for name in company_names(n_companies, rng)
+    ]
+    Company.objects.bulk_create(companies, batch_size=batch_size)
+    companies = list(Company.objects.order_by("id"))
+
+    created = 0
+    batch = []
+    for i in range(total_jobs):
+        company = companies[i % len(companies)]
+        posting = posting_dict(rng, company.name, company.platform, i, now)
+        batch.append(Job(
+            title=posting["title"],
+            company=company,
+            location=posting["location"],
+            location_country=COUNTRY_BY_LOCATION[posting["location"]],
+            description=posting["description"],
+            apply_url=posting["apply_url"],
+            platform=company.platform,
+            external_job_id=f"bench-{i}",
+            posted_at=posting["posted_at"] if rng.random() > 0.05 else None,
+            is_active=rng.random() > 0.15,
+            raw=posting["raw"],
+            company_logo=company.logo,
+        ))
+        if len(batch) >= batch_size:
+            Job.objects.bulk_create(batch, batch_size=batch_size)
+            created += len(batch)
+            batch = []
+            if stdout is not None and created % (batch_size * 20) == 0:
+                stdout.write(f"  generated {created}/{total_jobs} jobs")
+    if batch:
+        Job.objects.bulk_create(batch, batch_size=batch_size)
+        created += len(batch)
+    return len(companies), created
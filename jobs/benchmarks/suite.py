@@ -0,0 +1,160 @@
+"""
+Benchmark registry and runner.
+
+A benchmark is a generator function registered with ``@benchmark``: code before
+``yield`` is setup, the yielded zero-argument callable is what gets timed, and
+code after ``yield`` is teardown. Results are plain dicts so they can be dumped
+as JSON and compared with a previous run.
+"""
+import gc
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+
+import django
+from django.db import connection, reset_queries
+from django.test import RequestFactory
+
+BENCHMARKS = {}
+
+
+@dataclass
+class Benchmark:
+    name: str
+    factory: object
+    iterations: int
+    warmup: int
+    group: str
+    description: str
+
+
+def benchmark(name, iterations=20, warmup=2, group="api"):
+    """Register a benchmark factory (see module docstring)."""
+    def decorator(factory):
+        BENCHMARKS[name] = Benchmark(
+            name=name,
+            factory=factory,
+            iterations=iterations,
+            warmup=warmup,
+            group=group,
+            description=(factory.__doc__ or "").strip(),
+        )
+        return factory
+    return decorator
+
+
+class Context:
+    """State shared by benchmarks in one run."""
+
+    def __init__(self, scale, total_jobs, seed):
+        self.scale = scale
+        self.total_jobs = total_jobs
+        self.seed = seed
+        self.rf = RequestFactory()
+
+    def get(self, view_class, path, **extra):
+        """Call a DRF view in-process and render it, like a real request minus middleware."""
+        response = view_class.as_view()(self.rf.get(path, **extra))
+        if hasattr(response, "render"):
+            response.render()
+        return response
+
+
+def _stats(samples):
+    ordered = sorted(samples)
+    p95_index = max(0, int(round(0.95 * (len(ordered) - 1))))
+    p99_index = max(0, int(round(0.99 * (len(ordered) - 1))))
+    mean = statistics.fmean(ordered)
+    return {
+        "iterations": len(ordered),
+        "min_ms": round(ordered[0] * 1000, 4),
+        "median_ms": round(statistics.median(ordered) * 1000, 4),
+        "mean_ms": round(mean * 1000, 4),
+        "p95_ms": round(ordered[p95_index] * 1000, 4),
+        "p99_ms": round(ordered[p99_index] * 1000, 4),
+        "max_ms": round(ordered[-1] * 1000, 4),
+        "stdev_ms": round(statistics.stdev(ordered) * 1000, 4) if len(ordered) > 1 else 0.0,
+        "ops_per_sec": round(1 / mean, 3) if mean else None,
+    }
+
+
+def run_benchmark(bench, ctx, iterations=None):
+    iterations = iterations or bench.iterations
+    gen = bench.factory(ctx)
+    fn = next(gen)
+    extra = {}
+    try:
+        for _ in range(bench.warmup):
+            fn()
+        samples = []
+        gc_was_enabled = gc.isenabled()
+        gc.collect()
+        gc.disable()
+        try:
+            for _ in range(iterations):
+                reset_queries()
+                start = time.perf_counter()
+                result = fn()
+                samples.append(time.perf_counter() - start)
+                if isinstance(result, dict):
+                    extra = result
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+    finally:
+        gen.close()
+    stats = _stats(samples)
+    stats["group"] = bench.group
+    if extra:
+        stats["extra"] = extra
+    return stats
+
+
+def run(ctx, names=None, iterations=None, stdout=None):
+    selected = [BENCHMARKS[name] for name in (names or BENCHMARKS)]
+    results = {}
+    for bench in selected:
+        if stdout is not None:
+            stdout.write(f"  {bench.name} ...", ending="")
+            stdout.flush()
+        results[bench.name] = run_benchmark(bench, ctx, iterations)
+        if stdout is not None:
+            stdout.write(f" median {results[bench.name]['median_ms']:.2f}ms")
+    return results
+
+
+def environment():
+    try:
+        revision = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, timeout=5,
+        ).stdout.strip() or None
+    except Exception:
+        revision = None
+    return {
+        "git_revision": revision,
+        "python": sys.version.split()[0],
+        "django": django.get_version(),
+        "database": connection.vendor,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+
+
+def compare(current, baseline):
+    """Rows of (name, baseline median, current median, change %) for benchmarks in both runs."""
+    rows = []
+    base_results = baseline.get("benchmarks", {})
+    for name, result in current.get("benchmarks", {}).items():
+        base = base_results.get(name)
+        if not base:
+            continue
+        before, after = base["median_ms"], result["median_ms"]
+        change = ((after - before) / before * 100) if before else None
+        rows.append((name, before, after, change))
+    return rows
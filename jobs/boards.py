@@ -0,0 +1,140 @@
+"""
+Board registry: the boards the fetch commands work through live in the
+``Board`` table. Helpers here load them for the ingestion code and move them in
+and out of JSON/CSV for bulk edits (see the import_boards/export_boards commands).
+"""
+import csv
+import io
+import json
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from .models import Board
+
+# Columns of the JSON/CSV interchange format, in order
+FIELDS = [
+    "name", "platform", "handle", "url", "selector", "logo", "enabled", "priority",
+    "max_postings", "timeout_seconds", "min_interval_seconds",
+]
+OPTIONAL_NUMBERS = {"max_postings": int, "timeout_seconds": float, "min_interval_seconds": int}
+
+
+def enabled_boards(platform=None):
+    """Enabled boards as ingestion config dicts, highest priority first."""
+    qs = Board.objects.filter(enabled=True)
+    if platform:
+        qs = qs.filter(platform=platform)
+    return [board.as_config() for board in qs.order_by("-priority", "name")]
+
+
+# ---------------------------
+# Import / export
+# ---------------------------
+
+def _clean(row):
+    """Normalise one imported row (CSV gives strings for everything)."""
+    data = {}
+    for field in FIELDS:
+        if field not in row:
+            continue
+        value = row[field]
+        if isinstance(value, str):
+            value = value.strip()
+        if field == "enabled":
+            if isinstance(value, str):
+                value = value.lower() not in ("0", "false", "no", "off", "")
+            data[field] = bool(value)
+        elif field == "priority":
+            data[field] = int(value or 0)
+        elif field in OPTIONAL_NUMBERS:
+            data[field] = OPTIONAL_NUMBERS[field](value) if value not in ("", None) else None
+        else:
+            data[field] = value or ""
+    if not data.get("platform") or not (data.get("handle") or data.get("url")):
+        raise ValueError(f"Board needs a platform and a handle or url: {row!r}")
+    if not data.get("name"):
+        data["name"] = data.get("handle") or data["url"]
+    return data
+
+
+def _validate(board, label):
+    # Uniqueness is already checked against the file and the boards loaded up front
+    try:
+        board.full_clean(validate_unique=False, validate_constraints=False)
+    except ValidationError as exc:
+        errors = "; ".join(f"{field}: {' '.join(messages)}" for field, messages in exc.message_dict.items())
+        raise ValueError(f"{label}: {errors}") from exc
+
+
+def parse(text, fmt):
+    if fmt == "csv":
+        return list(csv.DictReader(io.StringIO(text)))
+    data = json.loads(text)
+    return data["boards"] if isinstance(data, dict) else data
+
+
+def import_boards(rows, disable_missing=False, dry_run=False):
+    """
+    Create or update boards from dicts keyed by FIELDS; (platform, handle, url)
+    identifies a board. With ``disable_missing`` boards absent from ``rows`` are
+    disabled (never deleted, so their history and schedule are kept).
+    Returns counts of created/updated/unchanged/disabled boards.
+
+    Raises ValueError naming the first invalid or duplicated row; nothing is
+    saved then.
+    """
+    cleaned = []
+    for number, row in enumerate(rows, 1):
+        try:
+            cleaned.append(_clean(row))
+        except (TypeError, ValueError) as exc:
+            raise ValueError(f"Board {number}: {exc}") from exc
+    counts = {"created": 0, "updated": 0, "unchanged": 0, "disabled": 0}
+    existing = {(b.platform, b.handle, b.url): b for b in Board.objects.all()}
+    seen = set()
+
+    with transaction.atomic():
+        for number, data in enumerate(cleaned, 1):
+            key = (data["platform"], data.get("handle", ""), data.get("url", ""))
+            label = f"Board {number} ({data['platform']}: {data.get('handle') or data.get('url')})"
+            if key in seen:
+                raise ValueError(f"{label} appears more than once")
+            seen.add(key)
+            board = existing.get(key)
+            if board is None:
+                _validate(Board(**data), label)
+                if not dry_run:
+                    Board.objects.create(**data)
+                counts["created"] += 1
+                continue
+            changed = [field for field, value in data.items() if getattr(board, field) != value]
+            if not changed:
+                counts["unchanged"] += 1
+                continue
+            for field in changed:
+                setattr(board, field, data[field])
+            _validate(board, label)
+            if not dry_run:
+                board.save(update_fields=changed + ["updated_at"])
+            counts["updated"] += 1
+
+        if disable_missing:
+            missing = [b.pk for key, b in existing.items() if key not in seen and b.enabled]
+            if missing and not dry_run:
+                Board.objects.filter(pk__in=missing).update(enabled=False)
+            counts["disabled"] = len(missing)
+    return counts
+
+
+def export_boards(fmt="json", include_disabled=True):
+    qs = Board.objects.all() if include_disabled else Board.objects.filter(enabled=True)
+    rows = [{field: getattr(board, field) for field in FIELDS} for board in qs.order_by("platform", "name")]
+    if fmt == "csv":
+        out = io.StringIO()
+        writer = csv.DictWriter(out, fieldnames=FIELDS)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow({k: "" if v is None else v for k, v in row.items()})
+        return out.getvalue()
+    return json.dumps({"boards": rows}, indent=2) + "\n"
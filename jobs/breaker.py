@@ -0,0 +1,73 @@
+"""
+Per-board circuit breaker, persisted on ``BoardState`` so it survives across runs.
+
+After ``FAILURE_THRESHOLD`` failed fetches in a row a board's breaker opens and
+the board is skipped until ``breaker_open_until``. The wait doubles with every
+further failure (``BASE_BACKOFF`` up to ``MAX_BACKOFF``, jittered). Once it has
+passed the breaker is half-open: the next fetch is a probe, which closes the
+breaker on success or reopens it with a longer wait on failure.
+"""
+import logging
+import random
+from datetime import timedelta
+
+from django.utils import timezone
+
+from .models import BoardState
+
+logger = logging.getLogger(__name__)
+
+FAILURE_THRESHOLD = 3
+BASE_BACKOFF = 30 * 60
+MAX_BACKOFF = 7 * 24 * 60 * 60
+
+FIELDS = ["breaker_state", "consecutive_failures", "breaker_open_until", "last_error"]
+
+
+def backoff_seconds(failures, threshold=FAILURE_THRESHOLD):
+    return min(MAX_BACKOFF, BASE_BACKOFF * 2 ** max(0, failures - threshold))
+
+
+def allow(state, now=None):
+    """Whether the board may be fetched now; moves an expired open breaker to half-open."""
+    if state.breaker_state == BoardState.BREAKER_CLOSED:
+        return True
+    now = now or timezone.now()
+    if state.breaker_state == BoardState.BREAKER_OPEN:
+        if state.breaker_open_until and now < state.breaker_open_until:
+            return False
+        state.breaker_state = BoardState.BREAKER_HALF_OPEN
+        state.save(update_fields=["breaker_state"])
+    return True
+
+
+def error_summary(company_metrics):
+    if not company_metrics.errors:
+        return ""
+    error = company_metrics.errors[0]
+    return f"{error['error_class']}: {error['message']}"[:1000]
+
+
+def record(state, failed, error="", now=None, threshold=FAILURE_THRESHOLD):
+    """Update the breaker after a fetch of ``state``'s board and save it."""
+    now = now or timezone.now()
+    if not failed:
+        if state.breaker_state != BoardState.BREAKER_CLOSED:
+            logger.info("%s (%s) recovered, closing its circuit breaker", state.company_name, state.platform)
+        state.breaker_state = BoardState.BREAKER_CLOSED
+        state.consecutive_failures = 0
+        state.breaker_open_until = None
+        state.last_error = ""
+    else:
+        state.consecutive_failures += 1
+        state.last_error = error
+        if state.breaker_state == BoardState.BREAKER_HALF_OPEN or state.consecutive_failures >= threshold:
+            wait = backoff_seconds(state.consecutive_failures, threshold) * random.uniform(0.9, 1.1)
+            state.breaker_state = BoardState.BREAKER_OPEN
+            state.breaker_open_until = now + timedelta(seconds=wait)
+            logger.warning(
+                "%s (%s) failed %d time(s) in a row, skipping it for %.1f h: %s",
+                state.company_name, state.platform, state.consecutive_failures, wait / 3600, error,
+            )
+    state.save(update_fields=FIELDS)
+    return state.breaker_state
@@ -0,0 +1,92 @@
+"""
+Company lookup for ingestion, by normalized name.
+
+Boards name their company in their config, and aggregator feeds (jobs.ge) name
+one per posting, so an ingest run needs a company id for every board and, for
+aggregators, for every posting. A ``CompanyResolver`` lives for one run:
+
+- the first lookup loads every existing company in one query, keyed by
+  ``normalize_name`` ("ACME  Corp " and "Acme Corp" are the same company);
+- the companies missing from a lookup are created with one ``bulk_create``;
+- lookups return ids, so jobs are written with ``company_id`` directly.
+
+That replaces a get_or_create (and possibly a save) per board, or per posting
+for aggregators. A resolver is not thread-safe: use it from the thread that
+writes (the IngestWriter's, when fetching concurrently).
+"""
+import re
+from typing import NamedTuple
+
+from .fetchers import get_logo_url
+from .models import Company
+
+_WHITESPACE_RE = re.compile(r"\s+")
+NAME_LENGTH = Company._meta.get_field("name").max_length
+
+
+def normalize_name(name):
+    return _WHITESPACE_RE.sub(" ", name or "").strip().casefold()
+
+
+class ResolvedCompany(NamedTuple):
+    id: int
+    name: str
+    logo: str | None
+
+
+class CompanyResolver:
+    def __init__(self):
+        self._companies = None  # normalized name -> ResolvedCompany
+
+    def _load(self):
+        companies = {}
+        # Oldest first, so the original wins if names only differ in case/spacing
+        for company_id, name, logo in Company.objects.order_by("id").values_list("id", "name", "logo"):
+            companies.setdefault(normalize_name(name), ResolvedCompany(company_id, name, logo))
+        return companies
+
+    def resolve(self, companies):
+        """
+        ``companies`` maps company names to the fields (platform, logo) to
+        create them with. Returns a dict of name -> ResolvedCompany, creating
+        the companies that don't exist and filling in missing logos (by
+        default from Logo.dev). Blank names are left out.
+        """
+        if self._companies is None:
+            self._companies = self._load()
+        missing, logos = {}, {}
+        for name, defaults in companies.items():
+            key = normalize_name(name)
+            if not key:
+                continue
+            company = self._companies.get(key)
+            if company is None:
+                name = _WHITESPACE_RE.sub(" ", name).strip()[:NAME_LENGTH]
+                fields = {**defaults, "logo": defaults.get("logo") or get_logo_url(name)}
+                missing.setdefault(key, Company(name=name, **fields))
+            elif not company.logo:
+                logos[key] = defaults.get("logo") or get_logo_url(company.name)
+        if missing:
+            self._create(missing)
+        if logos:
+            self._set_logos(logos)
+        return {
+            name: self._companies[normalize_name(name)]
+            for name in companies
+            if normalize_name(name) in self._companies
+        }
+
+    def _create(self, missing):
+        # Another process may have created some since the load: keep theirs
+        Company.objects.bulk_create(missing.values(), ignore_conflicts=True)
+        names = [company.name for company in missing.values()]
+        for company_id, name, logo in Company.objects.filter(name__in=names).values_list("id", "name", "logo"):
+            self._companies.setdefault(normalize_name(name), ResolvedCompany(company_id, name, logo))
+
+    def _set_logos(self, logos):
+        updated = []
+        for key, logo in logos.items():
+            company = self._companies[key]._replace(logo=logo)
+            self._companies[key] = company
+            updated.append(Company(pk=company.id, logo=logo))
+        Company.objects.bulk_update(updated, ["logo"])
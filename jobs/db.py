@@ -0,0 +1,76 @@
+"""
+SQLite storage profiles, applied to every new database connection.
+
+``settings.DB_PROFILE`` picks one. "default" leaves SQLite as Django configures
+it. "production" is for serving the API from SQLite while ingestion writes to
+the same file:
+
+- WAL journal: readers don't block the writer and the writer doesn't block
+  readers, so searches keep answering during a fetch run;
+- synchronous=NORMAL: no fsync per commit, which is safe with WAL (a power
+  cut can lose the last commits but can't corrupt the file);
+- a 64 MB page cache and 256 MB of memory-mapped reads;
+- busy_timeout: wait up to 10 s for the write lock instead of failing with
+  "database is locked";
+- temp tables and indices in memory.
+
+Persistent connections (``CONN_MAX_AGE``) for the production profile are set
+in settings next to ``DATABASES``.
+"""
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+PROFILES = {
+    "default": {},
+    "production": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -64000,  # negative = KiB
+        "mmap_size": 256 * 1024 * 1024,
+        "busy_timeout": 10000,
+        "temp_store": "MEMORY",
+    },
+}
+
+# What a connection has with no profile applied, to undo one (e.g. in benchmarks)
+SQLITE_DEFAULTS = {
+    "journal_mode": "DELETE",
+    "synchronous": "FULL",
+    "cache_size": -2000,
+    "mmap_size": 0,
+    "busy_timeout": 5000,  # Python's sqlite3 default timeout
+    "temp_store": "DEFAULT",
+}
+
+
+def pragmas(profile=None):
+    name = profile or getattr(settings, "DB_PROFILE", "default")
+    try:
+        return PROFILES[name]
+    except KeyError:
+        raise ImproperlyConfigured(f"Unknown DB_PROFILE {name!r}, expected one of: {', '.join(PROFILES)}")
+
+
+def read_only(connection):
+    """Whether the connection opens its file read-only (a ``mode=ro`` URI, e.g. the local replica)."""
+    return "mode=ro" in str(connection.settings_dict["NAME"])
+
+
+def apply_pragmas(connection, values):
+    if connection.vendor != "sqlite" or not values:
+        return
+    if read_only(connection):
+        # The journal mode belongs to the file and only its writers can change it
+        values = {name: value for name, value in values.items() if name != "journal_mode"}
+    with connection.cursor() as cursor:
+        for name, value in values.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+
+
+def apply_profile(connection, profile=None):
+    apply_pragmas(connection, pragmas(profile))
+
+
+def configure_connection(sender, connection, **kwargs):
+    """connection_created handler (connected in JobsConfig.ready)."""
+    apply_profile(connection)
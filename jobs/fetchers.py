@@ -1,7 +1,20 @@
+"""
+Board fetchers, registered per platform in ``FETCHERS``. Each one is a
+generator yielding ``Posting`` records as it reads the board, so ingestion can write them in batches without the whole
+board in memory; JSON APIs are parsed incrementally from the streamed response
+(see ``jobs.streaming``). Fetchers log and record their errors and then stop,
+so a failed board just yields fewer postings.
+"""
 import httpx
 from bs4 import BeautifulSoup
-from .utils import parse_date, robots_allowed
+from contextlib import contextmanager
+from lxml import etree
+from .utils import parse_timestamp, robots_allowed
+from . import instrumentation, transport
+from .postings import Posting
+from .streaming import iter_json_array
 import logging
+from typing import Callable, NamedTuple
 from urllib.parse import urljoin
 import feedparser
 
@@ -12,148 +25,272 @@ HEADERS = {"User-Agent": "BreneoJobAggregator/1.0 (+https://yourdomain.example)"
 LOGO_DEV_PUBLIC_KEY = "pk_K96TtQYUTvy3hHXDyIEUqw"
 BASE_URL = "https://jobs.ge"
 
+# Platform name -> Fetcher, filled in by @register below
+FETCHERS = {}
+
+
+class Fetcher(NamedTuple):
+    func: Callable
+    # Which board field the fetcher is called with: "handle", or "url" (falling back to the handle)
+    source: str = "handle"
+    # Optional board config keys passed on as keyword arguments
+    options: tuple = ()
+    # Postings name their own employers (job sites), rather than all being the board's company
+    aggregator: bool = False
+
+
+def register(platform, source="handle", options=(), aggregator=False):
+    """Register the decorated function as the fetcher for ``platform``."""
+    def decorator(func):
+        FETCHERS[platform] = Fetcher(func, source, options, aggregator)
+        return func
+    return decorator
+
 
 def safe_get(url, timeout=8):
-    r = httpx.get(url, headers=HEADERS, timeout=timeout)
-    r.raise_for_status()
+    with instrumentation.stage("http_fetch"):
+        r = transport.get_client().get(url, headers=HEADERS, timeout=transport.effective_timeout(timeout))
+        instrumentation.record_response(r.status_code, len(r.content))
+        r.raise_for_status()
+    return r
+
+
+def safe_post(url, json=None, timeout=8):
+    with instrumentation.stage("http_fetch"):
+        r = transport.get_client().post(url, json=json, headers=HEADERS, timeout=transport.effective_timeout(timeout))
+        instrumentation.record_response(r.status_code, len(r.content))
+        r.raise_for_status()
     return r
 
 
+@contextmanager
+def stream_request(method, url, json=None, timeout=8):
+    """Like safe_get/safe_post but leaves the body unread: read it with ``iter_body``."""
+    client = transport.get_client()
+    request = client.build_request(
+        method, url, json=json, headers=HEADERS, timeout=transport.effective_timeout(timeout)
+    )
+    with instrumentation.stage("http_fetch"):
+        r = client.send(request, stream=True)
+    try:
+        instrumentation.record_response(r.status_code, 0)
+        r.raise_for_status()
+        yield r
+    finally:
+        r.close()
+
+
+def iter_body(r, chunk_size=64 * 1024):
+    """Yield a streamed response's body in chunks, timing the reads as http_fetch."""
+    chunks = r.iter_bytes(chunk_size)
+    while True:
+        with instrumentation.stage("http_fetch"):
+            chunk = next(chunks, None)
+        if chunk is None:
+            return
+        instrumentation.add_bytes(len(chunk))
+        yield chunk
+
+
+def clean_html(raw_html, separator="\n"):
+    """Strip tags from an HTML fragment, returning plain text."""
+    if not raw_html:
+        return ""
+    with instrumentation.stage("html_cleaning"):
+        return BeautifulSoup(raw_html, "html.parser").get_text(separator=separator).strip()
+
+
 def get_logo_url(company_name: str, size=101) -> str:
     safe_name = company_name.replace(" ", "")
     return f"https://img.logo.dev/name/{safe_name}?token={LOGO_DEV_PUBLIC_KEY}&size={size}&retina=true"
 
 
+@register("greenhouse")
 def fetch_greenhouse(handle, company_name, logo=None):
     logo = logo or get_logo_url(company_name)
     url = f"https://boards-api.greenhouse.io/v1/boards/{handle}/jobs"
-    jobs = []
     try:
-        r = safe_get(url)
-        data = r.json()
-        for job in data.get("jobs", []):
-            job_id = job.get("id")
-            absolute_url = job.get("absolute_url") or f"https://boards.greenhouse.io/{handle}/jobs/{job_id}"
-            content = job.get("content", "")
-            # If the API doesn't include content, attempt to fetch the job page HTML
-            if not content and absolute_url:
-                try:
-                    pg = safe_get(absolute_url)
-                    soup = BeautifulSoup(pg.text, "html.parser")
-                    desc_el = soup.select_one("div.content") or soup.select_one(".posting-description") or soup.select_one("#content")
-                    content = desc_el.get_text(separator="\n").strip() if desc_el else ""
-                except Exception:
-                    content = ""
-
-            text_desc = BeautifulSoup(content or "", "html.parser").get_text(separator="\n").strip()
-            jobs.append({
-                "title": job.get("title") or "",
-                "company": company_name,
-                "location": (job.get("location") or {}).get("name", ""),
-                "description": text_desc,
-                "apply_url": absolute_url,
-                "posted_at": parse_date(job.get("updated_at") or job.get("created_at")),
-                "platform": "greenhouse",
-                "external_job_id": str(job_id),
-                "raw": job,
-                "logo": logo,
-            })
-    except Exception:
+        with stream_request("GET", url) as r:
+            for job in iter_json_array(iter_body(r), ("jobs",)):
+                job_id = job.get("id")
+                absolute_url = job.get("absolute_url") or f"https://boards.greenhouse.io/{handle}/jobs/{job_id}"
+                content = job.get("content", "")
+                # If the API doesn't include content, attempt to fetch the job page HTML
+                if not content and absolute_url:
+                    try:
+                        pg = safe_get(absolute_url)
+                        with instrumentation.stage("html_cleaning"):
+                            soup = BeautifulSoup(pg.text, "html.parser")
+                            desc_el = soup.select_one("div.content") or soup.select_one(".posting-description") or soup.select_one("#content")
+                            content = desc_el.get_text(separator="\n").strip() if desc_el else ""
+                    except Exception:
+                        content = ""
+
+                text_desc = clean_html(content)
+                yield Posting(
+                    title=job.get("title") or "",
+                    company=company_name,
+                    location=(job.get("location") or {}).get("name", ""),
+                    description=text_desc,
+                    apply_url=absolute_url,
+                    posted_at=parse_timestamp(job.get("updated_at") or job.get("created_at"), "greenhouse"),
+                    platform="greenhouse",
+                    external_job_id=str(job_id or ""),
+                    raw=job,
+                    logo=logo,
+                )
+    except Exception as exc:
+        instrumentation.record_error(exc)
         logger.exception("Greenhouse fetch error for %s (%s)", company_name, handle)
-    return jobs
 
 
+@register("lever")
 def fetch_lever(handle, company_name, logo=None):
     logo = logo or get_logo_url(company_name)
     url = f"https://api.lever.co/v0/postings/{handle}?mode=json"
-    jobs = []
     try:
-        r = safe_get(url)
-        data = r.json()
-        for job in data:
-            job_id = job.get("id") or job.get("uuid") or job.get("postingId")
-            hosted_url = job.get("hostedUrl") or job.get("applyUrl") or job.get("url")
-            html_desc = job.get("description") or ""
-            text_desc = BeautifulSoup(html_desc, "html.parser").get_text(separator="\n").strip()
-            jobs.append({
-                "title": job.get("text") or job.get("title") or "",
-                "company": company_name,
-                "location": (job.get("categories") or {}).get("location", ""),
-                "description": text_desc,
-                "apply_url": hosted_url,
-                "posted_at": parse_date(job.get("postDate") or job.get("datePosted")),
-                "platform": "lever",
-                "external_job_id": str(job_id),
-                "raw": job,
-                "logo": logo,
-            })
-    except Exception:
+        with stream_request("GET", url) as r:
+            for job in iter_json_array(iter_body(r)):
+                job_id = job.get("id") or job.get("uuid") or job.get("postingId")
+                hosted_url = job.get("hostedUrl") or job.get("applyUrl") or job.get("url")
+                text_desc = clean_html(job.get("description"))
+                yield Posting(
+                    title=job.get("text") or job.get("title") or "",
+                    company=company_name,
+                    location=(job.get("categories") or {}).get("location", ""),
+                    description=text_desc,
+                    apply_url=hosted_url,
+                    posted_at=parse_timestamp(job.get("createdAt") or job.get("postDate") or job.get("datePosted"), "lever"),
+                    platform="lever",
+                    external_job_id=str(job_id or ""),
+                    raw=job,
+                    logo=logo,
+                )
+    except Exception as exc:
+        instrumentation.record_error(exc)
         logger.exception("Lever fetch error for %s (%s)", company_name, handle)
-    return jobs
 
 
+def iter_rss_items(r):
+    """Yield (title, link, description, pubDate) for each <item> of a streamed RSS response."""
+    parser = etree.XMLPullParser(events=("end",), tag="item", recover=True)
+    for chunk in iter_body(r):
+        with instrumentation.stage("html_cleaning"):
+            parser.feed(chunk)
+            items = []
+            for _, item in parser.read_events():
+                items.append((
+                    item.findtext("title"), item.findtext("link"), item.findtext("description"), item.findtext("pubDate"),
+                ))
+                # Drop parsed items so the tree doesn't grow with the feed
+                item.clear()
+                while item.getprevious() is not None:
+                    del item.getparent()[0]
+        yield from items
+
+
+@register("workable")
 def fetch_workable(company_slug, company_name, logo=None):
     logo = logo or get_logo_url(company_name)
-    jobs = []
     try:
         rss_url = f"https://{company_slug}.workable.com/jobs.rss"
-        r = safe_get(rss_url)
-        soup = BeautifulSoup(r.content, "xml")
-        for item in soup.find_all("item"):
-            link = item.link.text if item.link else None
-            desc = (item.description.text if item.description else "")
-            jobs.append({
-                "title": item.title.text if item.title else "",
-                "company": company_name,
-                "location": None,
-                "description": BeautifulSoup(desc, "html.parser").get_text(),
-                "apply_url": link,
-                "posted_at": None,
-                "platform": "workable",
-                "external_job_id": link,
-                "raw": {},
-                "logo": logo,
-            })
-    except Exception:
+        with stream_request("GET", rss_url) as r:
+            for title, link, desc, published in iter_rss_items(r):
+                yield Posting(
+                    title=title or "",
+                    company=company_name,
+                    location=None,
+                    description=clean_html(desc, separator=""),
+                    apply_url=link,
+                    posted_at=parse_timestamp(published, "workable"),
+                    platform="workable",
+                    external_job_id=link,
+                    raw={},
+                    logo=logo,
+                )
+    except Exception as exc:
+        instrumentation.record_error(exc)
         logger.info("Workable RSS not available for %s", company_name)
-    return jobs
 
 
+@register("smartrecruiters")
+def fetch_smartrecruiters(handle, company_name, logo=None):
+    """
+    SmartRecruiters Posting API. Some companies only answer on the older /jobs
+    path, so that is tried when /postings 404s; any other failure (timeouts,
+    5xx) is not retried on the second URL.
+    """
+    logo = logo or get_logo_url(company_name)
+    urls = [
+        f"https://api.smartrecruiters.com/v1/companies/{handle}/postings",
+        f"https://api.smartrecruiters.com/v1/companies/{handle}/jobs",
+    ]
+    try:
+        for i, url in enumerate(urls):
+            try:
+                with stream_request("GET", url) as r:
+                    for item in iter_json_array(iter_body(r), (("content", "jobs"),)):
+                        job_id = item.get("id") or item.get("uuid")
+                        location = item.get("location") or {}
+                        apply_url = item.get("applyUrl") or item.get("ref") or f"https://jobs.smartrecruiters.com/{handle}/{job_id}"
+                        yield Posting(
+                            title=item.get("name") or item.get("title") or "",
+                            company=company_name,
+                            location=location.get("city") if isinstance(location, dict) else location,
+                            description=clean_html(item.get("description")),
+                            apply_url=apply_url,
+                            posted_at=parse_timestamp(item.get("releasedDate") or item.get("createdOn"), "smartrecruiters"),
+                            platform="smartrecruiters",
+                            external_job_id=str(job_id or ""),
+                            raw=item,
+                            logo=logo,
+                        )
+                return
+            except httpx.HTTPStatusError as exc:
+                if exc.response.status_code != 404 or i == len(urls) - 1:
+                    raise
+    except Exception as exc:
+        instrumentation.record_error(exc)
+        logger.warning("SmartRecruiters fetch failed for %s (%s): %s", company_name, handle, exc)
+
+
+@register("rss", source="url")
 def fetch_rss(feed_url, company_name, logo=None):
-    import feedparser
     logo = logo or get_logo_url(company_name)
-    jobs = []
     try:
-        feed = feedparser.parse(feed_url)
+        r = safe_get(feed_url)
+        with instrumentation.stage("html_cleaning"):
+            feed = feedparser.parse(r.content)
         for entry in feed.entries:
             link = entry.get("link")
             desc = entry.get("summary") or entry.get("description") or ""
-            jobs.append({
-                "title": entry.get("title") or "",
-                "company": company_name,
-                "location": None,
-                "description": BeautifulSoup(desc, "html.parser").get_text(),
-                "apply_url": link,
-                "posted_at": parse_date(entry.get("published") or entry.get("updated")),
-                "platform": "rss",
-                "external_job_id": link,
-                "raw": entry,
-                "logo": logo,
-            })
-    except Exception:
+            yield Posting(
+                title=entry.get("title") or "",
+                company=company_name,
+                location=entry.get("location"),
+                description=clean_html(desc, separator=""),
+                apply_url=link,
+                posted_at=parse_timestamp(entry.get("published") or entry.get("updated"), "rss"),
+                platform="rss",
+                external_job_id=entry.get("id") or link,
+                raw=entry,
+                logo=logo,
+            )
+    except Exception as exc:
+        instrumentation.record_error(exc)
         logger.exception("RSS fetch error for %s: %s", company_name, feed_url)
-    return jobs
 
 
+@register("career_page", source="url", options=("selector",))
 def fetch_generic_career_page(list_url, company_name, logo=None, selector=None):
     logo = logo or get_logo_url(company_name)
-    jobs = []
     try:
         if not robots_allowed(list_url):
             logger.warning("Scraping disallowed by robots.txt: %s", list_url)
-            return jobs
+            return
         r = safe_get(list_url)
-        soup = BeautifulSoup(r.content, "html.parser")
+        with instrumentation.stage("html_cleaning"):
+            soup = BeautifulSoup(r.content, "html.parser")
         sel = selector or "a[href*='/jobs/'], a[href*='/careers/'], a[href*='careers']"
         for a in soup.select(sel):
             title = a.get_text(strip=True)
@@ -161,32 +298,33 @@ def fetch_generic_career_page(list_url, company_name, logo=None, selector=None):
             if not href:
                 continue
             full_url = href if href.startswith("http") else urljoin(list_url, href)
-            jobs.append({
-                "title": title or full_url,
-                "company": company_name,
-                "location": None,
-                "description": None,
-                "apply_url": full_url,
-                "posted_at": None,
-                "platform": "career_page",
-                "external_job_id": full_url,
-                "raw": {},
-                "logo": logo,
-            })
-    except Exception:
+            yield Posting(
+                title=title or full_url,
+                company=company_name,
+                location=None,
+                description=None,
+                apply_url=full_url,
+                posted_at=None,
+                platform="career_page",
+                external_job_id=full_url,
+                raw={},
+                logo=logo,
+            )
+    except Exception as exc:
+        instrumentation.record_error(exc)
         logger.exception("Generic career page fetch failed for %s", list_url)
-    return jobs
 
 
+@register("jobs.ge", source="url", aggregator=True)
 def fetch_jobs_ge_listings(list_url, company_name="Local Georgian", logo=None, limit=20):
     logo = logo or get_logo_url(company_name)
-    jobs = []
     try:
         if not robots_allowed(list_url):
             logger.warning("Scraping disallowed by robots.txt: %s", list_url)
-            return jobs
+            return
         r = safe_get(list_url)
-        soup = BeautifulSoup(r.content, "html.parser")
+        with instrumentation.stage("html_cleaning"):
+            soup = BeautifulSoup(r.content, "html.parser")
         job_cards = soup.select(".job-item")[:limit]
         for card in job_cards:
             title_el = card.select_one(".job-title a")
@@ -195,29 +333,31 @@ def fetch_jobs_ge_listings(list_url, company_name="Local Georgian", logo=None, l
                 continue
             href = title_el.get("href")
             full_url = href if href.startswith("http") else urljoin(BASE_URL, href)
-            jobs.append({
-                "title": title_el.text.strip(),
-                "company": company_el.text.strip() if company_el else company_name,
-                "location": "Georgia",
-                "description": None,
-                "apply_url": full_url,
-                "posted_at": None,
-                "platform": "jobs.ge",
-                "external_job_id": full_url,
-                "raw": {},
-                "logo": logo,
-            })
-    except Exception:
+            employer = company_el.text.strip() if company_el else ""
+            yield Posting(
+                title=title_el.text.strip(),
+                company=employer or company_name,
+                location="Georgia",
+                description=None,
+                apply_url=full_url,
+                posted_at=None,
+                platform="jobs.ge",
+                external_job_id=full_url,
+                raw={},
+                # A named employer gets its own company's logo at ingestion
+                logo=None if employer else logo,
+            )
+    except Exception as exc:
+        instrumentation.record_error(exc)
         logger.exception("jobs.ge fetch failed for %s", list_url)
-    return jobs
 
 
+@register("ashby")
 def fetch_ashby(handle: str, company_name: str, logo=None):
     """
     Fetch jobs from AshbyHQ
     Example: https://jobs.ashbyhq.com/notion
     """
-    import httpx
     logo = logo or get_logo_url(company_name)
 
     url = f"https://jobs.ashbyhq.com/api/non-user-graphql"
@@ -242,53 +382,28 @@ def fetch_ashby(handle: str, company_name: str, logo=None):
         """
     }
 
-    jobs = []
     try:
-        r = httpx.post(url, json=payload, timeout=20)
-        r.raise_for_status()
-        data = r.json()
-
-        postings = data["data"]["jobBoardWithTeams"]["jobPostings"]
-        for j in postings:
-            html_desc = j.get("descriptionHtml") or ""
-            text_desc = BeautifulSoup(html_desc, "html.parser").get_text(separator="\n").strip() if html_desc else ""
-            jobs.append({
-                "title": j["title"],
-                "company": company_name,
-                "location": j.get("locationName"),
-                "description": text_desc,
-                "apply_url": j.get("externalLink"),
-                "external_job_id": j["id"],
-                "posted_at": j.get("postedAt"),
-                "raw": j,
-                "logo": logo,
-            })
-
-    except Exception:
+        with stream_request("POST", url, json=payload, timeout=20) as r:
+            postings = iter_json_array(iter_body(r), ("data", "jobBoardWithTeams", "jobPostings"))
+            for j in postings:
+                text_desc = clean_html(j.get("descriptionHtml"))
+                yield Posting(
+                    title=j["title"],
+                    company=company_name,
+                    location=j.get("locationName"),
+                    description=text_desc,
+                    apply_url=j.get("externalLink"),
+                    platform="ashby",
+                    external_job_id=j["id"],
+                    posted_at=parse_timestamp(j.get("postedAt"), "ashby"),
+                    raw=j,
+                    logo=logo,
+                )
+
+    except Exception as exc:
+        instrumentation.record_error(exc)
         logger.exception("Ashby fetch failed for %s", company_name)
 
-    return jobs
-
-
-
-def fetch_rss(url, company_name=None):
-    """
-    Fetch jobs from RSS feed. Returns a list of dicts.
-    """
-    jobs = []
-    feed = feedparser.parse(url)
-    for entry in feed.entries:
-        jobs.append({
-            "title": entry.title,
-            "location": getattr(entry, "location", None),
-            "description": getattr(entry, "summary", ""),
-            "apply_url": entry.link,
-            "external_job_id": entry.id if hasattr(entry, "id") else entry.link,
-            "posted_at": getattr(entry, "published", None),
-            "raw": entry,
-            "logo": None,
-        })
-    return jobs
 
 # import httpx
 # from bs4 import BeautifulSoup
@@ -0,0 +1,209 @@
+"""
+Fetch-run history: persisting per-board outcomes and summarising them.
+
+``fetch_jobs``, ``schedule_jobs`` and ``check_jobs`` record a ``FetchRun`` per
+invocation (or scheduler pass) and a ``BoardFetchResult`` per board fetched.
+The results double as ``fetch_jobs --resume`` checkpoints, and the helpers
+here turn them into percentiles for the stats endpoint. Scheduling and
+backoff keep their own running counters on ``BoardState`` (``jobs.scheduler``,
+``jobs.breaker``) rather than re-reading this history on every decision.
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db.models import Sum
+from django.utils import timezone
+
+from .models import BoardFetchResult, FetchRun
+
+
+def board_identifier(comp):
+    """Stable identifier of a configured board (ATS handle or feed/page URL)."""
+    return comp.get("handle") or comp.get("url") or comp.get("name")
+
+
+# ---------------------------
+# Recording
+# ---------------------------
+
+def start_run(command="fetch_jobs"):
+    return FetchRun.objects.create(command=command)
+
+
+def record_board_result(run, company_metrics, board):
+    """Persist a BoardFetchResult from a jobs.instrumentation.CompanyMetrics."""
+    errors = company_metrics.errors
+    first_error = errors[0] if errors else None
+    fetch_stage = company_metrics.stages.get("http_fetch")
+    started = company_metrics.started_at
+    return BoardFetchResult.objects.create(
+        run=run,
+        company_name=company_metrics.name,
+        platform=company_metrics.platform or "",
+        board=board or "",
+        started_at=datetime.fromtimestamp(started, tz=dt_timezone.utc) if started else timezone.now(),
+        latency_seconds=company_metrics.wall_seconds,
+        fetch_seconds=fetch_stage.seconds if fetch_stage else 0,
+        payload_bytes=company_metrics.bytes_downloaded,
+        http_requests=company_metrics.http_requests,
+        http_status=company_metrics.last_http_status,
+        postings_count=company_metrics.postings_fetched,
+        rows_upserted=company_metrics.rows_upserted,
+        rows_deactivated=company_metrics.rows_deactivated,
+        succeeded=not errors,
+        error_class=first_error["error_class"] if first_error else "",
+        error_message=first_error["message"] if first_error else "",
+        stages={name: m.as_dict() for name, m in company_metrics.stages.items()},
+    )
+
+
+def finish_run(run, metrics, status=None):
+    """
+    Close a FetchRun, aggregating totals from its board results. A board that
+    was retried by a resumed run counts as failed only if its last attempt failed.
+    """
+    agg = run.results.aggregate(
+        upserted=Sum("rows_upserted"),
+        deactivated=Sum("rows_deactivated"),
+        payload=Sum("payload_bytes"),
+    )
+    latest = {}
+    for platform, board, succeeded in run.results.order_by("started_at", "id").values_list(
+        "platform", "board", "succeeded"
+    ):
+        latest[(platform, board)] = succeeded
+    run.boards_total = len(latest)
+    run.boards_failed = sum(1 for succeeded in latest.values() if not succeeded)
+    run.jobs_upserted = agg["upserted"] or 0
+    run.jobs_deactivated = agg["deactivated"] or 0
+    run.bytes_downloaded = agg["payload"] or 0
+    if status is None:
+        status = FetchRun.STATUS_PARTIAL if run.boards_failed else FetchRun.STATUS_SUCCEEDED
+    run.status = status
+    run.finished_at = timezone.now()
+    run.duration_seconds = (run.finished_at - run.started_at).total_seconds()
+    if metrics is not None:
+        run.summary = {"totals": metrics.totals()}
+    run.save()
+    return run
+
+
+# ---------------------------
+# Checkpoints
+# ---------------------------
+# Every BoardFetchResult is committed as soon as its board is done, so a run's
+# results double as its checkpoint: resuming a run only fetches the boards
+# without a successful result in it.
+
+def resumable_run(command="fetch_jobs", run_id=None):
+    """
+    The run to resume: run ``run_id``, or else the latest ``command`` run if it
+    failed (crashed or was interrupted) or finished with failed boards.
+
+    A run that is still marked running is never picked automatically: it may
+    belong to a live process, and the two would fetch the same boards into it.
+    A run whose process was killed outright stays marked running, and has to
+    be resumed by its id.
+    """
+    if run_id is not None:
+        return FetchRun.objects.filter(pk=run_id, command=command).first()
+    latest = FetchRun.objects.filter(command=command).order_by("-started_at", "-id").first()
+    if latest is None or latest.status not in (FetchRun.STATUS_FAILED, FetchRun.STATUS_PARTIAL):
+        return None
+    return latest
+
+
+def completed_boards(run):
+    """(platform, board) of every board that was fetched successfully in ``run``."""
+    return set(run.results.filter(succeeded=True).values_list("platform", "board"))
+
+
+def reopen_run(run):
+    run.status = FetchRun.STATUS_RUNNING
+    run.finished_at = None
+    run.save(update_fields=["status", "finished_at"])
+    return run
+
+
+# ---------------------------
+# Querying
+# ---------------------------
+
+def percentile(values, pct):
+    """Linear-interpolated percentile of ``values`` (0 <= pct <= 100)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    if len(ordered) == 1:
+        return ordered[0]
+    k = (len(ordered) - 1) * (pct / 100.0)
+    lo = int(k)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def _summarise(rows, percentiles):
+    latencies = [r["latency_seconds"] for r in rows]
+    payloads = [r["payload_bytes"] for r in rows]
+    failures = sum(1 for r in rows if not r["succeeded"])
+    return {
+        "runs": len(rows),
+        "failures": failures,
+        "failure_rate": round(failures / len(rows), 4) if rows else None,
+        "latency_seconds": {f"p{p}": _round(percentile(latencies, p)) for p in percentiles},
+        "payload_bytes": {f"p{p}": _round(percentile(payloads, p)) for p in percentiles},
+        "postings_last": rows[-1]["postings_count"] if rows else None,
+    }
+
+
+def _round(value):
+    return round(value, 4) if value is not None else None
+
+
+def board_stats(days=7, platform=None, board=None, bucket="day", percentiles=(50, 90, 99)):
+    """
+    Per-board latency/payload percentiles over the last ``days``, overall and
+    per time bucket ('day' or 'hour'). Percentiles are computed in Python so
+    this works the same on SQLite and PostgreSQL.
+    """
+    since = timezone.now() - timedelta(days=days)
+    qs = BoardFetchResult.objects.filter(started_at__gte=since)
+    if platform:
+        qs = qs.filter(platform=platform)
+    if board:
+        qs = qs.filter(board=board)
+
+    rows = qs.order_by("started_at").values(
+        "company_name", "platform", "board", "started_at",
+        "latency_seconds", "payload_bytes", "postings_count", "succeeded",
+    )
+
+    bucket_format = "%Y-%m-%dT%H:00:00Z" if bucket == "hour" else "%Y-%m-%d"
+    by_board = defaultdict(list)
+    for row in rows:
+        by_board[(row["platform"], row["board"])].append(row)
+
+    boards = []
+    for (plat, board_id), board_rows in by_board.items():
+        buckets = defaultdict(list)
+        for row in board_rows:
+            buckets[row["started_at"].astimezone(dt_timezone.utc).strftime(bucket_format)].append(row)
+        entry = {
+            "company_name": board_rows[-1]["company_name"],
+            "platform": plat,
+            "board": board_id,
+        }
+        entry.update(_summarise(board_rows, percentiles))
+        entry["series"] = [
+            dict(bucket=key, **_summarise(bucket_rows, percentiles))
+            for key, bucket_rows in sorted(buckets.items())
+        ]
+        boards.append(entry)
+
+    boards.sort(key=lambda b: (b["latency_seconds"].get("p50") or 0), reverse=True)
+    return {
+        "since": since.isoformat(),
+        "bucket": bucket,
+        "boards": boards,
+    }
+
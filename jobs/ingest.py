@@ -0,0 +1,402 @@
+"""
+Per-board ingestion: fetch a configured board and upsert its jobs.
+
+Shared by the fetch commands and the benchmark suite so they all exercise the
+same code path. Boards are passed around as the dicts from ``Board.as_config``.
+"""
+import itertools
+import logging
+import time
+
+from django.db import transaction
+
+from . import archive, changes, fetchers, instrumentation, transport
+from .companies import CompanyResolver, normalize_name
+from .fetchers import get_logo_url
+from .models import Job
+from .postings import as_posting
+from .utils import parse_structured_description, parse_timestamp
+
+logger = logging.getLogger(__name__)
+
+# Postings upserted per batch while a board streams in
+BATCH_SIZE = 200
+
+UNIQUE_FIELDS = ["platform", "external_job_id"]
+# Columns a re-fetched posting overwrites
+UPSERT_FIELDS = [
+    "title", "company", "location", "description", "apply_url", "posted_at", "raw",
+    "is_active", "company_logo", "fetched_at", "last_seen_run",
+]
+# What the API shows of a job: a re-fetched posting that changes any of these gets a new change_seq
+CHANGE_FIELDS = [
+    "title", "company_id", "location", "description", "apply_url", "posted_at", "raw", "is_active", "company_logo",
+]
+
+
+class BoardPass:
+    """
+    One ingest of one board. Every row it upserts is stamped with ``run_id``,
+    so once the board is through, the rows it didn't see are exactly the
+    board's active rows with a different ``last_seen_run``: one indexed UPDATE,
+    however big the board, instead of a NOT IN list of every id on it.
+    """
+
+    def __init__(self):
+        # Only compared for equality within one board, so a clock reading is unique enough
+        self.run_id = time.time_ns()
+        self.seen = 0  # postings with an id
+        self.failed = 0  # rows whose upsert failed (and so weren't stamped)
+
+
+class Postings:
+    """
+    Iterator over a board's postings as its fetcher yields them, with the
+    board's timeout applied and ``max_postings`` enforced. Once exhausted,
+    ``complete`` tells whether the fetcher got through without recording an
+    error (fetchers log and swallow their errors, then stop early). ``tap``,
+    if set, is called with every posting as it goes by.
+    """
+
+    def __init__(self, postings, timeout=None, limit=None):
+        self._postings = postings
+        self.timeout = timeout
+        self.limit = limit
+        self.count = 0
+        self.complete = True
+        self.tap = None
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.limit and self.count >= self.limit:
+            self.close()
+            raise StopIteration
+        company = instrumentation.current_company()
+        errors_before = len(company.errors) if company else 0
+        try:
+            with transport.timeout(self.timeout):
+                posting = next(self._postings)
+        finally:
+            if company is not None and len(company.errors) != errors_before:
+                self.complete = False
+        self.count += 1
+        if self.tap is not None:
+            self.tap(posting)
+        return posting
+
+    def close(self):
+        """Stop the fetch early, closing its response."""
+        self._postings.close()
+
+
+def fetch_postings(comp):
+    """
+    Start fetching a configured board: returns a ``Postings`` iterator (nothing
+    is requested until it is iterated), or None when the platform has no fetcher.
+    """
+    platform = comp.get("platform")
+    company_name = comp.get("name")
+    fetcher = fetchers.FETCHERS.get(platform)
+    if not fetcher:
+        logger.warning("No fetcher for platform: %s", platform)
+        return None
+
+    logger.info("Fetching jobs for %s (%s)", company_name, platform)
+    if fetcher.source == "url":
+        target = comp.get("url") or comp.get("handle")
+    else:
+        target = comp.get("handle")
+    options = {key: comp[key] for key in fetcher.options if comp.get(key)}
+    postings = fetcher.func(target, company_name, **options)
+    return Postings(postings, timeout=comp.get("timeout"), limit=comp.get("max_postings"))
+
+
+def batched(iterable, size=BATCH_SIZE):
+    iterator = iter(iterable)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def ingest_company(comp, jobs_data=None, complete=True, writer=None, companies=None):
+    """
+    Fetch one company's board and upsert its jobs. Returns the number of rows saved.
+    Pass ``jobs_data`` to ingest already-fetched postings (Posting records or
+    dicts, e.g. from benchmarks and replays), with ``complete=False`` if they
+    may be a partial list, and the run's ``CompanyResolver`` as ``companies``
+    (by default the board gets one of its own).
+
+    Postings are written in batches of ``BATCH_SIZE`` as the fetcher yields
+    them, so memory use doesn't grow with the size of the board. Each batch
+    commits in a transaction of its own, so the database isn't held locked
+    while the rest of the board downloads. A crash midway leaves the batches
+    written so far (stamped with the pass's run id) and deactivates nothing;
+    the next pass picks up from there. With an ``IngestWriter`` (concurrent
+    fetching) every write goes through it instead. Jobs missing from the
+    board are deactivated, in one transaction once the stream is exhausted,
+    only when the fetch fully succeeded: a fetcher that fails midway stops
+    early, and treating the rest as gone would wrongly deactivate them.
+    """
+    if companies is None:
+        companies = CompanyResolver()
+    if writer is not None:
+        return _ingest_through(writer, comp, jobs_data, complete, companies)
+
+    total = 0
+    company, company_logo = ensure_company(comp, companies)
+    if jobs_data is None:
+        jobs_data = fetch_postings(comp)
+        if jobs_data is None:
+            return total
+
+    board_pass = BoardPass()
+    try:
+        for batch in batched(as_posting(item, comp.get("platform")) for item in jobs_data):
+            instrumentation.add_postings(len(batch))
+            total += upsert_postings(comp, company, company_logo, batch, board_pass, companies)
+        if isinstance(jobs_data, Postings):
+            complete = jobs_data.complete
+    finally:
+        if isinstance(jobs_data, Postings):
+            jobs_data.close()
+    deactivate_missing(comp, company, board_pass, complete)
+    return total
+
+
+def _ingest_through(writer, comp, jobs_data, complete, companies):
+    company, company_logo = writer.submit(ensure_company, comp, companies).result()
+    if jobs_data is None:
+        jobs_data = fetch_postings(comp)
+        if jobs_data is None:
+            return 0
+
+    board_pass = BoardPass()
+    futures = []
+    try:
+        for batch in batched(as_posting(item, comp.get("platform")) for item in jobs_data):
+            instrumentation.add_postings(len(batch))
+            futures.append(writer.submit(
+                upsert_postings, comp, company, company_logo, batch, board_pass, companies, size=len(batch)
+            ))
+        if isinstance(jobs_data, Postings):
+            complete = jobs_data.complete
+    finally:
+        if isinstance(jobs_data, Postings):
+            jobs_data.close()
+
+    total = 0
+    for future in futures:
+        try:
+            total += future.result()
+        except Exception as exc:
+            # Its transaction rolled back; those rows may be missing, so don't deactivate
+            instrumentation.record_error(exc, stage="db_upsert")
+            complete = False
+    writer.submit(deactivate_missing, comp, company, board_pass, complete).result()
+    return total
+
+
+def resolve_boards(configured, companies):
+    """Resolve the companies of all ``configured`` boards up front, creating the missing ones at once."""
+    companies.resolve({
+        comp.get("name"): {"platform": comp.get("platform"), "logo": comp.get("logo") or get_logo_url(comp.get("name"))}
+        for comp in configured
+    })
+
+
+def ensure_company(comp, companies):
+    """The board's company (a ResolvedCompany), created if needed, and the logo its jobs default to."""
+    company_name = comp.get("name")
+    company_logo = comp.get("logo") or get_logo_url(company_name)
+    with instrumentation.stage("db_upsert"):
+        company = companies.resolve({
+            company_name: {"platform": comp.get("platform"), "logo": company_logo},
+        })[company_name]
+    return company, company_logo
+
+
+def is_aggregator(platform):
+    fetcher = fetchers.FETCHERS.get(platform)
+    return fetcher is not None and fetcher.aggregator
+
+
+def posting_companies(comp, company, postings, companies):
+    """
+    Name -> ResolvedCompany for the employers an aggregator board's postings
+    name other than the board's own company, created as needed.
+    """
+    platform = comp.get("platform")
+    if not is_aggregator(platform):
+        return {}
+    board_company = normalize_name(company.name)
+    names = {p.company for p in postings if p.company and normalize_name(p.company) != board_company}
+    if not names:
+        return {}
+    with instrumentation.stage("db_upsert"):
+        return companies.resolve({name: {"platform": platform} for name in names})
+
+
+def job_row(platform, company, company_logo, posting, run_id=None):
+    return Job(
+        platform=platform,
+        external_job_id=posting.external_job_id,
+        title=posting.title,
+        company_id=company.id,
+        location=posting.location,
+        description=posting.description,
+        apply_url=posting.apply_url or posting.external_job_id,
+        # Fetchers already parse; this only converts dict/replayed postings
+        posted_at=parse_timestamp(posting.posted_at, platform),
+        raw=posting.raw or {},
+        is_active=True,
+        company_logo=posting.logo or company_logo,
+        last_seen_run=run_id,
+    )
+
+
+def upsert_postings(comp, company, company_logo, postings, board_pass, companies):
+    """
+    Upsert a batch of postings with one INSERT ... ON CONFLICT DO UPDATE per
+    kind of row, stamped with ``board_pass``'s run id. Descriptions are only
+    (re)parsed into ``structured_description`` for new rows and rows whose
+    description changed, and only new and changed rows get a new
+    ``change_seq``. Postings of an aggregator board go to the employer
+    they name (see ``posting_companies``), and archived jobs that are back
+    are restored under their old ids.
+    """
+    platform = comp.get("platform")
+    postings = {p.external_job_id: p for p in postings if p.external_job_id}
+    board_pass.seen += len(postings)
+    if not postings:
+        return 0
+
+    with instrumentation.stage("db_upsert"):
+        stored = {
+            row[0]: row[1:]
+            for row in Job.objects.filter(platform=platform, external_job_id__in=list(postings))
+            .values_list("external_job_id", *CHANGE_FIELDS)
+        }
+        restored = archive.archived_for(platform, [ext_id for ext_id in postings if ext_id not in stored])
+    employers = posting_companies(comp, company, postings.values(), companies)
+    description_index = CHANGE_FIELDS.index("description")
+    reparsed, changed, unchanged = [], [], []
+    for ext_id, posting in postings.items():
+        employer = employers.get(posting.company)
+        if employer is not None:
+            job = job_row(platform, employer, employer.logo or company_logo, posting, board_pass.run_id)
+        else:
+            job = job_row(platform, company, company_logo, posting, board_pass.run_id)
+        previous = stored.get(ext_id)
+        if previous is not None and previous[description_index] == job.description:
+            if previous == tuple(getattr(job, name) for name in CHANGE_FIELDS):
+                unchanged.append(job)
+            else:
+                changed.append(job)
+            continue
+        archived = restored.get(ext_id)
+        if archived is not None:
+            job.id = archived.original_id
+            if archived.full_description == job.description:
+                job.structured_description = archived.structured_description
+                reparsed.append(job)
+                continue
+        if job.description:
+            try:
+                with instrumentation.stage("structured_parsing"):
+                    job.structured_description = parse_structured_description(job.description)
+            except Exception:
+                pass  # If parsing fails, continue without structured description
+        reparsed.append(job)
+
+    groups = [
+        (reparsed, UPSERT_FIELDS + ["structured_description", "change_seq"]),
+        (changed, UPSERT_FIELDS + ["change_seq"]),
+        (unchanged, UPSERT_FIELDS),
+    ]
+    try:
+        # Its own short transaction (a savepoint inside an IngestWriter's, so a
+        # failed statement doesn't poison that one)
+        with instrumentation.stage("db_upsert"), transaction.atomic():
+            if reparsed or changed:
+                # Taken last, so the counter row is locked only for the batch's own writes
+                seq = changes.next_seq()
+                for job in reparsed + changed:
+                    job.change_seq = seq
+            for jobs, fields in groups:
+                if jobs:
+                    Job.objects.bulk_create(
+                        jobs, update_conflicts=True, unique_fields=UNIQUE_FIELDS, update_fields=fields
+                    )
+            archive.discard(platform, list(restored))
+    except Exception:
+        logger.warning("Bulk upsert failed for %s (%s), saving row by row", comp.get("name"), platform)
+        return _upsert_rows(platform, groups, board_pass, restored)
+    instrumentation.add_upserted(len(postings))
+    return len(postings)
+
+
+def _upsert_rows(platform, groups, board_pass, restored):
+    """Row-by-row fallback for a batch whose bulk upsert failed, so one bad row only loses itself."""
+    total = 0
+    for jobs, fields in groups:
+        for job in jobs:
+            try:
+                with instrumentation.stage("db_upsert"), transaction.atomic():
+                    if "change_seq" in fields:
+                        # The batch's number was rolled back with it
+                        job.change_seq = changes.next_seq()
+                    Job.objects.bulk_create(
+                        [job], update_conflicts=True, unique_fields=UNIQUE_FIELDS, update_fields=fields
+                    )
+                    if job.external_job_id in restored:
+                        archive.discard(platform, [job.external_job_id])
+            except Exception as exc:
+                instrumentation.record_error(exc, stage="db_upsert")
+                logger.exception("Failed to save job: %s", job.title)
+                board_pass.failed += 1
+                continue
+            instrumentation.add_upserted()
+            total += 1
+    return total
+
+
+def deactivate_missing(comp, company, board_pass, complete):
+    """
+    Deactivate the board's active jobs that ``board_pass`` didn't see: its
+    company's jobs on its platform, or for an aggregator every job on the
+    platform (one board per aggregator platform).
+    """
+    platform = comp.get("platform")
+    company_name = comp.get("name")
+    if not complete:
+        logger.warning(
+            "Fetch for %s (%s) did not fully succeed, not deactivating missing jobs", company_name, platform
+        )
+        return
+    if board_pass.failed:
+        # Rows that failed to save weren't stamped, but they are still on the board
+        logger.warning(
+            "%d job(s) of %s (%s) failed to save, not deactivating missing jobs",
+            board_pass.failed, company_name, platform,
+        )
+        return
+
+    # Mark old jobs inactive
+    try:
+        # Its own transaction (a savepoint inside an IngestWriter's)
+        with instrumentation.stage("deactivation"), transaction.atomic():
+            if board_pass.seen:
+                qs = Job.objects.filter(platform=platform, is_active=True)
+                if not is_aggregator(platform):
+                    qs = qs.filter(company_id=company.id)
+                qs = qs.exclude(last_seen_run=board_pass.run_id)
+                if qs.exists():
+                    deactivated = qs.update(is_active=False, change_seq=changes.next_seq())
+                    instrumentation.add_deactivated(deactivated)
+    except Exception as exc:
+        instrumentation.record_error(exc, stage="deactivation")
+        logger.exception("Failed to mark inactive jobs for %s (%s)", company_name, platform)
@@ -0,0 +1,348 @@
+"""
+Per-run instrumentation for the ingestion pipeline.
+
+A ``RunMetrics`` object is activated for the duration of a ``fetch_jobs``,
+``check_jobs`` or ``schedule_jobs`` run. Code anywhere in the pipeline
+(fetchers, utils, ingest, models) reports into it via the module-level helpers
+below; when no run is active they are cheap no-ops, so the API and the shell
+are unaffected.
+
+Stage timings are *exclusive*: time spent in a stage entered inside another
+is attributed to the inner stage only, so the per-stage numbers add up to the
+instrumented total. In ingestion the stages mostly run one after another:
+``ingest.upsert_postings`` parses new and changed descriptions
+(``structured_parsing``) before its bulk ``INSERT ... ON CONFLICT``
+(``db_upsert``), not inside it. Nesting happens when ``Job.save()`` parses a
+description inside whatever stage its caller is timing.
+"""
+import contextvars
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+# Stages we report on, in pipeline order
+STAGES = (
+    "http_fetch",
+    "html_cleaning",
+    "date_parsing",
+    "structured_parsing",
+    "db_upsert",
+    "deactivation",
+)
+
+_current_run = contextvars.ContextVar("ingestion_run", default=None)
+_current_company = contextvars.ContextVar("ingestion_company", default=None)
+
+
+class StageMetrics:
+    __slots__ = ("seconds", "calls", "errors")
+
+    def __init__(self):
+        self.seconds = 0.0
+        self.calls = 0
+        self.errors = 0
+
+    def as_dict(self):
+        return {
+            "seconds": round(self.seconds, 6),
+            "calls": self.calls,
+            "errors": self.errors,
+        }
+
+
+class CompanyMetrics:
+    """Timings and counters for a single company/board within a run."""
+
+    def __init__(self, name, platform):
+        self.name = name
+        self.platform = platform
+        self.stages = {}
+        self.bytes_downloaded = 0
+        self.http_requests = 0
+        self.last_http_status = None
+        self.postings_fetched = 0
+        self.rows_upserted = 0
+        self.rows_deactivated = 0
+        self.errors = []
+        self.started_at = None
+        self.wall_seconds = 0.0
+        # Per thread: stack of [stage_name, start, child_seconds] for exclusive timing
+        self._stacks = {}
+        # A board's fetch thread and the IngestWriter thread both report into it
+        self._lock = threading.Lock()
+
+    @property
+    def _stack(self):
+        """The calling thread's stage stack (a board's DB writes may run on a writer thread)."""
+        return self.stack_for(threading.get_ident())
+
+    def stack_for(self, thread_id):
+        stack = self._stacks.get(thread_id)
+        if stack is None:
+            stack = self._stacks[thread_id] = []
+        return stack
+
+    def stage_metrics(self, name):
+        metrics = self.stages.get(name)
+        if metrics is None:
+            with self._lock:
+                metrics = self.stages.setdefault(name, StageMetrics())
+        return metrics
+
+    def add(self, **counts):
+        """Add to counters, e.g. ``add(rows_upserted=3)``."""
+        with self._lock:
+            for attr, n in counts.items():
+                setattr(self, attr, getattr(self, attr) + n)
+
+    def record_error(self, exc, stage=None):
+        if stage is None:
+            # Prefer the stage the exception escaped from, then the enclosing one
+            stage = getattr(exc, "_ingest_stage", None) or (self._stack[-1][0] if self._stack else None)
+        with self._lock:
+            self.errors.append({
+                "stage": stage,
+                "error_class": type(exc).__name__,
+                "message": str(exc)[:500],
+            })
+
+    def as_dict(self):
+        return {
+            "name": self.name,
+            "platform": self.platform,
+            "wall_seconds": round(self.wall_seconds, 6),
+            "stages": {name: m.as_dict() for name, m in self.stages.items()},
+            "bytes_downloaded": self.bytes_downloaded,
+            "http_requests": self.http_requests,
+            "last_http_status": self.last_http_status,
+            "postings_fetched": self.postings_fetched,
+            "rows_upserted": self.rows_upserted,
+            "rows_deactivated": self.rows_deactivated,
+            "errors": self.errors,
+        }
+
+
+class RunMetrics:
+    """Collects per-company, per-stage metrics for one ingestion run."""
+
+    def __init__(self, command="fetch_jobs"):
+        self.command = command
+        self.started_at = time.time()
+        self.finished_at = None
+        self.companies = {}
+
+    def company(self, name, platform):
+        key = (name, platform)
+        metrics = self.companies.get(key)
+        if metrics is None:
+            metrics = self.companies[key] = CompanyMetrics(name, platform)
+        return metrics
+
+    @contextmanager
+    def track_company(self, name, platform):
+        """Attribute everything reported inside the block to ``name``."""
+        metrics = self.company(name, platform)
+        token = _current_company.set(metrics)
+        start = time.perf_counter()
+        if metrics.started_at is None:
+            metrics.started_at = time.time()
+        try:
+            yield metrics
+        finally:
+            metrics.wall_seconds += time.perf_counter() - start
+            _current_company.reset(token)
+
+    def finish(self):
+        self.finished_at = time.time()
+
+    def totals(self):
+        stages = {}
+        totals = {
+            "companies": len(self.companies),
+            "bytes_downloaded": 0,
+            "http_requests": 0,
+            "postings_fetched": 0,
+            "rows_upserted": 0,
+            "rows_deactivated": 0,
+            "errors": 0,
+        }
+        for company in self.companies.values():
+            totals["bytes_downloaded"] += company.bytes_downloaded
+            totals["http_requests"] += company.http_requests
+            totals["postings_fetched"] += company.postings_fetched
+            totals["rows_upserted"] += company.rows_upserted
+            totals["rows_deactivated"] += company.rows_deactivated
+            totals["errors"] += len(company.errors)
+            for name, m in company.stages.items():
+                agg = stages.setdefault(name, StageMetrics())
+                agg.seconds += m.seconds
+                agg.calls += m.calls
+                agg.errors += m.errors
+        totals["stages"] = {name: m.as_dict() for name, m in stages.items()}
+        return totals
+
+    def summary(self):
+        finished_at = self.finished_at or time.time()
+        return {
+            "command": self.command,
+            "started_at": self.started_at,
+            "finished_at": finished_at,
+            "duration_seconds": round(finished_at - self.started_at, 6),
+            "totals": self.totals(),
+            "companies": [c.as_dict() for c in self.companies.values()],
+        }
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.summary(), **kwargs)
+
+    def to_prometheus(self, prefix="breneo_ingest"):
+        """Render the run in Prometheus text exposition format (for node_exporter's textfile collector)."""
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+            for labels, value in samples:
+                label_str = ",".join(f'{k}="{_escape_label(v)}"' for k, v in labels.items())
+                lines.append(f"{prefix}_{name}{{{label_str}}} {value}")
+
+        companies = list(self.companies.values())
+
+        def per_company(attr):
+            return [({"company": c.name, "platform": c.platform}, getattr(c, attr)) for c in companies]
+
+        metric("stage_seconds", "gauge", "Exclusive time spent per stage.", [
+            ({"company": c.name, "platform": c.platform, "stage": name}, round(m.seconds, 6))
+            for c in companies for name, m in c.stages.items()
+        ])
+        metric("stage_calls", "gauge", "Number of times a stage was entered.", [
+            ({"company": c.name, "platform": c.platform, "stage": name}, m.calls)
+            for c in companies for name, m in c.stages.items()
+        ])
+        metric("company_wall_seconds", "gauge", "Wall-clock time per company.", per_company("wall_seconds"))
+        metric("bytes_downloaded", "gauge", "Response bytes downloaded.", per_company("bytes_downloaded"))
+        metric("http_requests", "gauge", "Outbound HTTP requests.", per_company("http_requests"))
+        metric("postings_fetched", "gauge", "Postings returned by the fetcher.", per_company("postings_fetched"))
+        metric("rows_upserted", "gauge", "Job rows created or updated.", per_company("rows_upserted"))
+        metric("rows_deactivated", "gauge", "Job rows marked inactive.", per_company("rows_deactivated"))
+        metric("errors", "gauge", "Errors recorded.", [
+            ({"company": c.name, "platform": c.platform}, len(c.errors)) for c in companies
+        ])
+        finished_at = self.finished_at or time.time()
+        lines.append(f"# HELP {prefix}_run_duration_seconds Total run duration.")
+        lines.append(f"# TYPE {prefix}_run_duration_seconds gauge")
+        lines.append(f"{prefix}_run_duration_seconds {round(finished_at - self.started_at, 6)}")
+        lines.append(f"# HELP {prefix}_run_finished_timestamp_seconds Unix time the run finished.")
+        lines.append(f"# TYPE {prefix}_run_finished_timestamp_seconds gauge")
+        lines.append(f"{prefix}_run_finished_timestamp_seconds {round(finished_at, 3)}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+# ---------------------------
+# Module-level reporting helpers
+# ---------------------------
+
+@contextmanager
+def activate(run):
+    """Make ``run`` the active recorder for the current context."""
+    token = _current_run.set(run)
+    try:
+        yield run
+    finally:
+        _current_run.reset(token)
+
+
+@contextmanager
+def reporting_to(company):
+    """
+    Attribute what is reported inside the block to ``company`` (a CompanyMetrics,
+    or None for nothing), without timing it as track_company does. For work
+    done on behalf of a board on another thread.
+    """
+    token = _current_company.set(company)
+    try:
+        yield company
+    finally:
+        _current_company.reset(token)
+
+
+def current_run():
+    return _current_run.get()
+
+
+def current_company():
+    return _current_company.get()
+
+
+@contextmanager
+def stage(name):
+    """Time a pipeline stage for the current company (no-op outside a run)."""
+    company = _current_company.get()
+    if company is None:
+        yield
+        return
+    frame = [name, time.perf_counter(), 0.0]
+    company._stack.append(frame)
+    metrics = company.stage_metrics(name)
+    try:
+        yield
+    except Exception as exc:
+        with company._lock:
+            metrics.errors += 1
+        if not hasattr(exc, "_ingest_stage"):
+            try:
+                exc._ingest_stage = name
+            except AttributeError:
+                pass
+        raise
+    finally:
+        company._stack.pop()
+        elapsed = time.perf_counter() - frame[1]
+        with company._lock:
+            metrics.seconds += elapsed - frame[2]
+            metrics.calls += 1
+        if company._stack:
+            company._stack[-1][2] += elapsed
+
+
+def record_response(status_code, nbytes):
+    company = _current_company.get()
+    if company is not None:
+        company.add(bytes_downloaded=nbytes, http_requests=1)
+        company.last_http_status = status_code
+
+
+def add_bytes(n):
+    """Count body bytes of a streamed response, read after ``record_response``."""
+    company = _current_company.get()
+    if company is not None:
+        company.add(bytes_downloaded=n)
+
+
+def add_postings(n):
+    company = _current_company.get()
+    if company is not None:
+        company.add(postings_fetched=n)
+
+
+def add_upserted(n=1):
+    company = _current_company.get()
+    if company is not None:
+        company.add(rows_upserted=n)
+
+
+def add_deactivated(n):
+    company = _current_company.get()
+    if company is not None:
+        company.add(rows_deactivated=n)
+
+
+def record_error(exc, stage=None):
+    company = _current_company.get()
+    if company is not None:
+        company.record_error(exc, stage)
@@ -0,0 +1,152 @@
+"""
+Board leases, so several fetch workers (on one or many machines) can share the
+due boards in ``BoardState`` without fetching the same board twice.
+
+A worker claims a due board by writing its id and an expiry into the board's
+lease columns, renews the expiry from a heartbeat thread while it works, and
+clears the lease when done. A worker that crashes simply stops renewing, so
+its boards become claimable again once the lease expires.
+
+On PostgreSQL candidates are locked with ``SELECT ... FOR UPDATE SKIP LOCKED``
+so concurrent workers never wait on each other. SQLite has no row locks; there
+each claim is a conditional ``UPDATE`` (compare-and-set on the lease columns)
+and a worker that loses the race just moves on to the next candidate.
+"""
+import logging
+import os
+import socket
+import threading
+import uuid
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import BoardState
+from .scheduler import board_key
+
+logger = logging.getLogger(__name__)
+
+LEASE_SECONDS = 300
+
+
+def default_owner():
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+
+def _free(now):
+    return Q(lease_expires_at__isnull=True) | Q(lease_expires_at__lt=now)
+
+
+def claim(owner, companies, limit=1, lease_seconds=LEASE_SECONDS, now=None):
+    """
+    Lease up to ``limit`` due, configured boards for ``owner``, most overdue first.
+    Returns a list of (comp, state).
+    """
+    now = now or timezone.now()
+    by_key = {board_key(comp): comp for comp in companies}
+    if not by_key:
+        return []
+    candidates = (
+        BoardState.objects.filter(_free(now), next_due_at__lte=now)
+        .filter(platform__in={k[0] for k in by_key}, board__in={k[1] for k in by_key})
+        .order_by("next_due_at")
+    )
+    lease = {
+        "lease_owner": owner,
+        "lease_expires_at": now + timedelta(seconds=lease_seconds),
+        "heartbeat_at": now,
+    }
+
+    claimed = []
+    if connection.features.has_select_for_update_skip_locked:
+        # Exact (platform, board) pairs before the LIMIT, so rows of unconfigured
+        # combinations can't take the slots and leave due boards unclaimed
+        configured = Q()
+        for platform, board in by_key:
+            configured |= Q(platform=platform, board=board)
+        with transaction.atomic():
+            claimed = list(candidates.filter(configured).select_for_update(skip_locked=True)[:limit])
+            BoardState.objects.filter(pk__in=[state.pk for state in claimed]).update(**lease)
+    else:
+        # SQLite: an OR per board would outgrow its expression depth limit, match in Python
+        for state in candidates.iterator():
+            if (state.platform, state.board) not in by_key:
+                continue
+            # Only succeeds if nobody claimed the board since we read it
+            if BoardState.objects.filter(_free(now), pk=state.pk).update(**lease):
+                claimed.append(state)
+                if len(claimed) >= limit:
+                    break
+
+    for state in claimed:
+        for field, value in lease.items():
+            setattr(state, field, value)
+    return [(by_key[(state.platform, state.board)], state) for state in claimed]
+
+
+def renew(owner, state_ids, lease_seconds=LEASE_SECONDS, now=None):
+    """Extend ``owner``'s leases on ``state_ids``. Returns how many are still held."""
+    now = now or timezone.now()
+    return BoardState.objects.filter(pk__in=list(state_ids), lease_owner=owner).update(
+        lease_expires_at=now + timedelta(seconds=lease_seconds),
+        heartbeat_at=now,
+    )
+
+
+def release(owner, state):
+    """Give up the lease on ``state`` (no-op if it was already reclaimed by someone else)."""
+    return BoardState.objects.filter(pk=state.pk, lease_owner=owner).update(
+        lease_owner="",
+        lease_expires_at=None,
+    )
+
+
+class Heartbeat(threading.Thread):
+    """Renews the leases in ``held`` every third of the lease duration until stopped."""
+
+    def __init__(self, owner, lease_seconds=LEASE_SECONDS):
+        super().__init__(name="lease-heartbeat", daemon=True)
+        self.owner = owner
+        self.lease_seconds = lease_seconds
+        self.held = set()
+        self.stopped = threading.Event()
+        self._lock = threading.Lock()
+
+    def hold(self, state):
+        with self._lock:
+            self.held.add(state.pk)
+
+    def drop(self, state):
+        with self._lock:
+            self.held.discard(state.pk)
+
+    def run(self):
+        try:
+            while not self.stopped.wait(self.lease_seconds / 3.0):
+                with self._lock:
+                    held = set(self.held)
+                if not held:
+                    continue
+                try:
+                    renewed = renew(self.owner, held, self.lease_seconds)
+                except Exception:
+                    logger.exception("Lease heartbeat failed")
+                    continue
+                if renewed < len(held):
+                    logger.warning(
+                        "%s lost %d of %d board lease(s); another worker may refetch them",
+                        self.owner, len(held) - renewed, len(held),
+                    )
+        finally:
+            # This thread has its own DB connection
+            connection.close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stopped.set()
+        self.join()
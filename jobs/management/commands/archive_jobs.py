@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from jobs import archive
+
+
+class Command(BaseCommand):
+    help = (
+        "Apply the retention policy to inactive jobs: purge their raw payloads, then move "
+        "those inactive for longer than --days to the archive table"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=archive.RETENTION_DAYS,
+            help="Archive jobs inactive for longer than this many days",
+        )
+        parser.add_argument(
+            "--purge-raw-days",
+            type=int,
+            default=archive.RAW_RETENTION_DAYS,
+            help="Drop the raw API payload of jobs inactive for longer than this many days",
+        )
+        parser.add_argument("--compress", action="store_true", help="Store archived descriptions zlib-compressed")
+        parser.add_argument("--batch-size", type=int, default=archive.BATCH_SIZE, help="Jobs archived per transaction")
+        parser.add_argument(
+            "--vacuum",
+            action="store_true",
+            help="VACUUM the SQLite database afterwards to shrink the file (locks it while running)",
+        )
+
+    def handle(self, *args, **options):
+        if options["days"] < 0 or options["purge_raw_days"] < 0:
+            raise CommandError("--days and --purge-raw-days can't be negative")
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be at least 1")
+
+        purged = archive.purge_raw(options["purge_raw_days"])
+        self.stdout.write(f"Purged raw payloads of {purged} inactive job(s)")
+        archived = archive.archive_inactive(
+            options["days"], compress=options["compress"], batch_size=options["batch_size"]
+        )
+        self.stdout.write(f"Archived {archived} job(s) inactive for more than {options['days']} day(s)")
+        if options["vacuum"]:
+            archive.vacuum()
+            self.stdout.write("Database vacuumed")
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+
+from jobs.stub_server import StubConfig, make_server
+
+
+class Command(BaseCommand):
+    help = (
+        "Run a local stand-in for the Greenhouse/Lever/Ashby/Workable/SmartRecruiters endpoints. "
+        "Point fetch_jobs at it with --ats-base-url http://HOST:PORT"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument("--postings", type=int, default=50, help="Postings per synthetic board")
+        parser.add_argument("--latency-ms", type=float, default=0, help="Added latency per response")
+        parser.add_argument("--jitter-ms", type=float, default=0, help="Uniform +/- jitter on the latency")
+        parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 5xx/429")
+        parser.add_argument("--description-kb", type=int, default=0, help="Pad each description by roughly this many KB")
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--fail-boards", default="", help="Comma-separated handles that always return 404")
+        parser.add_argument("--cassette", metavar="PATH", help="Serve recorded responses from this cassette first")
+        parser.add_argument("--verbose-requests", action="store_true", help="Log every request")
+
+    def handle(self, *args, **options):
+        config = StubConfig(
+            postings=options["postings"],
+            latency_ms=options["latency_ms"],
+            jitter_ms=options["jitter_ms"],
+            error_rate=options["error_rate"],
+            description_kb=options["description_kb"],
+            seed=options["seed"],
+            fail_boards=[h.strip() for h in options["fail_boards"].split(",") if h.strip()],
+            cassette=options["cassette"],
+        )
+        server = make_server(options["host"], options["port"], config, verbose=options["verbose_requests"])
+        host, port = server.server_address[:2]
+        self.stdout.write(f"ATS stub listening on http://{host}:{port} (Ctrl+C to stop)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            self.stdout.write(f"Served {config.requests} requests ({config.errors} injected errors)")
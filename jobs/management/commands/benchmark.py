@@ -0,0 +1,119 @@
+import json
+import os
+import tempfile
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from jobs.benchmarks import BENCHMARKS, datagen, suite
+from jobs.models import Company, Job
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the benchmark suite against a separate, synthetic database "
+        "(never the configured one) and write comparable JSON results"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scale", default="10k", help="Dataset size: 1k, 10k, 100k, 1m or a number of jobs")
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--only", help="Comma-separated benchmark names to run")
+        parser.add_argument("--iterations", type=int, help="Override the iteration count of every benchmark")
+        parser.add_argument("--output", metavar="PATH", help="Write results as JSON to PATH")
+        parser.add_argument("--compare", metavar="PATH", help="Compare against a previous results JSON")
+        parser.add_argument(
+            "--db-file",
+            metavar="PATH",
+            help="SQLite file for the benchmark database (default: a per-scale file in the temp dir)",
+        )
+        parser.add_argument(
+            "--keepdb",
+            action="store_true",
+            help="Keep the benchmark database between runs so large datasets are generated once",
+        )
+        parser.add_argument("--list", action="store_true", help="List benchmarks and exit")
+
+    def handle(self, *args, **options):
+        if options["list"]:
+            for bench in BENCHMARKS.values():
+                self.stdout.write(f"{bench.name:36} [{bench.group}] {bench.description}")
+            return
+
+        names = None
+        if options["only"]:
+            names = [name.strip() for name in options["only"].split(",") if name.strip()]
+            unknown = [name for name in names if name not in BENCHMARKS]
+            if unknown:
+                raise CommandError(f"Unknown benchmark(s): {', '.join(unknown)}")
+
+        scale = options["scale"].lower()
+        try:
+            total_jobs = datagen.scale_to_count(scale)
+        except ValueError:
+            raise CommandError(f"Invalid --scale: {options['scale']}")
+
+        if connection.vendor == "sqlite":
+            connection.settings_dict.setdefault("TEST", {})
+            connection.settings_dict["TEST"]["NAME"] = options["db_file"] or os.path.join(
+                tempfile.gettempdir(), f"breneo_bench_{scale}_{options['seed']}.sqlite3"
+            )
+
+        keepdb = options["keepdb"]
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=keepdb, serialize=False)
+        try:
+            results = self.run_suite(scale, total_jobs, options, names)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=keepdb)
+
+        output = json.dumps(results, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as fh:
+                fh.write(output)
+            self.stdout.write(f"Results written to {options['output']}")
+        else:
+            self.stdout.write(output)
+
+        if options["compare"]:
+            with open(options["compare"]) as fh:
+                baseline = json.load(fh)
+            self.print_comparison(results, baseline)
+
+    def run_suite(self, scale, total_jobs, options, names):
+        existing = Job.objects.count()
+        if existing != total_jobs:
+            if existing:
+                Job.objects.all().delete()
+                Company.objects.all().delete()
+            self.stdout.write(f"Generating {total_jobs} jobs (seed={options['seed']})...")
+            datagen.generate(total_jobs, seed=options["seed"], stdout=self.stdout)
+        else:
+            self.stdout.write(f"Reusing existing benchmark dataset ({existing} jobs)")
+
+        with connection.cursor() as cursor:
+            if connection.vendor == "sqlite":
+                cursor.execute("ANALYZE")
+            elif connection.vendor == "postgresql":
+                cursor.execute("ANALYZE jobs_job")
+
+        ctx = suite.Context(scale=scale, total_jobs=total_jobs, seed=options["seed"])
+        self.stdout.write("Running benchmarks:")
+        benchmarks = suite.run(ctx, names=names, iterations=options["iterations"], stdout=self.stdout)
+        return {
+            "meta": dict(suite.environment(), scale=scale, total_jobs=total_jobs, seed=options["seed"]),
+            "benchmarks": benchmarks,
+        }
+
+    def print_comparison(self, results, baseline):
+        base_meta = baseline.get("meta", {})
+        if base_meta.get("scale") != results["meta"]["scale"]:
+            self.stdout.write(self.style.WARNING(
+                f"Baseline scale {base_meta.get('scale')} differs from {results['meta']['scale']}"
+            ))
+        self.stdout.write(f"{'benchmark':36} {'baseline':>12} {'current':>12} {'change':>9}")
+        for name, before, after, change in suite.compare(results, baseline):
+            change_str = f"{change:+.1f}%" if change is not None else "n/a"
+            style = self.style.ERROR if change and change > 10 else (
+                self.style.SUCCESS if change and change < -10 else (lambda s: s)
+            )
+            self.stdout.write(style(f"{name:36} {before:>10.2f}ms {after:>10.2f}ms {change_str:>9}"))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from jobs import snapshots
+
+
+class Command(BaseCommand):
+    help = (
+        "Prerender the unfiltered search pages and the company directory into versioned, "
+        "pre-compressed JSON files under MEDIA_ROOT/snapshots (fetch_jobs does this after each run)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="Rebuild even if the data hasn't changed")
+
+    def handle(self, *args, **options):
+        manifest = snapshots.build(force=options["force"])
+        if manifest is None:
+            self.stdout.write("Snapshots are already current")
+            return
+        self.stdout.write(
+            f"Published snapshot version {manifest['version']}: {', '.join(manifest['names'])}"
+        )
+        if snapshots.mode() == "off":
+            self.stdout.write("Note: SNAPSHOT_MODE is off, so the API doesn't serve them")
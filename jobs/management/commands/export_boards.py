@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from jobs import boards
+
+
+class Command(BaseCommand):
+    help = "Export the board registry as JSON or CSV (re-importable with import_boards)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", choices=["json", "csv"], default="json")
+        parser.add_argument("--output", metavar="PATH", help="Write to PATH instead of stdout")
+        parser.add_argument("--enabled-only", action="store_true", help="Leave out disabled boards")
+
+    def handle(self, *args, **options):
+        text = boards.export_boards(options["format"], include_disabled=not options["enabled_only"])
+        if options["output"]:
+            with open(options["output"], "w", newline="") as fh:
+                fh.write(text)
+            self.stdout.write(f"Boards written to {options['output']}")
+        else:
+            self.stdout.write(text, ending="")
@@ -0,0 +1,43 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from jobs import export
+
+
+class Command(BaseCommand):
+    help = "Export all active jobs as NDJSON (one JSON object per line), optionally gzip-compressed"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output",
+            metavar="PATH",
+            help="Write to PATH instead of stdout (gzip-compressed if it ends in .gz)",
+        )
+        parser.add_argument("--gzip", action="store_true", help="Gzip-compress the output")
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=export.CHUNK_SIZE,
+            help="Rows fetched from the database at a time",
+        )
+
+    def handle(self, *args, **options):
+        if options["chunk_size"] < 1:
+            raise CommandError("--chunk-size must be at least 1")
+        path = options["output"]
+        chunks = export.iter_ndjson(export.active_jobs(), chunk_size=options["chunk_size"])
+        if options["gzip"] or (path and path.endswith(".gz")):
+            chunks = export.gzipped(chunks)
+
+        if not path:
+            for chunk in chunks:
+                sys.stdout.buffer.write(chunk)
+            sys.stdout.buffer.flush()
+            return
+        written = 0
+        with open(path, "wb") as fh:
+            for chunk in chunks:
+                fh.write(chunk)
+                written += len(chunk)
+        self.stdout.write(f"Active jobs written to {path} ({written} bytes)")
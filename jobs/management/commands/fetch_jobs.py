@@ -1,112 +1,278 @@
-from django.core.management.base import BaseCommand
-from jobs.models import Company, Job
-from jobs.utils import parse_date
-from jobs import fetchers
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from django.core.management.base import BaseCommand, CommandError
+from jobs.models import FetchRun
+from jobs import boards, breaker, history, ingest, instrumentation, leases, profiling, scheduler, snapshots, transport
+from jobs.companies import CompanyResolver
+from jobs.writer import IngestWriter
 import logging
+import os
 
 logger = logging.getLogger(__name__)
 
-# Generate logo URL from logo.dev
-def get_logo_url(company_name: str, size=101) -> str:
-    from jobs.fetchers import LOGO_DEV_PUBLIC_KEY
-    safe_name = company_name.replace(" ", "")
-    return f"https://img.logo.dev/name/{safe_name}?token={LOGO_DEV_PUBLIC_KEY}&size={size}&retina=true"
-
-# Example companies
-COMPANIES = [
-    {"name": "Intercom", "platform": "greenhouse", "handle": "intercom"},
-    {"name": "Figma", "platform": "greenhouse", "handle": "figma"},
-    {"name": "Spotify", "platform": "lever", "handle": "spotify"},
-    {"name": "Stripe", "platform": "greenhouse", "handle": "stripe"},
-    {"name": "Airbnb", "platform": "greenhouse", "handle": "airbnb"},
-    {"name": "DoorDash", "platform": "greenhouse", "handle": "doordash"},
-    {"name": "SpaceX", "platform": "greenhouse", "handle": "spacex"},
-    {"name": "Cloudflare", "platform": "greenhouse", "handle": "cloudflare"},
-]
-
-# Map platform to fetcher function
-PLATFORM_TO_FETCHER = {
-    "greenhouse": fetchers.fetch_greenhouse,
-    "lever": fetchers.fetch_lever,
-    "workable": fetchers.fetch_workable,
-    "smartrecruiters": getattr(fetchers, "fetch_smartrecruiters", None),
-    "rss": fetchers.fetch_rss,
-    "jobs.ge": fetchers.fetch_jobs_ge_listings,
-    "career_page": fetchers.fetch_generic_career_page,
-    "ashby": fetchers.fetch_ashby,
-}
 
 class Command(BaseCommand):
-    help = "Fetch jobs from configured companies and store/update in DB"
+    help = "Fetch jobs from the enabled boards and store/update in DB"
+    profiler = None
+    companies = None
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--metrics-json",
+            metavar="PATH",
+            help="Write the per-company/per-stage run summary as JSON to PATH ('-' for stdout)",
+        )
+        parser.add_argument(
+            "--metrics-prom",
+            metavar="PATH",
+            help="Write run metrics in Prometheus text format to PATH (for the node_exporter textfile collector)",
+        )
+        parser.add_argument(
+            "--ats-base-url",
+            metavar="URL",
+            help="Send all fetcher HTTP traffic to a local stand-in server (see the ats_stub_server command)",
+        )
+        parser.add_argument(
+            "--cassette",
+            metavar="PATH",
+            help="Record responses to, or replay them from, this JSON cassette",
+        )
+        parser.add_argument(
+            "--cassette-mode",
+            choices=["record", "replay"],
+            default="replay",
+            help="With --cassette: 'record' live responses or 'replay' them offline (default)",
+        )
+        parser.add_argument(
+            "--profile",
+            metavar="DIR",
+            help="Write cProfile stats (overall and per company) and a collapsed-stack file per company/stage to DIR",
+        )
+        parser.add_argument(
+            "--profile-memory",
+            action="store_true",
+            help="With --profile: also track peak memory per company with tracemalloc snapshots",
+        )
+
+        parser.add_argument("--platform", help="Only fetch boards of this platform")
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=1,
+            help=(
+                "Fetch this many boards at once; their DB writes all go through a single writer "
+                "thread, so SQLite isn't contended (not with --worker: run more workers instead)"
+            ),
+        )
+        parser.add_argument(
+            "--resume",
+            nargs="?",
+            const="latest",
+            metavar="RUN_ID",
+            help=(
+                "Continue the last fetch_jobs run (or run RUN_ID) if it failed or had failed boards, only "
+                "fetching the boards it has not completed; starts a normal run when there is nothing to "
+                "resume. A run still marked running (killed without cleaning up) needs its RUN_ID"
+            ),
+        )
+        parser.add_argument(
+            "--worker",
+            action="store_true",
+            help=(
+                "Worker mode: claim due boards through DB leases until none are left, so several "
+                "fetch_jobs processes (on any number of machines) can share the boards; the only "
+                "mode that follows and updates the adaptive refresh schedule"
+            ),
+        )
+        parser.add_argument(
+            "--worker-id",
+            help="Lease owner name in worker mode (default: host:pid:random)",
+        )
+        parser.add_argument(
+            "--lease-seconds",
+            type=float,
+            default=leases.LEASE_SECONDS,
+            help="How long a claimed board stays leased without a heartbeat",
+        )
 
     def handle(self, *args, **options):
-        total = 0
-        for comp in COMPANIES:
-            platform = comp.get("platform")
-            company_name = comp.get("name")
-            company_logo = get_logo_url(company_name)
-
-            # Ensure company exists before fetching jobs
-            company_obj, created = Company.objects.get_or_create(
-                name=company_name,
-                defaults={
-                    "logo": company_logo,
-                    "platform": platform,
-                }
+        if options.get("ats_base_url") or options.get("cassette"):
+            transport.configure(
+                base_url=options.get("ats_base_url"),
+                cassette=options.get("cassette"),
+                cassette_mode=options.get("cassette_mode") or "replay",
             )
-            if not company_obj.logo:
-                company_obj.logo = company_logo
-                company_obj.save()
 
-            logger.info("Fetching jobs for %s (%s)", company_name, platform)
+        concurrency = options.get("concurrency") or 1
+        if concurrency < 1:
+            raise CommandError("--concurrency must be at least 1")
+        if concurrency > 1 and options.get("worker"):
+            raise CommandError("--concurrency can't be combined with --worker; run more workers instead")
+
+        command = "fetch_jobs_worker" if options.get("worker") else "fetch_jobs"
+        run = instrumentation.RunMetrics(command=command)
+        fetch_run, done = self.start_run(command, options)
+        try:
+            with profiling.maybe_profile(options.get("profile"), options.get("profile_memory")) as profiler, \
+                    instrumentation.activate(run):
+                self.profiler = profiler
+                configured = boards.enabled_boards(platform=options.get("platform"))
+                # One company lookup cache for the whole run
+                self.companies = CompanyResolver()
+                if options.get("worker"):
+                    total = self.work(configured, run, fetch_run, options)
+                else:
+                    ingest.resolve_boards(configured, self.companies)
+                    total = self.fetch_all(configured, run, fetch_run, done, concurrency)
+        except BaseException:
+            run.finish()
+            history.finish_run(fetch_run, run, status=FetchRun.STATUS_FAILED)
+            raise
+        run.finish()
+        history.finish_run(fetch_run, run)
+        snapshots.refresh()
+
+        logger.info("Total jobs fetched/updated: %d", total)
+        self.write_metrics(run, options)
+
+    def start_run(self, command, options):
+        """The FetchRun to record into, and the boards it has already completed."""
+        resume = options.get("resume")
+        if resume and not options.get("worker"):
+            try:
+                run_id = None if resume in (True, "latest") else int(resume)
+            except ValueError:
+                raise CommandError(f"Invalid --resume run id: {resume}")
+            fetch_run = history.resumable_run(command, run_id)
+            if fetch_run is None and run_id is not None:
+                raise CommandError(f"No {command} run #{run_id}")
+            if fetch_run is not None:
+                done = history.completed_boards(fetch_run)
+                logger.info("Resuming %s, skipping %d board(s) already fetched", fetch_run, len(done))
+                return history.reopen_run(fetch_run), done
+            logger.info("Nothing to resume, starting a new run")
+        return history.start_run(command), set()
+
+    def write_metrics(self, run, options):
+        totals = run.totals()
+        logger.info(
+            "Run finished in %.2fs: %d companies, %d bytes, %d rows upserted, %d deactivated, %d errors",
+            (run.finished_at or run.started_at) - run.started_at,
+            totals["companies"], totals["bytes_downloaded"], totals["rows_upserted"],
+            totals["rows_deactivated"], totals["errors"],
+        )
+
+        json_path = options.get("metrics_json")
+        if json_path == "-":
+            self.stdout.write(run.to_json(indent=2))
+        elif json_path:
+            with open(json_path, "w") as fh:
+                fh.write(run.to_json(indent=2))
 
-            fetcher = PLATFORM_TO_FETCHER.get(platform)
-            if not fetcher:
-                logger.warning("No fetcher for platform: %s", platform)
+        prom_path = options.get("metrics_prom")
+        if prom_path:
+            # Write then rename so the textfile collector never reads a partial file
+            tmp_path = f"{prom_path}.tmp"
+            with open(tmp_path, "w") as fh:
+                fh.write(run.to_prometheus())
+            os.replace(tmp_path, prom_path)
+
+    def fetch_all(self, configured, run, fetch_run, done=(), concurrency=1):
+        skipped = 0
+        pending = []
+        states = scheduler.states_for(configured)
+        for comp in configured:
+            key = scheduler.board_key(comp)
+            if key in done:
+                continue
+            state = states.get(key)
+            if state is not None and not breaker.allow(state):
+                logger.info(
+                    "Skipping %s (%s): circuit breaker open until %s after %d failures",
+                    comp.get("name"), comp.get("platform"), state.breaker_open_until, state.consecutive_failures,
+                )
+                skipped += 1
                 continue
+            pending.append((comp, state))
+        if skipped:
+            logger.info("Skipped %d board(s) with an open circuit breaker", skipped)
 
-            if platform in ("greenhouse", "lever", "workable", "smartrecruiters", "ashby"):
-                jobs_data = fetcher(comp.get("handle"), company_name)
-            else:
-                jobs_data = fetcher(comp.get("url") or comp.get("handle"), company_name)
+        if concurrency > 1:
+            return self.fetch_concurrently(pending, run, fetch_run, concurrency)
+        total = 0
+        for comp, state in pending:
+            with run.track_company(comp.get("name"), comp.get("platform")) as company_metrics, \
+                    profiling.company(self.profiler, comp.get("name"), company_metrics):
+                total += self.fetch_company(comp)
+            self.record_board(fetch_run, comp, state, company_metrics)
+        return total
 
-            found_ids = set()
-            for j in jobs_data:
-                try:
-                    ext_id = j.get("external_job_id") or j.get("apply_url")
-                    if not ext_id:
-                        continue
-                    found_ids.add(ext_id)
-
-                    # Create/update Job
-                    Job.objects.update_or_create(
-                        platform=platform,
-                        external_job_id=ext_id,
-                        defaults={
-                            "title": j.get("title") or "",
-                            "company": company_obj,
-                            "location": j.get("location"),
-                            "description": j.get("description"),
-                            "apply_url": j.get("apply_url") or ext_id,
-                            "posted_at": parse_date(j.get("posted_at")) if j.get("posted_at") else None,
-                            "raw": j.get("raw") or {},
-                            "is_active": True,
-                            "company_logo": j.get("logo") or company_logo,
-                        },
-                    )
-                    total += 1
-
-                except Exception:
-                    logger.exception("Failed to save job: %s", j.get("title"))
-
-            # Mark old jobs inactive
+    def fetch_concurrently(self, pending, run, fetch_run, concurrency):
+        """Fetch boards on ``concurrency`` threads; every DB write goes through one IngestWriter."""
+        total = 0
+        with IngestWriter() as writer:
+            pool = ThreadPoolExecutor(concurrency, thread_name_prefix="fetch")
             try:
-                qs = Job.objects.filter(platform=platform, company=company_obj)
-                if found_ids:
-                    qs.exclude(external_job_id__in=found_ids).update(is_active=False)
-            except Exception:
-                logger.exception("Failed to mark inactive jobs for %s (%s)", company_name, platform)
+                futures = {
+                    pool.submit(self.fetch_in_thread, comp, run, writer): (comp, state)
+                    for comp, state in pending
+                }
+                recorded = []
+                for future in as_completed(futures):
+                    comp, state = futures[future]
+                    rows, company_metrics = future.result()
+                    total += rows
+                    recorded.append(writer.submit(self.record_board, fetch_run, comp, state, company_metrics))
+            except BaseException:
+                # Don't start the remaining boards on the way out
+                pool.shutdown(cancel_futures=True)
+                raise
+            pool.shutdown()
+            # A board whose result wasn't recorded would be refetched on resume
+            # and never reach the breaker, so that fails the run, as it does
+            # when fetching one board at a time
+            for future in recorded:
+                future.result()
+        logger.info("%d writer transaction(s) for %d board(s)", writer.transactions, len(pending))
+        return total
 
-        logger.info("Total jobs fetched/updated: %d", total)
+    def fetch_in_thread(self, comp, run, writer):
+        with instrumentation.activate(run), \
+                run.track_company(comp.get("name"), comp.get("platform")) as company_metrics, \
+                profiling.company(self.profiler, comp.get("name"), company_metrics):
+            rows = self.fetch_company(comp, writer=writer)
+        return rows, company_metrics
+
+    def record_board(self, fetch_run, comp, state, company_metrics):
+        # The board's schedule is left alone: only worker mode feeds it (see jobs.scheduler)
+        if state is not None:
+            breaker.record(state, bool(company_metrics.errors), breaker.error_summary(company_metrics))
+        history.record_board_result(fetch_run, company_metrics, history.board_identifier(comp))
 
+    def work(self, configured, run, fetch_run, options):
+        owner = options.get("worker_id") or leases.default_owner()
+        lease_seconds = options["lease_seconds"]
+        scheduler.sync_boards(configured, spread=False)
+        logger.info("Worker %s claiming due boards", owner)
+
+        refreshed = 0
+        with leases.Heartbeat(owner, lease_seconds) as heartbeat:
+            while True:
+                claimed = leases.claim(owner, configured, lease_seconds=lease_seconds)
+                if not claimed:
+                    break
+                comp, state = claimed[0]
+                heartbeat.hold(state)
+                try:
+                    with run.track_company(comp.get("name"), comp.get("platform")) as company_metrics, \
+                            profiling.company(self.profiler, comp.get("name"), company_metrics):
+                        scheduler.refresh_board(comp, state, company_metrics, companies=self.companies)
+                    history.record_board_result(fetch_run, company_metrics, history.board_identifier(comp))
+                finally:
+                    heartbeat.drop(state)
+                    leases.release(owner, state)
+                refreshed += 1
+        logger.info("Worker %s refreshed %d board(s)", owner, refreshed)
+        return run.totals()["rows_upserted"]
 
+    def fetch_company(self, comp, writer=None):
+        return ingest.ingest_company(comp, writer=writer, companies=self.companies)
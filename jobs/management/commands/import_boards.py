@@ -0,0 +1,43 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from jobs import boards
+
+
+class Command(BaseCommand):
+    help = "Create/update boards from a JSON or CSV file (see export_boards for the format)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to import, or '-' for stdin")
+        parser.add_argument("--format", choices=["json", "csv"], help="Default: from the file extension, else json")
+        parser.add_argument(
+            "--disable-missing",
+            action="store_true",
+            help="Disable boards that are not in the file",
+        )
+        parser.add_argument("--dry-run", action="store_true", help="Report what would change without saving")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = options["format"] or ("csv" if path.endswith(".csv") else "json")
+        if path == "-":
+            text = sys.stdin.read()
+        else:
+            with open(path, newline="") as fh:
+                text = fh.read()
+
+        try:
+            counts = boards.import_boards(
+                boards.parse(text, fmt),
+                disable_missing=options["disable_missing"],
+                dry_run=options["dry_run"],
+            )
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        prefix = "Would have " if options["dry_run"] else ""
+        self.stdout.write(
+            f"{prefix}created {counts['created']}, updated {counts['updated']}, "
+            f"disabled {counts['disabled']} board(s); {counts['unchanged']} unchanged"
+        )
@@ -0,0 +1,121 @@
+import logging
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+
+from jobs import boards, history, instrumentation, leases, scheduler, snapshots, transport
+from jobs.companies import CompanyResolver
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        "Long-running scheduler: refresh each board when it is due, checking boards that "
+        "change often more frequently than stable ones"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Refresh the boards that are due now and exit")
+        parser.add_argument(
+            "--max-sleep",
+            type=float,
+            default=60,
+            help="Upper bound in seconds on how long to sleep between scheduling passes",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=50,
+            help="Maximum number of due boards refreshed per pass",
+        )
+        parser.add_argument("--min-interval", type=float, default=scheduler.MIN_INTERVAL, help="Seconds")
+        parser.add_argument("--max-interval", type=float, default=scheduler.MAX_INTERVAL, help="Seconds")
+        parser.add_argument(
+            "--jitter",
+            type=float,
+            default=scheduler.JITTER,
+            help="Spread due times by +/- this fraction of the interval",
+        )
+        parser.add_argument(
+            "--worker-id",
+            help="Lease owner name, so several schedulers can share the boards (default: host:pid:random)",
+        )
+        parser.add_argument(
+            "--lease-seconds",
+            type=float,
+            default=leases.LEASE_SECONDS,
+            help="How long a claimed board stays leased without a heartbeat",
+        )
+        parser.add_argument(
+            "--ats-base-url",
+            metavar="URL",
+            help="Send all fetcher HTTP traffic to a local stand-in server (see the ats_stub_server command)",
+        )
+
+    def handle(self, *args, **options):
+        if options.get("ats_base_url"):
+            transport.configure(base_url=options["ats_base_url"])
+
+        self.owner = options.get("worker_id") or leases.default_owner()
+        self.stopping = threading.Event()
+        if not options["once"]:
+            signal.signal(signal.SIGTERM, self.stop)
+            signal.signal(signal.SIGINT, self.stop)
+
+        while not self.stopping.is_set():
+            # Re-read the registry every pass so board edits apply without a restart
+            configured = boards.enabled_boards()
+            created = scheduler.sync_boards(configured)
+            if created:
+                logger.info("Scheduling %d new board(s)", created)
+            self.run_pass(configured, options)
+            if options["once"]:
+                break
+            wait = scheduler.seconds_until_next(configured)
+            wait = options["max_sleep"] if wait is None else min(wait, options["max_sleep"])
+            self.stopping.wait(max(wait, 1.0))
+
+    def stop(self, signum, frame):
+        logger.info("Received signal %d, stopping after the current board", signum)
+        self.stopping.set()
+
+    def run_pass(self, configured, options):
+        run = instrumentation.RunMetrics(command="schedule_jobs")
+        fetch_run = None
+        changed_boards = 0
+        companies = CompanyResolver()
+        with instrumentation.activate(run), \
+                leases.Heartbeat(self.owner, options["lease_seconds"]) as heartbeat:
+            for _ in range(options["batch_size"]):
+                if self.stopping.is_set():
+                    break
+                claimed = leases.claim(self.owner, configured, lease_seconds=options["lease_seconds"])
+                if not claimed:
+                    break
+                comp, state = claimed[0]
+                fetch_run = fetch_run or history.start_run("schedule_jobs")
+                heartbeat.hold(state)
+                try:
+                    with run.track_company(comp.get("name"), comp.get("platform")) as company_metrics:
+                        changed_boards += scheduler.refresh_board(
+                            comp,
+                            state,
+                            company_metrics,
+                            min_interval=options["min_interval"],
+                            max_interval=options["max_interval"],
+                            jitter=options["jitter"],
+                            companies=companies,
+                        )
+                    history.record_board_result(fetch_run, company_metrics, history.board_identifier(comp))
+                finally:
+                    heartbeat.drop(state)
+                    leases.release(self.owner, state)
+        run.finish()
+        if fetch_run is not None:
+            history.finish_run(fetch_run, run)
+            logger.info("Refreshed %d due board(s), %d changed", len(run.companies), changed_boards)
+            # A no-op unless the pass changed the data version
+            snapshots.refresh()
+        return changed_boards
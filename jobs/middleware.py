@@ -0,0 +1,219 @@
+"""
+Opt-in per-request timing for the API.
+
+``RequestTimingMiddleware`` records, for a sampled fraction of requests, the
+number of SQL queries and the time spent in them, the time spent serializing
+(``timed("serialize")`` blocks in the views) and rendering, and the response
+size. The numbers are returned as a ``Server-Timing`` header and requests
+slower than ``REQUEST_TIMING_SLOW_MS`` are logged together with their
+normalized SQL.
+
+Unsampled requests go straight through, so the overhead with a low sample
+rate is one ``random.random()`` call per request.
+
+``CompressionMiddleware`` compresses the API's JSON responses for clients
+that accept it: brotli if the optional ``brotli`` package is installed and
+the client sends ``br``, gzip otherwise.
+"""
+import contextvars
+import logging
+import random
+import re
+import time
+from collections import defaultdict
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # optional: responses are then only gzip-compressed
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+_current_timing = contextvars.ContextVar("request_timing", default=None)
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_NUMBER_RE = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_PLACEHOLDER_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_ACCEPTS_BR_RE = re.compile(r"\bbr\b")
+
+# Response types worth compressing; the admin's HTML and downloads that are already compressed pass through
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson")
+# Below this, the encoding overhead isn't worth it (GZipMiddleware's own threshold)
+MIN_COMPRESS_BYTES = 200
+# Brotli's default (11) is meant for static files; 5 compresses better than gzip at a similar speed
+BROTLI_QUALITY = 5
+
+
+def normalize_sql(sql):
+    """Collapse literals and IN-lists so equivalent queries group together."""
+    sql = _WHITESPACE_RE.sub(" ", sql).strip()
+    sql = sql.replace("%s", "?")
+    sql = _STRING_RE.sub("?", sql)
+    sql = _NUMBER_RE.sub("?", sql)
+    return _PLACEHOLDER_LIST_RE.sub("(...)", sql)
+
+
+class RequestTiming:
+    """Accumulates DB and stage timings for one request."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db_seconds = 0.0
+        self.db_queries = 0
+        self.queries = defaultdict(lambda: [0, 0.0])  # raw sql -> [count, seconds]; normalized on demand
+        self.stages = defaultdict(float)
+        self.render_started = None
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.db_seconds += elapsed
+            self.db_queries += 1
+            entry = self.queries[sql]
+            entry[0] += 1
+            entry[1] += elapsed
+
+    def normalized_queries(self, limit=10):
+        grouped = defaultdict(lambda: [0, 0.0])
+        for sql, (count, seconds) in self.queries.items():
+            entry = grouped[normalize_sql(sql)]
+            entry[0] += count
+            entry[1] += seconds
+        ranked = sorted(grouped.items(), key=lambda item: item[1][1], reverse=True)
+        return [
+            {"sql": sql, "count": count, "ms": round(seconds * 1000, 2)}
+            for sql, (count, seconds) in ranked[:limit]
+        ]
+
+
+@contextmanager
+def timed(name):
+    """
+    Time a block of view code (e.g. serialization) for the current request.
+    DB time spent inside the block is excluded, since it is reported as 'db'.
+    No-op when the request is not being timed.
+    """
+    timing = _current_timing.get()
+    if timing is None:
+        yield
+        return
+    start = time.perf_counter()
+    db_before = timing.db_seconds
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        timing.stages[name] += elapsed - (timing.db_seconds - db_before)
+
+
+class RequestTimingMiddleware:
+    """
+    Enabled with REQUEST_TIMING_ENABLED; REQUEST_TIMING_SAMPLE_RATE (0-1) and
+    REQUEST_TIMING_SLOW_MS control sampling and the slow-request log threshold.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, "REQUEST_TIMING_ENABLED", False):
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.sample_rate = float(getattr(settings, "REQUEST_TIMING_SAMPLE_RATE", 1.0))
+        self.slow_ms = float(getattr(settings, "REQUEST_TIMING_SLOW_MS", 500))
+
+    def __call__(self, request):
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return self.get_response(request)
+
+        timing = RequestTiming()
+        token = _current_timing.set(timing)
+        try:
+            with ExitStack() as stack:
+                for conn in connections.all():
+                    stack.enter_context(conn.execute_wrapper(timing))
+                response = self.get_response(request)
+        finally:
+            _current_timing.reset(token)
+
+        total_ms = (time.perf_counter() - timing.started) * 1000
+        size = None if response.streaming else len(response.content)
+        response["Server-Timing"] = self.server_timing(timing, total_ms, size)
+
+        if total_ms >= self.slow_ms:
+            logger.warning(
+                "Slow request %s %s: %.1fms total, %d queries in %.1fms, stages=%s, size=%s, queries=%s",
+                request.method,
+                request.get_full_path(),
+                total_ms,
+                timing.db_queries,
+                timing.db_seconds * 1000,
+                {name: round(seconds * 1000, 2) for name, seconds in timing.stages.items()},
+                size,
+                timing.normalized_queries(),
+            )
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered right after this hook runs
+        timing = _current_timing.get()
+        if timing is not None:
+            timing.render_started = time.perf_counter()
+
+            def finished_rendering(rendered):
+                timing.stages["render"] += time.perf_counter() - timing.render_started
+
+            response.add_post_render_callback(finished_rendering)
+        return response
+
+    @staticmethod
+    def server_timing(timing, total_ms, size):
+        parts = [f'db;dur={timing.db_seconds * 1000:.2f};desc="{timing.db_queries} queries"']
+        for name, seconds in timing.stages.items():
+            parts.append(f"{name};dur={seconds * 1000:.2f}")
+        parts.append(f"total;dur={total_ms:.2f}")
+        if size is not None:
+            parts.append(f'size;desc="{size} bytes"')
+        return ", ".join(parts)
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    Brotli- or gzip-compresses COMPRESSIBLE_TYPES responses. Streaming
+    responses (/api/export) and clients without ``br`` go through Django's
+    GZipMiddleware, which also varies on Accept-Encoding and weakens ETags.
+    """
+
+    def process_response(self, request, response):
+        content_type = response.get("Content-Type", "").split(";")[0].strip()
+        if content_type not in COMPRESSIBLE_TYPES:
+            return response
+        if (
+            brotli is None
+            or response.streaming
+            or response.has_header("Content-Encoding")
+            or len(response.content) < MIN_COMPRESS_BYTES
+        ):
+            return super().process_response(request, response)
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        if not _ACCEPTS_BR_RE.search(request.META.get("HTTP_ACCEPT_ENCODING", "")):
+            return super().process_response(request, response)
+        compressed = brotli.compress(response.content, quality=BROTLI_QUALITY)
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response["Content-Length"] = str(len(response.content))
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response["ETag"] = "W/" + etag
+        response["Content-Encoding"] = "br"
+        return response
@@ -0,0 +1,61 @@
+# Generated by Django 5.0.6 on 2026-10-18 23:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0006_add_structured_description'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FetchRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('command', models.CharField(default='fetch_jobs', max_length=100)),
+                ('status', models.CharField(choices=[('running', 'Running'), ('succeeded', 'Succeeded'), ('partial', 'Partial'), ('failed', 'Failed')], default='running', max_length=20)),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('duration_seconds', models.FloatField(blank=True, null=True)),
+                ('boards_total', models.PositiveIntegerField(default=0)),
+                ('boards_failed', models.PositiveIntegerField(default=0)),
+                ('jobs_upserted', models.PositiveIntegerField(default=0)),
+                ('jobs_deactivated', models.PositiveIntegerField(default=0)),
+                ('bytes_downloaded', models.PositiveBigIntegerField(default=0)),
+                ('summary', models.JSONField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['-started_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='BoardFetchResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('company_name', models.CharField(max_length=200)),
+                ('platform', models.CharField(max_length=100)),
+                ('board', models.CharField(max_length=500)),
+                ('started_at', models.DateTimeField()),
+                ('latency_seconds', models.FloatField(help_text='Wall-clock time for the whole board')),
+                ('fetch_seconds', models.FloatField(default=0, help_text='Time spent in HTTP requests')),
+                ('payload_bytes', models.PositiveBigIntegerField(default=0)),
+                ('http_requests', models.PositiveIntegerField(default=0)),
+                ('http_status', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('postings_count', models.PositiveIntegerField(default=0)),
+                ('rows_upserted', models.PositiveIntegerField(default=0)),
+                ('rows_deactivated', models.PositiveIntegerField(default=0)),
+                ('succeeded', models.BooleanField(default=True)),
+                ('error_class', models.CharField(blank=True, default='', max_length=200)),
+                ('error_message', models.TextField(blank=True, default='')),
+                ('stages', models.JSONField(blank=True, null=True)),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='results', to='jobs.fetchrun')),
+            ],
+            options={
+                'ordering': ['-started_at'],
+                'indexes': [models.Index(fields=['platform', 'board', '-started_at'], name='jobs_bfr_board_idx'), models.Index(fields=['started_at'], name='jobs_bfr_started_idx')],
+            },
+        ),
+    ]
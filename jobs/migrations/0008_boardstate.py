@@ -0,0 +1,37 @@
+# Generated by Django 5.0.6 on 2026-10-18 23:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0007_fetchrun_boardfetchresult'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BoardState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('platform', models.CharField(max_length=100)),
+                ('board', models.CharField(max_length=500)),
+                ('company_name', models.CharField(max_length=200)),
+                ('next_due_at', models.DateTimeField(db_index=True)),
+                ('interval_seconds', models.FloatField(help_text='Current refresh interval before jitter')),
+                ('change_rate', models.FloatField(help_text='Estimated content changes per hour (EWMA)')),
+                ('content_hash', models.CharField(blank=True, default='', max_length=64)),
+                ('last_checked_at', models.DateTimeField(blank=True, null=True)),
+                ('last_changed_at', models.DateTimeField(blank=True, null=True)),
+                ('checks', models.PositiveIntegerField(default=0)),
+                ('changes', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['next_due_at'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='boardstate',
+            constraint=models.UniqueConstraint(fields=('platform', 'board'), name='unique_board_state'),
+        ),
+    ]
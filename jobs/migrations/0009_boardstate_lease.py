@@ -0,0 +1,28 @@
+# Generated by Django 5.0.6 on 2026-10-18 23:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0008_boardstate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='boardstate',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='boardstate',
+            name='lease_expires_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='boardstate',
+            name='lease_owner',
+            field=models.CharField(blank=True, default='', max_length=200),
+        ),
+    ]
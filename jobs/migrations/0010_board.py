@@ -0,0 +1,39 @@
+# Generated by Django 5.0.6 on 2026-10-18 23:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0009_boardstate_lease'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Board',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text="Company name the board's jobs are filed under", max_length=200)),
+                ('platform', models.CharField(help_text='Fetcher to use (greenhouse, lever, ashby, workable, smartrecruiters, rss, career_page, jobs.ge)', max_length=100)),
+                ('handle', models.CharField(blank=True, default='', help_text='ATS board handle / slug', max_length=255)),
+                ('url', models.URLField(blank=True, default='', help_text='Feed or listing URL', max_length=500)),
+                ('selector', models.CharField(blank=True, default='', help_text='CSS selector for job links (career_page boards)', max_length=500)),
+                ('logo', models.URLField(blank=True, default='')),
+                ('enabled', models.BooleanField(default=True)),
+                ('priority', models.IntegerField(default=0, help_text='Boards with higher priority are fetched first')),
+                ('max_postings', models.PositiveIntegerField(blank=True, help_text='Only keep the first N postings', null=True)),
+                ('timeout_seconds', models.FloatField(blank=True, help_text="HTTP timeout for this board's requests", null=True)),
+                ('min_interval_seconds', models.PositiveIntegerField(blank=True, help_text='Never refresh more often than this (schedule_jobs / fetch_jobs --worker)', null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['-priority', 'name'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='board',
+            constraint=models.UniqueConstraint(fields=('platform', 'handle', 'url'), name='unique_board'),
+        ),
+    ]
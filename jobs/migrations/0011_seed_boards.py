@@ -0,0 +1,56 @@
+from django.db import migrations
+
+# The hard-coded COMPANIES lists from fetch_jobs and check_jobs at the time
+# boards moved into the database (fetch_jobs wins where both list a board).
+INITIAL_BOARDS = [
+    # fetch_jobs
+    {"name": "Intercom", "platform": "greenhouse", "handle": "intercom"},
+    {"name": "Figma", "platform": "greenhouse", "handle": "figma"},
+    {"name": "Spotify", "platform": "lever", "handle": "spotify"},
+    {"name": "Stripe", "platform": "greenhouse", "handle": "stripe"},
+    {"name": "Airbnb", "platform": "greenhouse", "handle": "airbnb"},
+    {"name": "DoorDash", "platform": "greenhouse", "handle": "doordash"},
+    {"name": "SpaceX", "platform": "greenhouse", "handle": "spacex"},
+    {"name": "Cloudflare", "platform": "greenhouse", "handle": "cloudflare"},
+    # check_jobs
+    {"name": "Help Scout", "platform": "greenhouse", "handle": "helpscout"},
+    {"name": "Zapier", "platform": "greenhouse", "handle": "zapier"},
+    {"name": "Drift", "platform": "greenhouse", "handle": "drift"},
+    {"name": "Chipper", "platform": "lever", "handle": "chipper"},
+    {"name": "Toggl", "platform": "lever", "handle": "toggl"},
+    {"name": "Gusto", "platform": "lever", "handle": "gusto"},
+    {"name": "Lattice", "platform": "lever", "handle": "lattice"},
+    {"name": "Notion", "platform": "lever", "handle": "notion"},
+    {"name": "Typeform", "platform": "workable", "handle": "typeform"},
+    {"name": "FrontApp", "platform": "workable", "handle": "frontapp"},
+    {"name": "Miro", "platform": "workable", "handle": "miro"},
+    {"name": "Doist", "platform": "workable", "handle": "doist"},
+]
+
+
+def seed_boards(apps, schema_editor):
+    Board = apps.get_model("jobs", "Board")
+    for board in INITIAL_BOARDS:
+        Board.objects.get_or_create(
+            platform=board["platform"],
+            handle=board["handle"],
+            url="",
+            defaults={"name": board["name"]},
+        )
+
+
+def unseed_boards(apps, schema_editor):
+    Board = apps.get_model("jobs", "Board")
+    for board in INITIAL_BOARDS:
+        Board.objects.filter(platform=board["platform"], handle=board["handle"], url="").delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0010_board'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_boards, unseed_boards),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.0.6 on 2026-10-18 23:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0011_seed_boards'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='boardstate',
+            name='breaker_open_until',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='boardstate',
+            name='breaker_state',
+            field=models.CharField(choices=[('closed', 'Closed'), ('open', 'Open'), ('half_open', 'Half-open')], default='closed', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='boardstate',
+            name='consecutive_failures',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='boardstate',
+            name='last_error',
+            field=models.TextField(blank=True, default=''),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.0.6 on 2026-10-19 00:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0012_boardstate_breaker'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='last_seen_run',
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['company', 'platform', 'is_active'], name='jobs_job_board_active_idx'),
+        ),
+    ]
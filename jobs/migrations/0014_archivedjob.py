@@ -0,0 +1,42 @@
+# Generated by Django 5.0.6 on 2026-10-19 00:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0013_job_last_seen_run'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('original_id', models.BigIntegerField()),
+                ('platform', models.CharField(max_length=100)),
+                ('external_job_id', models.CharField(max_length=255)),
+                ('title', models.CharField(max_length=500)),
+                ('location', models.CharField(blank=True, max_length=200, null=True)),
+                ('location_country', models.CharField(blank=True, max_length=100, null=True)),
+                ('description', models.TextField(blank=True, null=True)),
+                ('description_compressed', models.BinaryField(blank=True, null=True)),
+                ('structured_description', models.JSONField(blank=True, null=True)),
+                ('apply_url', models.URLField(blank=True, null=True)),
+                ('company_logo', models.URLField(blank=True, null=True)),
+                ('posted_at', models.DateTimeField(blank=True, null=True)),
+                ('last_seen_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_jobs', to='jobs.company')),
+            ],
+            options={
+                'ordering': ['-archived_at'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='archivedjob',
+            constraint=models.UniqueConstraint(fields=('platform', 'external_job_id'), name='unique_archived_platform_external_job'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.0.6 on 2026-10-19 00:24
+
+from django.db import migrations, models
+
+
+def create_counter(apps, schema_editor):
+    apps.get_model("jobs", "ChangeCounter").objects.get_or_create(pk=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0014_archivedjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('value', models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='change_seq',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['change_seq', 'id'], name='jobs_job_change_seq_idx'),
+        ),
+        migrations.RunPython(create_counter, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-19 00:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0015_job_change_seq'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='changecounter',
+            name='updated_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -1,3 +1,5 @@
+import zlib
+
 from django.db import models
 
 
@@ -56,6 +58,11 @@ class Job(models.Model):
     posted_at = models.DateTimeField(blank=True, null=True)
     fetched_at = models.DateTimeField(auto_now=True)
     is_active = models.BooleanField(default=True)
+    # Id of the last ingest pass over its board that saw this posting; rows a
+    # complete pass didn't stamp are gone from the board (see ingest.deactivate_missing)
+    last_seen_run = models.PositiveBigIntegerField(blank=True, null=True)
+    # Bumped whenever ingestion creates, changes or deactivates the row (see jobs.changes)
+    change_seq = models.PositiveBigIntegerField(default=0)
 
     # Raw API payload for debugging / enrichment
     raw = models.JSONField(blank=True, null=True)
@@ -73,6 +80,10 @@ class Job(models.Model):
                 name="unique_platform_external_job",
             )
         ]
+        indexes = [
+            models.Index(fields=["company", "platform", "is_active"], name="jobs_job_board_active_idx"),
+            models.Index(fields=["change_seq", "id"], name="jobs_job_change_seq_idx"),
+        ]
         ordering = ["-fetched_at"]
 
     def __str__(self):
@@ -86,14 +97,257 @@ class Job(models.Model):
         # Parse structured description if description exists and structured_description is empty
         if self.description and not self.structured_description:
             from .utils import parse_structured_description
+            from . import instrumentation
             try:
-                self.structured_description = parse_structured_description(self.description)
+                with instrumentation.stage("structured_parsing"):
+                    self.structured_description = parse_structured_description(self.description)
             except Exception:
                 pass  # If parsing fails, continue without structured description
         
         super().save(*args, **kwargs)
 
 
+class ChangeCounter(models.Model):
+    """The last change sequence number handed out (a single row; see jobs.changes)."""
+
+    value = models.PositiveBigIntegerField(default=0)
+    # When value was last bumped: the API's Last-Modified
+    updated_at = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return f"change sequence {self.value}"
+
+
+class ArchivedJob(models.Model):
+    """
+    A job moved out of ``Job`` after being inactive for a while (see jobs.archive).
+    Raw payloads are not kept; the description may be zlib-compressed.
+    """
+
+    # The id it had as a Job, given back if it is restored
+    original_id = models.BigIntegerField()
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name="archived_jobs")
+    platform = models.CharField(max_length=100)
+    external_job_id = models.CharField(max_length=255)
+
+    title = models.CharField(max_length=500)
+    location = models.CharField(max_length=200, blank=True, null=True)
+    location_country = models.CharField(max_length=100, blank=True, null=True)
+    description = models.TextField(blank=True, null=True)
+    description_compressed = models.BinaryField(blank=True, null=True)
+    structured_description = models.JSONField(blank=True, null=True)
+    apply_url = models.URLField(blank=True, null=True)
+    company_logo = models.URLField(blank=True, null=True)
+
+    posted_at = models.DateTimeField(blank=True, null=True)
+    # When its board last listed it
+    last_seen_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["platform", "external_job_id"],
+                name="unique_archived_platform_external_job",
+            )
+        ]
+        ordering = ["-archived_at"]
+
+    def __str__(self):
+        return f"{self.title} ({self.platform}, archived)"
+
+    @property
+    def full_description(self):
+        if self.description_compressed is not None:
+            return zlib.decompress(self.description_compressed).decode("utf-8")
+        return self.description
+
+
+class Board(models.Model):
+    """A job board to fetch: an ATS handle, or a feed/career-page URL."""
+
+    name = models.CharField(max_length=200, help_text="Company name the board's jobs are filed under")
+    platform = models.CharField(
+        max_length=100,
+        help_text="Fetcher to use (greenhouse, lever, ashby, workable, smartrecruiters, rss, career_page, jobs.ge)",
+    )
+    handle = models.CharField(max_length=255, blank=True, default="", help_text="ATS board handle / slug")
+    url = models.URLField(max_length=500, blank=True, default="", help_text="Feed or listing URL")
+    selector = models.CharField(
+        max_length=500,
+        blank=True,
+        default="",
+        help_text="CSS selector for job links (career_page boards)",
+    )
+    logo = models.URLField(blank=True, default="")
+
+    enabled = models.BooleanField(default=True)
+    priority = models.IntegerField(default=0, help_text="Boards with higher priority are fetched first")
+
+    # Per-board limits (empty = no limit / defaults)
+    max_postings = models.PositiveIntegerField(blank=True, null=True, help_text="Only keep the first N postings")
+    timeout_seconds = models.FloatField(blank=True, null=True, help_text="HTTP timeout for this board's requests")
+    min_interval_seconds = models.PositiveIntegerField(
+        blank=True,
+        null=True,
+        help_text="Never refresh more often than this (schedule_jobs / fetch_jobs --worker)",
+    )
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-priority", "name"]
+        constraints = [
+            models.UniqueConstraint(fields=["platform", "handle", "url"], name="unique_board"),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.platform}: {self.key})"
+
+    @property
+    def key(self):
+        """Board identifier used in fetch history and scheduling (handle, else URL)."""
+        return self.handle or self.url or self.name
+
+    def as_config(self):
+        """The board as the dict the ingestion code works with."""
+        return {
+            "name": self.name,
+            "platform": self.platform,
+            "handle": self.handle,
+            "url": self.url,
+            "selector": self.selector,
+            "logo": self.logo,
+            "priority": self.priority,
+            "max_postings": self.max_postings,
+            "timeout": self.timeout_seconds,
+            "min_interval": self.min_interval_seconds,
+        }
+
+
+class FetchRun(models.Model):
+    """One execution of an ingestion command (fetch_jobs, check_jobs, ...)."""
+
+    STATUS_RUNNING = "running"
+    STATUS_SUCCEEDED = "succeeded"
+    STATUS_PARTIAL = "partial"  # finished, but some boards failed
+    STATUS_FAILED = "failed"  # crashed before finishing
+    STATUS_CHOICES = [
+        (STATUS_RUNNING, "Running"),
+        (STATUS_SUCCEEDED, "Succeeded"),
+        (STATUS_PARTIAL, "Partial"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
+    command = models.CharField(max_length=100, default="fetch_jobs")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_RUNNING)
+    started_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+    duration_seconds = models.FloatField(blank=True, null=True)
+
+    boards_total = models.PositiveIntegerField(default=0)
+    boards_failed = models.PositiveIntegerField(default=0)
+    jobs_upserted = models.PositiveIntegerField(default=0)
+    jobs_deactivated = models.PositiveIntegerField(default=0)
+    bytes_downloaded = models.PositiveBigIntegerField(default=0)
+
+    # Totals/stage breakdown from jobs.instrumentation
+    summary = models.JSONField(blank=True, null=True)
+
+    class Meta:
+        ordering = ["-started_at"]
+
+    def __str__(self):
+        return f"{self.command} #{self.pk} ({self.status})"
+
+
+class BoardFetchResult(models.Model):
+    """Outcome of fetching a single board within a FetchRun."""
+
+    run = models.ForeignKey(FetchRun, on_delete=models.CASCADE, related_name="results")
+
+    company_name = models.CharField(max_length=200)
+    platform = models.CharField(max_length=100)
+    # Board identifier: ATS handle or feed/career-page URL
+    board = models.CharField(max_length=500)
+
+    started_at = models.DateTimeField()
+    latency_seconds = models.FloatField(help_text="Wall-clock time for the whole board")
+    fetch_seconds = models.FloatField(default=0, help_text="Time spent in HTTP requests")
+    payload_bytes = models.PositiveBigIntegerField(default=0)
+    http_requests = models.PositiveIntegerField(default=0)
+    http_status = models.PositiveSmallIntegerField(blank=True, null=True)
+
+    postings_count = models.PositiveIntegerField(default=0)
+    rows_upserted = models.PositiveIntegerField(default=0)
+    rows_deactivated = models.PositiveIntegerField(default=0)
+
+    succeeded = models.BooleanField(default=True)
+    error_class = models.CharField(max_length=200, blank=True, default="")
+    error_message = models.TextField(blank=True, default="")
+
+    stages = models.JSONField(blank=True, null=True)
+
+    class Meta:
+        ordering = ["-started_at"]
+        indexes = [
+            models.Index(fields=["platform", "board", "-started_at"], name="jobs_bfr_board_idx"),
+            models.Index(fields=["started_at"], name="jobs_bfr_started_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.company_name} ({self.platform}) @ {self.started_at:%Y-%m-%d %H:%M}"
+
+
+
+class BoardState(models.Model):
+    """Refresh schedule of one configured board, learned from how often it changes."""
+
+    platform = models.CharField(max_length=100)
+    # Board identifier: ATS handle or feed/career-page URL (same as BoardFetchResult.board)
+    board = models.CharField(max_length=500)
+    company_name = models.CharField(max_length=200)
+
+    next_due_at = models.DateTimeField(db_index=True)
+    interval_seconds = models.FloatField(help_text="Current refresh interval before jitter")
+    change_rate = models.FloatField(help_text="Estimated content changes per hour (EWMA)")
+    content_hash = models.CharField(max_length=64, blank=True, default="")
+
+    last_checked_at = models.DateTimeField(blank=True, null=True)
+    last_changed_at = models.DateTimeField(blank=True, null=True)
+    checks = models.PositiveIntegerField(default=0)
+    changes = models.PositiveIntegerField(default=0)
+
+    # Circuit breaker for failing boards (see jobs.breaker)
+    BREAKER_CLOSED = "closed"
+    BREAKER_OPEN = "open"
+    BREAKER_HALF_OPEN = "half_open"
+    BREAKER_CHOICES = [
+        (BREAKER_CLOSED, "Closed"),
+        (BREAKER_OPEN, "Open"),
+        (BREAKER_HALF_OPEN, "Half-open"),
+    ]
+    breaker_state = models.CharField(max_length=20, choices=BREAKER_CHOICES, default=BREAKER_CLOSED)
+    consecutive_failures = models.PositiveIntegerField(default=0)
+    breaker_open_until = models.DateTimeField(blank=True, null=True)
+    last_error = models.TextField(blank=True, default="")
+
+    # Lease held by the worker currently refreshing this board (see jobs.leases)
+    lease_owner = models.CharField(max_length=200, blank=True, default="")
+    lease_expires_at = models.DateTimeField(blank=True, null=True)
+    heartbeat_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ["next_due_at"]
+        constraints = [
+            models.UniqueConstraint(fields=["platform", "board"], name="unique_board_state"),
+        ]
+
+    def __str__(self):
+        return f"{self.company_name} ({self.platform}) due {self.next_due_at:%Y-%m-%d %H:%M}"
+
+
 
 # from django.db import models
 
@@ -0,0 +1,54 @@
+"""
+The normalized posting record every fetcher yields and ingestion consumes.
+
+``Posting`` uses ``__slots__``, so a board's worth of postings costs a fraction
+of the equivalent dicts and a misspelt field is an error rather than a silently
+missing key. Dicts from elsewhere (benchmark data, replays, the older
+``apply_link``/``posting_date``/``source`` schema) are converted in one place,
+``as_posting``.
+"""
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any
+
+
+@dataclass(slots=True)
+class Posting:
+    external_job_id: str = ""
+    title: str = ""
+    apply_url: str | None = None
+    company: str | None = None
+    location: str | None = None
+    description: str | None = None
+    posted_at: datetime | str | None = None
+    platform: str = ""
+    logo: str | None = None
+    raw: Any = field(default_factory=dict)
+
+    def __post_init__(self):
+        # Boards without ids are keyed on the posting's URL
+        if not self.external_job_id:
+            self.external_job_id = self.apply_url or ""
+
+    @classmethod
+    def from_dict(cls, data, platform=""):
+        apply_url = data.get("apply_url") or data.get("apply_link") or data.get("url")
+        return cls(
+            external_job_id=str(data.get("external_job_id") or data.get("id") or apply_url or ""),
+            title=data.get("title") or "",
+            apply_url=apply_url,
+            company=data.get("company"),
+            location=data.get("location"),
+            description=data.get("description"),
+            posted_at=data.get("posted_at") or data.get("posting_date"),
+            platform=data.get("platform") or data.get("source") or platform,
+            logo=data.get("logo"),
+            raw=data.get("raw") or {},
+        )
+
+
+def as_posting(item, platform=""):
+    """``item`` as a Posting, converting dicts."""
+    if isinstance(item, Posting):
+        return item
+    return Posting.from_dict(item, platform)
@@ -0,0 +1,235 @@
+"""
+Built-in profiling for ingestion commands (``--profile DIR``).
+
+Produces, in DIR:
+
+- ``profile.pstats``: cProfile stats for the whole run (``python -m pstats``,
+  snakeviz, ...), plus ``companies/<company>.pstats`` per company.
+- ``stacks.collapsed``: sampled stacks prefixed with ``company;stage`` in the
+  collapsed format understood by flamegraph.pl and speedscope.
+- ``summary.txt``: top functions by cumulative time and the share of samples
+  per company and stage.
+- ``memory.txt`` (with ``--profile-memory``): peak traced memory per company
+  and the top allocation growth from tracemalloc snapshots.
+"""
+import cProfile
+import io
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+
+
+def _slug(value):
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", value).strip("_") or "unnamed"
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    # Keep the parent directory and file name so flame graph labels stay readable
+    filename = "/".join(code.co_filename.replace(os.sep, "/").split("/")[-2:])
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+class StackSampler(threading.Thread):
+    """Samples registered threads every ``interval`` seconds."""
+
+    def __init__(self, profiler, interval):
+        super().__init__(name="profile-sampler", daemon=True)
+        self.profiler = profiler
+        self.interval = interval
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            self.profiler.sample()
+
+
+class RunProfiler:
+    def __init__(self, out_dir, memory=False, interval=0.005, max_depth=64):
+        self.out_dir = out_dir
+        self.memory = memory
+        self.interval = interval
+        self.max_depth = max_depth
+        self.stacks = Counter()
+        self.stage_samples = Counter()
+        self.company_stats = {}
+        self.memory_report = []
+        self._active = {}  # thread id -> (company name, CompanyMetrics or None)
+        self._lock = threading.Lock()
+        self._sampler = None
+        self._first_snapshot = None
+
+    # ---------------------------
+    # Lifecycle
+    # ---------------------------
+
+    def start(self):
+        os.makedirs(os.path.join(self.out_dir, "companies"), exist_ok=True)
+        if self.memory:
+            tracemalloc.start()
+            self._first_snapshot = tracemalloc.take_snapshot()
+        self._sampler = StackSampler(self, self.interval)
+        self._sampler.start()
+        return self
+
+    def stop(self):
+        if self._sampler is not None:
+            self._sampler.stopped.set()
+            self._sampler.join()
+            self._sampler = None
+        if self.memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self.write()
+
+    @contextmanager
+    def company(self, name, metrics=None):
+        """Profile everything the current thread does inside the block as ``name``."""
+        thread_id = threading.get_ident()
+        with self._lock:
+            self._active[thread_id] = (name, metrics)
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+            enabled = True
+        except ValueError:
+            # Another profiler is active (Python 3.12+ allows only one); rely on sampling
+            enabled = False
+        if self.memory:
+            tracemalloc.reset_peak()
+        try:
+            yield
+        finally:
+            if enabled:
+                profile.disable()
+            with self._lock:
+                self._active.pop(thread_id, None)
+                if enabled:
+                    profile.create_stats()
+                    self.company_stats[name] = profile
+            if self.memory:
+                self.record_memory(name)
+
+    # ---------------------------
+    # Sampling
+    # ---------------------------
+
+    def sample(self):
+        frames = sys._current_frames()
+        with self._lock:
+            active = list(self._active.items())
+        for thread_id, (name, metrics) in active:
+            frame = frames.get(thread_id)
+            if frame is None:
+                continue
+            stage = "other"
+            stack = metrics.stack_for(thread_id) if metrics is not None else None
+            if stack:
+                stage = stack[-1][0]
+            labels = []
+            while frame is not None and len(labels) < self.max_depth:
+                labels.append(_frame_label(frame))
+                frame = frame.f_back
+            labels.reverse()
+            key = ";".join([_slug(name), stage] + labels)
+            self.stacks[key] += 1
+            self.stage_samples[(name, stage)] += 1
+
+    # ---------------------------
+    # Memory
+    # ---------------------------
+
+    def record_memory(self, name):
+        # Only take the snapshot here; diffing is pure Python and slow on a large heap,
+        # so it is deferred to write() to keep it out of the next company's timings.
+        current, peak = tracemalloc.get_traced_memory()
+        self.memory_report.append((name, current, peak, tracemalloc.take_snapshot()))
+
+    def top_allocations(self, snapshot, previous, limit=10):
+        top = []
+        for stat in snapshot.compare_to(previous, "lineno"):
+            if stat.traceback[0].filename in (tracemalloc.__file__, cProfile.__file__, __file__):
+                continue
+            top.append(stat)
+            if len(top) == limit:
+                break
+        return top
+
+    # ---------------------------
+    # Output
+    # ---------------------------
+
+    def write(self):
+        combined = None
+        for name, profile in self.company_stats.items():
+            path = os.path.join(self.out_dir, "companies", f"{_slug(name)}.pstats")
+            profile.dump_stats(path)
+            if combined is None:
+                combined = pstats.Stats(profile)
+            else:
+                combined.add(profile)
+        if combined is not None:
+            combined.dump_stats(os.path.join(self.out_dir, "profile.pstats"))
+
+        with open(os.path.join(self.out_dir, "stacks.collapsed"), "w") as fh:
+            for stack, count in self.stacks.most_common():
+                fh.write(f"{stack} {count}\n")
+
+        with open(os.path.join(self.out_dir, "summary.txt"), "w") as fh:
+            fh.write(self.summary(combined))
+
+        if self.memory:
+            with open(os.path.join(self.out_dir, "memory.txt"), "w") as fh:
+                previous = self._first_snapshot
+                for name, current, peak, snapshot in self.memory_report:
+                    fh.write(f"== {name}: current {current / 1024:.1f} KiB, peak {peak / 1024:.1f} KiB\n")
+                    for stat in self.top_allocations(snapshot, previous):
+                        fh.write(f"   {stat}\n")
+                    fh.write("\n")
+                    previous = snapshot
+
+    def summary(self, combined):
+        out = io.StringIO()
+        total = sum(self.stage_samples.values())
+        out.write(f"Samples: {total} (every {self.interval * 1000:.1f}ms)\n\n")
+        out.write(f"{'company':40} {'stage':22} {'samples':>8} {'share':>7}\n")
+        for (name, stage), count in self.stage_samples.most_common():
+            share = count / total * 100 if total else 0
+            out.write(f"{name[:40]:40} {stage:22} {count:>8} {share:>6.1f}%\n")
+        if combined is not None:
+            out.write("\nTop functions by cumulative time:\n")
+            combined.stream = out
+            combined.sort_stats("cumulative").print_stats(40)
+        return out.getvalue()
+
+
+@contextmanager
+def maybe_profile(out_dir, memory=False):
+    """Yield a started RunProfiler, or None when ``out_dir`` is empty."""
+    if not out_dir:
+        yield None
+        return
+    profiler = RunProfiler(out_dir, memory=memory).start()
+    started = time.perf_counter()
+    try:
+        yield profiler
+    finally:
+        profiler.stop()
+        sys.stderr.write(
+            f"Profile written to {out_dir} ({time.perf_counter() - started:.1f}s profiled)\n"
+        )
+
+
+@contextmanager
+def company(profiler, name, metrics=None):
+    """``profiler.company(...)`` that tolerates ``profiler`` being None."""
+    if profiler is None:
+        yield
+        return
+    with profiler.company(name, metrics):
+        yield
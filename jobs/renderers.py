@@ -0,0 +1,39 @@
+"""
+orjson-backed JSON renderer for the API.
+
+It produces what DRF's ``JSONRenderer`` produces with this project's
+settings:
+- compact separators;
+- UTF-8 output rather than ``\\u`` escapes, except U+2028/U+2029, which
+  stay escaped;
+- datetimes as ISO 8601, with ``Z`` for UTC.
+
+It costs a fraction of the time. Because it encodes datetimes natively, the
+list endpoints can hand it plain ``.values()`` dicts (see
+``serializers.nested_job_rows``) instead of running serializer fields.
+
+Without orjson installed, when an indented response is asked for, or for
+data orjson can't encode (integers beyond 64 bits, non-string keys,
+Decimal), it falls back to ``JSONRenderer``.
+"""
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # optional: responses are then rendered by DRF's JSONRenderer
+    orjson = None
+
+
+class ORJSONRenderer(JSONRenderer):
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if orjson is None or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, option=orjson.OPT_UTC_Z)
+        except TypeError:  # orjson.JSONEncodeError
+            return super().render(data, accepted_media_type, renderer_context)
+        # Like JSONRenderer: escape the two characters JSON allows but JavaScript source doesn't
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
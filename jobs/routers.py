@@ -0,0 +1,78 @@
+"""
+Read/write routing between the primary database and an optional read replica.
+
+Ingestion (``fetch_jobs``, the scheduler) always reads and writes the primary.
+The public API opts in to the replica per request: views wrap their work in
+``reading_replica()`` (see ``ReplicaReadMixin`` in views.py), and for the
+duration of that block ``ReadReplicaRouter`` sends model reads to the
+``"replica"`` alias. Without a ``"replica"`` entry in ``DATABASES`` everything
+stays on the primary, and ``reading_primary()`` keeps a block there regardless
+(e.g. to render snapshots of just-ingested data).
+
+A replica can lag the primary, so a read that must see a just-ingested row
+uses ``Job.objects.using(PRIMARY)`` (``recently_written`` says when that is
+worth doing).
+"""
+import contextvars
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+
+PRIMARY = "default"
+REPLICA = "replica"
+
+_read_alias = contextvars.ContextVar("read_alias", default=None)
+
+
+def replica_configured():
+    return REPLICA in connections.settings
+
+
+@contextmanager
+def reading_replica():
+    """Route reads inside the block to the replica, if one is configured (and not inside ``reading_primary``)."""
+    token = _read_alias.set(_read_alias.get() or (REPLICA if replica_configured() else None))
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+@contextmanager
+def reading_primary():
+    """Keep reads inside the block on the primary, even in views that read from the replica."""
+    token = _read_alias.set(PRIMARY)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+def recently_written(timestamp):
+    """
+    Whether a row written at ``timestamp`` may not have reached the replica yet
+    (within ``REPLICA_LAG_SECONDS``).
+    """
+    if timestamp is None:
+        return False
+    lag = timedelta(seconds=getattr(settings, "REPLICA_LAG_SECONDS", 5))
+    return timestamp >= timezone.now() - lag
+
+
+class ReadReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica gets its schema from the primary
+        return db == PRIMARY
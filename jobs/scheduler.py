@@ -0,0 +1,219 @@
+"""
+Adaptive per-board refresh scheduling.
+
+Every configured board gets a ``BoardState`` row with the time it is next due.
+After each check the board's content hash is compared with the previous one
+and an exponentially weighted estimate of its change rate (changes per hour)
+is updated. The refresh interval is chosen so that roughly
+``TARGET_CHANGES_PER_CHECK`` changes happen between two checks: busy boards
+converge towards ``MIN_INTERVAL``, boards that never change drift towards
+``MAX_INTERVAL``. Due times are jittered so boards don't line up and burst.
+
+Only worker mode (``fetch_jobs --worker``) follows and feeds the schedule. A
+plain ``fetch_jobs`` run fetches every enabled board regardless of when it is
+due and doesn't compute content digests, so it leaves the schedule alone; it
+only updates the circuit breaker.
+"""
+import hashlib
+import json
+import logging
+import random
+from datetime import timedelta
+
+from django.utils import timezone
+
+from . import breaker, ingest
+from .history import board_identifier
+from .models import BoardState
+
+logger = logging.getLogger(__name__)
+
+MIN_INTERVAL = 15 * 60
+MAX_INTERVAL = 24 * 60 * 60
+DEFAULT_INTERVAL = 60 * 60
+TARGET_CHANGES_PER_CHECK = 0.5
+# Weight of the newest observation in the change-rate estimate
+RATE_ALPHA = 0.3
+# Due times are spread by +/- this fraction of the interval
+JITTER = 0.15
+
+
+def board_key(comp):
+    return comp.get("platform") or "", board_identifier(comp) or ""
+
+
+def jittered(seconds, jitter=JITTER):
+    return seconds * random.uniform(1 - jitter, 1 + jitter)
+
+
+class ContentDigest:
+    """
+    Order-independent digest of the fields of a board's postings that we
+    store, fed one posting at a time as the board streams in: the sum of the
+    postings' own SHA-256 digests, modulo 2**256.
+    """
+
+    def __init__(self):
+        self._sum = 0
+
+    def add(self, posting):
+        item = json.dumps([
+            posting.external_job_id,
+            posting.title,
+            posting.location,
+            posting.apply_url,
+            posting.description,
+            str(posting.posted_at or ""),
+        ], default=str)
+        digest = hashlib.sha256(item.encode("utf-8")).digest()
+        self._sum = (self._sum + int.from_bytes(digest, "big")) % 2 ** 256
+
+    def hexdigest(self):
+        return f"{self._sum:064x}"
+
+
+# ---------------------------
+# State
+# ---------------------------
+
+def sync_boards(companies, now=None, spread=True):
+    """
+    Create a BoardState for every configured board that doesn't have one yet.
+    With ``spread`` new boards are spread over the first default interval
+    instead of all being due now.
+    """
+    now = now or timezone.now()
+    existing = set(BoardState.objects.values_list("platform", "board"))
+    new_states = []
+    for comp in companies:
+        key = board_key(comp)
+        if key in existing:
+            continue
+        existing.add(key)
+        new_states.append(BoardState(
+            platform=key[0],
+            board=key[1],
+            company_name=comp.get("name") or "",
+            next_due_at=now + timedelta(seconds=random.uniform(0, JITTER * DEFAULT_INTERVAL) if spread else 0),
+            interval_seconds=DEFAULT_INTERVAL,
+            change_rate=rate_for_interval(DEFAULT_INTERVAL),
+        ))
+    # Several workers may sync at the same time; whoever inserts first wins
+    BoardState.objects.bulk_create(new_states, ignore_conflicts=True)
+    return len(new_states)
+
+
+def states_for(configured, now=None):
+    """BoardState of every configured board by board key, creating missing ones as due now."""
+    sync_boards(configured, now=now, spread=False)
+    keys = {board_key(comp) for comp in configured}
+    return {
+        (state.platform, state.board): state
+        for state in BoardState.objects.filter(board__in={k[1] for k in keys})
+        if (state.platform, state.board) in keys
+    }
+
+
+def seconds_until_next(companies, now=None):
+    """Seconds until the next configured board is due (0 if one is overdue, None if none)."""
+    now = now or timezone.now()
+    keys = {board_key(comp) for comp in companies}
+    for state in BoardState.objects.order_by("next_due_at").only("platform", "board", "next_due_at"):
+        if (state.platform, state.board) in keys:
+            return max(0.0, (state.next_due_at - now).total_seconds())
+    return None
+
+
+# ---------------------------
+# Learning
+# ---------------------------
+
+def rate_for_interval(seconds):
+    return TARGET_CHANGES_PER_CHECK / (seconds / 3600.0)
+
+
+def interval_for_rate(rate, min_interval=MIN_INTERVAL, max_interval=MAX_INTERVAL):
+    if rate <= 0:
+        return max_interval
+    seconds = TARGET_CHANGES_PER_CHECK / rate * 3600.0
+    return min(max_interval, max(min_interval, seconds))
+
+
+def record_check(state, digest, failed=False, now=None,
+                 min_interval=MIN_INTERVAL, max_interval=MAX_INTERVAL, jitter=JITTER):
+    """
+    Update a board's schedule after a check and save it. Returns True when the
+    content changed (always True for the first successful check).
+
+    A failed check tells us nothing about the change rate: the interval is kept
+    and the board is retried when it would have been due anyway.
+    """
+    now = now or timezone.now()
+    changed = False
+    if not failed:
+        changed = digest != state.content_hash
+        if state.content_hash and state.last_checked_at:
+            # The first hash is only a baseline; after that every check is a sample
+            hours = max((now - state.last_checked_at).total_seconds() / 3600.0, 1e-6)
+            sample = (1.0 if changed else 0.0) / hours
+            state.change_rate = RATE_ALPHA * sample + (1 - RATE_ALPHA) * state.change_rate
+            state.interval_seconds = interval_for_rate(state.change_rate, min_interval, max_interval)
+            if changed:
+                state.changes += 1
+        if changed:
+            state.content_hash = digest
+            state.last_changed_at = now
+        state.last_checked_at = now
+        state.checks += 1
+
+    state.next_due_at = now + timedelta(seconds=jittered(state.interval_seconds, jitter))
+    if state.breaker_state == BoardState.BREAKER_OPEN and state.breaker_open_until:
+        # Don't come back before the circuit breaker lets us probe again
+        state.next_due_at = max(state.next_due_at, state.breaker_open_until)
+    # Leave the lease columns alone, they belong to jobs.leases
+    state.save(update_fields=[
+        "next_due_at", "interval_seconds", "change_rate", "content_hash",
+        "last_checked_at", "last_changed_at", "checks", "changes",
+    ])
+    return changed
+
+
+def refresh_board(comp, state, company_metrics, min_interval=MIN_INTERVAL,
+                  max_interval=MAX_INTERVAL, jitter=JITTER, companies=None):
+    """
+    Fetch a due board, streaming its postings into ``ingest_company`` while
+    their digest is computed, and reschedule it by whether its content
+    changed (the return value). The board is never held in memory whole, so
+    unchanged boards are upserted too; their rows keep their change_seq.
+    ``company_metrics`` is the CompanyMetrics the fetch is tracked under and
+    ``companies`` the caller's CompanyResolver, if it has one.
+    """
+    # A board's own minimum interval wins over the scheduler-wide one
+    min_interval = max(min_interval, comp.get("min_interval") or 0)
+    max_interval = max(max_interval, min_interval)
+    if not breaker.allow(state):
+        state.next_due_at = state.breaker_open_until
+        state.save(update_fields=["next_due_at"])
+        return False
+    postings = ingest.fetch_postings(comp)
+    digest = ContentDigest()
+    if postings is not None:
+        postings.tap = digest.add
+        ingest.ingest_company(comp, jobs_data=postings, companies=companies)
+    failed = postings is None or bool(company_metrics.errors)
+    breaker.record(state, failed, breaker.error_summary(company_metrics))
+    changed = record_check(
+        state,
+        digest.hexdigest(),
+        failed=failed,
+        min_interval=min_interval,
+        max_interval=max_interval,
+        jitter=jitter,
+    )
+    logger.info(
+        "%s (%s): %s, next check in %.0f min",
+        comp.get("name"), comp.get("platform"),
+        "failed" if failed else ("changed" if changed else "unchanged"),
+        state.interval_seconds / 60,
+    )
+    return changed
@@ -39,6 +39,77 @@ class NestedJobSerializer(serializers.ModelSerializer):
         return get_logo_url(obj.company.name)
 
 
+class JobChangeSerializer(NestedJobSerializer):
+    """A job in the /api/changes feed, with its change sequence number"""
+
+    class Meta(NestedJobSerializer.Meta):
+        fields = NestedJobSerializer.Meta.fields + ['change_seq']
+
+
+# NestedJobSerializer's fields as .values() lookups, for the list endpoints' fast path
+NESTED_JOB_VALUES = [
+    'id', 'title', 'company__name', 'company__logo', 'location', 'description', 'apply_url', 'platform',
+    'external_job_id', 'posted_at', 'fetched_at', 'is_active', 'raw',
+]
+
+
+def nested_job_rows(rows):
+    """
+    What NestedJobSerializer(jobs, many=True).data holds, built straight from
+    NESTED_JOB_VALUES rows: no model instances or per-field serializer calls.
+
+    posted_at/fetched_at stay datetimes for the renderer to encode, which both
+    ORJSONRenderer and DRF's JSONRenderer do exactly like DateTimeField does
+    with TIME_ZONE = 'UTC' (ISO 8601, "Z").
+    """
+    from jobs.fetchers import get_logo_url
+
+    results = []
+    for row in rows:
+        name = row['company__name']
+        logo = row['company__logo']
+        results.append({
+            'id': row['id'],
+            'title': row['title'],
+            'company_name': name,
+            'company_logo': logo if logo and 'img.logo.dev/name/' in logo else get_logo_url(name),
+            'location': row['location'],
+            'description': row['description'],
+            'apply_url': row['apply_url'],
+            'platform': row['platform'],
+            'external_job_id': row['external_job_id'],
+            'posted_at': row['posted_at'],
+            'fetched_at': row['fetched_at'],
+            'is_active': row['is_active'],
+            'raw': row['raw'],
+        })
+    return results
+
+
+def company_jobs_rows(companies, job_rows):
+    """
+    What CompanyJobsSerializer(companies, many=True).data holds, from
+    ('id', 'name', 'domain', 'logo', 'platform') company rows and the
+    NESTED_JOB_VALUES + 'company_id' rows of their active jobs, in order.
+    """
+    from jobs.fetchers import get_logo_url
+
+    jobs_by_company = {}
+    for row in job_rows:
+        jobs_by_company.setdefault(row['company_id'], []).append(row)
+    return [
+        {
+            'id': company['id'],
+            'name': company['name'],
+            'domain': company['domain'] if company['domain'] is not None else '',
+            'logo': company['logo'] if company['logo'] and 'img.logo.dev/name/' in company['logo'] else get_logo_url(company['name']),
+            'platform': company['platform'],
+            'jobs': nested_job_rows(jobs_by_company.get(company['id'], ())),
+        }
+        for company in companies
+    ]
+
+
 class CompanyJobsSerializer(serializers.ModelSerializer):
     """Serializer for companies with nested jobs"""
     jobs = serializers.SerializerMethodField()
@@ -74,8 +145,8 @@ class CompanyJobsSerializer(serializers.ModelSerializer):
 
 
 def job_to_dict(job):
-    # job may be Job model instance or dict (from fetcher)
-    if hasattr(job, "title"):
+    # job may be Job model instance or a fetched posting (Posting record or dict)
+    if hasattr(job, "pk"):
         return {
             "id": job.id,
             "title": job.title,
@@ -91,16 +162,17 @@ def job_to_dict(job):
             "raw": job.raw,
         }
     else:
-        # assume dict from fetcher
+        from jobs.postings import as_posting
+        posting = as_posting(job)
         return {
-            "title": job.get("title"),
-            "company": job.get("company"),
-            "location": job.get("location"),
-            "description": job.get("description"),
-            "apply_url": job.get("apply_url"),
-            "platform": job.get("platform"),
-            "external_job_id": job.get("external_job_id"),
-            "posted_at": job.get("posted_at"),
-            "is_active": job.get("is_active", True),
-            "raw": job.get("raw"),
-        }
\ No newline at end of file
+            "title": posting.title,
+            "company": posting.company,
+            "location": posting.location,
+            "description": posting.description,
+            "apply_url": posting.apply_url,
+            "platform": posting.platform,
+            "external_job_id": posting.external_job_id,
+            "posted_at": posting.posted_at,
+            "is_active": True,
+            "raw": posting.raw,
+        }
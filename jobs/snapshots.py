@@ -0,0 +1,255 @@
+"""
+Prerendered snapshots of the hottest listing responses.
+
+Most API traffic is the unfiltered first pages of ``/api/search`` and the
+company directory at ``/api/``, and between ingestion runs their responses
+don't change. With ``SNAPSHOT_MODE`` on, ingestion renders them once after
+each run (``refresh``), through the views themselves so the JSON is
+byte-for-byte what they would return, and writes them as static files:
+
+    MEDIA_ROOT/snapshots/<version>/directory.json       (+ .json.gz, .json.br)
+    MEDIA_ROOT/snapshots/<version>/search-page-<n>.json (+ .json.gz, .json.br)
+    MEDIA_ROOT/snapshots/current.json                   the manifest
+
+The version is the change sequence (``changes.current_seq``), so an
+unchanged dataset isn't rebuilt and every URL can be cached forever. A new
+version is written next to the old ones and published by replacing the
+manifest, and the last ``KEEP_VERSIONS`` stay around for clients and caches
+still reading them. The ``.br`` variants need the optional ``brotli`` package.
+
+The views answer matching requests from the snapshot, as long as it is the
+current version, before running any query but the version check:
+``SNAPSHOT_MODE = "redirect"`` sends clients to the file's ``MEDIA_URL`` (for
+a CDN or the web server to serve, pre-compressed), ``"serve"`` streams the
+file from Django, brotli or gzip-compressed if the client accepts it.
+"""
+import contextvars
+import gzip
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.http import FileResponse, HttpRequest, HttpResponseRedirect, QueryDict
+from django.utils import timezone
+
+from . import changes, routers
+
+try:
+    import brotli
+except ImportError:  # optional: snapshots are then only pre-compressed with gzip
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+MODES = ("off", "redirect", "serve")
+KEEP_VERSIONS = 3
+# Staging directories of builds that died midway are removed after this long
+STALE_STAGING_SECONDS = 60 * 60
+DIRECTORY = "directory"
+MANIFEST = "current.json"
+# Pre-compressed variants serve mode picks from, in order of preference
+_PRECOMPRESSED = (("br", ".br"), ("gzip", ".gz"))
+
+# Last manifest read by this process: (mtime, manifest)
+_manifest_cache = (None, None)
+# Set while build() renders the views, so they don't answer from the old snapshot
+_building = contextvars.ContextVar("snapshots_building", default=False)
+
+
+def mode():
+    value = getattr(settings, "SNAPSHOT_MODE", "off")
+    return value if value in MODES else "off"
+
+
+def root():
+    return Path(settings.MEDIA_ROOT) / "snapshots"
+
+
+def search_page(page):
+    return f"search-page-{page}"
+
+
+def _render(view_class, query=""):
+    """The body ``view_class`` returns for a GET with ``query``, or None unless it is a 200."""
+    request = HttpRequest()
+    request.method = "GET"
+    request.GET = QueryDict(query)
+    request.META["SERVER_NAME"] = "snapshots"
+    request.META["SERVER_PORT"] = "80"
+    response = view_class.as_view()(request)
+    response.render()
+    return response.content if response.status_code == 200 else None
+
+
+def _write(directory, name, body):
+    (directory / f"{name}.json").write_bytes(body)
+    (directory / f"{name}.json.gz").write_bytes(gzip.compress(body, compresslevel=9, mtime=0))
+    if brotli is not None:
+        (directory / f"{name}.json.br").write_bytes(brotli.compress(body))
+
+
+def build(force=False):
+    """
+    Render and publish the snapshots for the current data version. Returns
+    the new manifest, or None when the published one is already current.
+    """
+    from .views import JobsGroupedByCompany, JobSearchView
+
+    version = changes.current_seq()
+    current = read_manifest()
+    if not force and current is not None and current["version"] == version:
+        return None
+
+    base = root()
+    base.mkdir(parents=True, exist_ok=True)
+    directory = base / str(version)
+    # Several workers may finish a run at once: each builds in a directory of its own
+    staging = Path(tempfile.mkdtemp(prefix=f"{version}.", suffix=".tmp", dir=base))
+    os.chmod(staging, 0o755)  # mkdtemp's 0700 would keep the web server out in redirect mode
+    names = []
+    token = _building.set(True)
+    try:
+        # Straight after ingestion the replica may be behind: render from the primary
+        with routers.reading_primary():
+            body = _render(JobsGroupedByCompany)
+            if body is not None:
+                _write(staging, DIRECTORY, body)
+                names.append(DIRECTORY)
+            pages = getattr(settings, "SNAPSHOT_SEARCH_PAGES", 5)
+            for page in range(1, pages + 1):
+                body = _render(JobSearchView, f"page={page}")
+                if body is None:
+                    break
+                _write(staging, search_page(page), body)
+                names.append(search_page(page))
+                if not json.loads(body)["pagination"]["has_next"]:
+                    break
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    finally:
+        _building.reset(token)
+    _publish(staging, directory, replace=force)
+
+    manifest = {"version": version, "built_at": timezone.now().isoformat(), "names": names}
+    current = read_manifest()
+    if current is not None and current["version"] > version:
+        # A concurrent build of newer data got there first
+        return None
+    fd, tmp_path = tempfile.mkstemp(prefix=f"{MANIFEST}.", suffix=".tmp", dir=base)
+    with os.fdopen(fd, "w") as fh:
+        fh.write(json.dumps(manifest))
+    os.chmod(tmp_path, 0o644)
+    os.replace(tmp_path, base / MANIFEST)
+    prune(keep=KEEP_VERSIONS)
+    logger.info("Published snapshot version %s (%d responses)", version, len(names))
+    return manifest
+
+
+def _publish(staging, directory, replace=False):
+    """
+    Rename a finished staging directory into place. If another build already
+    published this version, its files are as good as ours and ours are dropped,
+    unless ``replace``: then the old directory is moved aside first.
+    """
+    if replace and directory.exists():
+        retired = Path(tempfile.mkdtemp(prefix=f"{directory.name}.", suffix=".tmp", dir=directory.parent))
+        try:
+            os.rename(directory, retired / directory.name)
+        except OSError:
+            pass  # someone else moved it already
+        shutil.rmtree(retired, ignore_errors=True)
+    try:
+        os.rename(staging, directory)
+    except OSError:
+        if not directory.is_dir():
+            raise
+        shutil.rmtree(staging, ignore_errors=True)
+
+
+def prune(keep=KEEP_VERSIONS):
+    """Remove all but the newest ``keep`` snapshot versions, and staging left by dead builds."""
+    versions = []
+    stale = time.time() - STALE_STAGING_SECONDS
+    for path in root().iterdir():
+        if path.is_dir() and path.name.isdigit():
+            versions.append((int(path.name), path))
+        elif path.name.endswith(".tmp"):
+            try:
+                if path.stat().st_mtime >= stale:
+                    continue
+                if path.is_dir():
+                    shutil.rmtree(path, ignore_errors=True)
+                else:
+                    path.unlink()
+            except OSError:
+                pass  # cleaned up by someone else meanwhile
+    for _, path in sorted(versions)[:-keep]:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def refresh():
+    """Rebuild the snapshots after an ingestion run, if enabled and the data changed. Never raises."""
+    if mode() == "off":
+        return None
+    try:
+        return build()
+    except Exception:
+        logger.exception("Building snapshots failed")
+        return None
+
+
+def read_manifest():
+    """The published manifest (re-read only when the file changes), or None."""
+    global _manifest_cache
+    path = root() / MANIFEST
+    try:
+        mtime = path.stat().st_mtime_ns
+    except OSError:
+        return None
+    if _manifest_cache[0] != mtime:
+        try:
+            _manifest_cache = (mtime, json.loads(path.read_text()))
+        except (OSError, ValueError):
+            return None
+    return _manifest_cache[1]
+
+
+def response(name, request):
+    """A response for snapshot ``name`` if snapshots are served and it exists, else None."""
+    if mode() == "off" or _building.get():
+        return None
+    manifest = read_manifest()
+    if manifest is None or name not in manifest["names"]:
+        return None
+    version = manifest["version"]
+    # Ingested since the last build (or the build failed): answer live until it is rebuilt
+    if version != changes.current_seq():
+        return None
+    if mode() == "redirect":
+        return HttpResponseRedirect(f"{settings.MEDIA_URL}snapshots/{version}/{name}.json")
+
+    path = root() / str(version) / f"{name}.json"
+    accept_encoding = request.META.get("HTTP_ACCEPT_ENCODING", "")
+    candidates = [
+        (encoding, f"{path}{suffix}")
+        for encoding, suffix in _PRECOMPRESSED
+        if re.search(rf"\b{encoding}\b", accept_encoding)
+    ]
+    candidates.append((None, path))
+    for encoding, candidate in candidates:
+        try:
+            served = FileResponse(open(candidate, "rb"), content_type="application/json")
+        except OSError:
+            continue  # e.g. no .br: brotli wasn't installed when it was built
+        if encoding:
+            served["Content-Encoding"] = encoding
+        served["Vary"] = "Accept-Encoding"
+        return served
+    return None
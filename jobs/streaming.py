@@ -0,0 +1,104 @@
+"""
+Incremental JSON parsing for board responses.
+
+``iter_json_array`` yields the elements of one array inside a JSON document as
+the response bytes arrive, so a board with thousands of postings never has its
+whole body (or the decoded list) in memory at once, only the element being
+decoded. The array is found by a path of object keys, e.g. ``("jobs",)`` for
+Greenhouse or ``()`` when the document itself is the array; anything else met
+on the way is decoded one value at a time and dropped. A path step may be a
+tuple of alternative keys.
+"""
+import codecs
+import json
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+
+
+class _Reader:
+    """Text buffer over a stream of byte chunks, refilled as values need more of it."""
+
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.decode = codecs.getincrementaldecoder("utf-8")().decode
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self):
+        """Append the next chunk, dropping what has been consumed. False at end of input."""
+        if self.eof:
+            return False
+        for chunk in self.chunks:
+            text = self.decode(chunk)
+            if text:
+                self.buf = self.buf[self.pos:] + text
+                self.pos = 0
+                return True
+        self.buf = self.buf[self.pos:] + self.decode(b"", final=True)
+        self.pos = 0
+        self.eof = True
+        return False
+
+    def peek(self):
+        """Next non-whitespace character ('' at end of input), without consuming it."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.fill():
+                return ""
+
+    def expect(self, char):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r} in JSON response, found {found or 'end of input'!r}")
+        self.pos += 1
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                # Most likely the value continues in the next chunk
+                if self.fill():
+                    continue
+                raise
+            # A number at the very end of the buffer may be cut short ("12" of "123")
+            if end == len(self.buf) and self.fill():
+                continue
+            self.pos = end
+            return value
+
+
+def iter_json_array(chunks, path=()):
+    """Yield the elements of the array at ``path`` in the JSON document read from ``chunks``."""
+    reader = _Reader(chunks)
+    for step in path:
+        keys = (step,) if isinstance(step, str) else tuple(step)
+        reader.expect("{")
+        while True:
+            if reader.peek() == "}":
+                raise ValueError(f"No {' / '.join(keys)!r} in JSON response")
+            key = reader.value()
+            reader.expect(":")
+            if key in keys:
+                break
+            reader.value()
+            if reader.peek() == ",":
+                reader.pos += 1
+
+    if reader.peek() == "n":
+        raise ValueError(f"{'/'.join(map(str, path)) or 'Response'} is null")
+    reader.expect("[")
+    if reader.peek() == "]":
+        return
+    while True:
+        yield reader.value()
+        separator = reader.peek()
+        if separator == "]":
+            return
+        reader.expect(",")
@@ -0,0 +1,263 @@
+"""
+Local stand-in for the ATS endpoints the fetchers talk to.
+
+Serves synthetic (deterministic per board) or recorded payloads with
+configurable latency, error rate and payload size, so the whole
+fetch -> parse -> upsert pipeline can be load-tested without a network.
+
+Requests arrive through ``jobs.transport.RedirectTransport``, so the first path
+segment is the original host: ``/boards-api.greenhouse.io/v1/boards/<handle>/jobs``.
+"""
+import json
+import random
+import re
+import sys
+import threading
+import time
+import zlib
+from datetime import datetime, timezone as dt_timezone
+from email.utils import format_datetime
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from .benchmarks import datagen
+from .transport import cassette_key, decode_body, load_cassette
+
+FILLER = (
+    "<p>Our team values ownership, clear writing and steady delivery. We work in small groups, "
+    "review each other's work and share on-call duties fairly across the team.</p>"
+)
+
+
+class StubConfig:
+    def __init__(self, postings=50, latency_ms=0, jitter_ms=0, error_rate=0.0,
+                 description_kb=0, seed=42, fail_boards=(), cassette=None):
+        self.postings = postings
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.description_kb = description_kb
+        self.seed = seed
+        self.fail_boards = set(fail_boards)
+        self.cassette = load_cassette(cassette) if cassette else {}
+        self.requests = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+        # Anchor synthetic dates so payloads stay identical for the server's lifetime
+        self.now = datetime.now(dt_timezone.utc).replace(microsecond=0)
+
+
+# ---------------------------
+# Synthetic payloads
+# ---------------------------
+
+def board_postings(config, platform, handle):
+    """Deterministic list of posting dicts for one board."""
+    rng = random.Random(f"{config.seed}:{platform}:{handle}")
+    name = handle.replace("-", " ").title()
+    postings = []
+    for i in range(config.postings):
+        posting = datagen.posting_dict(rng, name, platform, i, config.now)
+        if config.description_kb:
+            repeat = max(1, (config.description_kb * 1024) // len(FILLER))
+            posting["description"] += FILLER * repeat
+        posting["id"] = zlib.crc32(f"{platform}:{handle}:{i}".encode())
+        postings.append(posting)
+    return postings
+
+
+def greenhouse_payload(config, handle):
+    jobs = [{
+        "id": p["id"],
+        "title": p["title"],
+        "absolute_url": f"https://boards.greenhouse.io/{handle}/jobs/{p['id']}",
+        "content": p["description"],
+        "updated_at": p["posted_at"].isoformat(),
+        "location": {"name": p["location"]},
+        "departments": [{"name": "Engineering"}],
+    } for p in board_postings(config, "greenhouse", handle)]
+    return {"jobs": jobs, "meta": {"total": len(jobs)}}
+
+
+def lever_payload(config, handle):
+    return [{
+        "id": f"{p['id']:08x}-0000-4000-8000-{p['id']:012x}",
+        "text": p["title"],
+        "hostedUrl": f"https://jobs.lever.co/{handle}/{p['id']}",
+        "applyUrl": f"https://jobs.lever.co/{handle}/{p['id']}/apply",
+        "description": p["description"],
+        "categories": {"location": p["location"], "team": "Engineering", "commitment": "Full-time"},
+        "createdAt": int(p["posted_at"].timestamp() * 1000),
+    } for p in board_postings(config, "lever", handle)]
+
+
+def ashby_payload(config, handle):
+    postings = [{
+        "id": f"{p['id']:08x}-ashby",
+        "title": p["title"],
+        "locationName": p["location"],
+        "postedAt": p["posted_at"].isoformat(),
+        "externalLink": f"https://jobs.ashbyhq.com/{handle}/{p['id']}",
+        "descriptionHtml": p["description"],
+    } for p in board_postings(config, "ashby", handle)]
+    return {"data": {"jobBoardWithTeams": {"jobPostings": postings}}}
+
+
+def smartrecruiters_payload(config, handle):
+    return {"content": [{
+        "id": str(p["id"]),
+        "name": p["title"],
+        "location": {"city": p["location"]},
+        "releasedDate": p["posted_at"].isoformat(),
+        "applyUrl": f"https://jobs.smartrecruiters.com/{handle}/{p['id']}",
+    } for p in board_postings(config, "smartrecruiters", handle)]}
+
+
+def workable_rss(config, slug):
+    items = "".join(
+        "<item>"
+        f"<title>{escape(p['title'])}</title>"
+        f"<link>https://apply.workable.com/{slug}/j/{p['id']:X}/</link>"
+        f"<description>{escape(p['description'])}</description>"
+        f"<pubDate>{format_datetime(p['posted_at'])}</pubDate>"
+        "</item>"
+        for p in board_postings(config, "workable", slug)
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel>'
+        f"<title>{escape(slug)} jobs</title>{items}</channel></rss>"
+    )
+
+
+def listing_html(config, host, path):
+    """Career page / jobs.ge style listing with one card per posting."""
+    cards = "".join(
+        '<div class="job-item">'
+        f'<div class="job-title"><a href="/jobs/{p["id"]}">{escape(p["title"])}</a></div>'
+        f'<div class="company-name">{escape(p["company"])}</div>'
+        "</div>"
+        for p in board_postings(config, "career_page", f"{host}{path}")
+    )
+    return f"<html><body>{cards}</body></html>"
+
+
+ROUTES = [
+    ("GET", re.compile(r"^/boards-api\.greenhouse\.io/v1/boards/(?P<handle>[^/]+)/jobs$"), "json", greenhouse_payload),
+    ("GET", re.compile(r"^/api\.lever\.co/v0/postings/(?P<handle>[^/]+)$"), "json", lever_payload),
+    ("GET", re.compile(r"^/api\.smartrecruiters\.com/v1/companies/(?P<handle>[^/]+)/(?:jobs|postings)$"), "json", smartrecruiters_payload),
+    ("GET", re.compile(r"^/(?P<handle>[^/.]+)\.workable\.com/jobs\.rss$"), "rss", workable_rss),
+]
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    server_version = "BreneoATSStub/1.0"
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def config(self):
+        return self.server.config
+
+    def log_message(self, format, *args):
+        if getattr(self.server, "verbose", False):
+            super().log_message(format, *args)
+
+    def do_GET(self):
+        self.handle_stub("GET", b"")
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        self.handle_stub("POST", self.rfile.read(length) if length else b"")
+
+    def handle_stub(self, method, body):
+        config = self.config
+        with config._lock:
+            config.requests += 1
+
+        delay = config.latency_ms + (random.uniform(-1, 1) * config.jitter_ms if config.jitter_ms else 0)
+        if delay > 0:
+            time.sleep(delay / 1000.0)
+
+        parts = urlsplit(self.path)
+        path = parts.path
+        host, _, rest = path.lstrip("/").partition("/")
+
+        if config.error_rate and random.random() < config.error_rate:
+            with config._lock:
+                config.errors += 1
+            return self.send_body(random.choice([500, 502, 503, 429]), "text/plain", b"stub: injected error")
+
+        # Recorded responses take precedence over synthetic ones
+        if config.cassette:
+            original = f"https://{host}/{rest}" + (f"?{parts.query}" if parts.query else "")
+            entry = config.cassette.get(cassette_key(method, original, body))
+            if entry is not None:
+                content_type = entry["headers"].get("content-type", "application/octet-stream")
+                return self.send_body(entry["status"], content_type, decode_body(entry))
+
+        if rest == "robots.txt":
+            return self.send_body(404, "text/plain", b"")
+
+        if method == "POST" and host == "jobs.ashbyhq.com":
+            try:
+                handle = json.loads(body or b"{}")["variables"]["organizationHostedJobsPageName"]
+            except (ValueError, KeyError, TypeError):
+                return self.send_body(400, "application/json", b'{"errors": ["bad request"]}')
+            if handle in config.fail_boards:
+                return self.send_body(404, "application/json", b'{"errors": ["not found"]}')
+            return self.send_json(ashby_payload(config, handle))
+
+        for route_method, pattern, kind, builder in ROUTES:
+            if method != route_method:
+                continue
+            match = pattern.match(path)
+            if not match:
+                continue
+            handle = match.group("handle")
+            if handle in config.fail_boards:
+                return self.send_body(404, "text/plain", b"stub: board not found")
+            if kind == "rss":
+                return self.send_body(200, "application/rss+xml", builder(config, handle).encode("utf-8"))
+            return self.send_json(builder(config, handle))
+
+        if method == "GET" and host:
+            # Anything else is treated as a career page / listing
+            return self.send_body(200, "text/html; charset=utf-8", listing_html(config, host, "/" + rest).encode("utf-8"))
+
+        return self.send_body(404, "text/plain", b"stub: no route")
+
+    def send_json(self, payload):
+        return self.send_body(200, "application/json", json.dumps(payload).encode("utf-8"))
+
+    def send_body(self, status, content_type, content):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Streaming fetchers that stop early (max_postings) drop the connection
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            return
+        super().handle_error(request, client_address)
+
+
+def make_server(host="127.0.0.1", port=8765, config=None, verbose=False):
+    server = StubServer((host, port), StubHandler)
+    server.config = config or StubConfig()
+    server.verbose = verbose
+    return server
+
+
+def start_in_thread(host="127.0.0.1", port=0, config=None):
+    """Start a stub server on a background thread; returns (server, base_url)."""
+    server = make_server(host, port, config)
+    thread = threading.Thread(target=server.serve_forever, name="ats-stub", daemon=True)
+    thread.start()
+    bound_host, bound_port = server.server_address[:2]
+    return server, f"http://{bound_host}:{bound_port}"
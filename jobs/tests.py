@@ -1,3 +1,1843 @@
-from django.test import TestCase
+import contextlib
+import gzip
+import io
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta, timezone as dt_timezone
+from unittest import mock
 
-# Create your tests here.
+import httpx
+import requests
+from dateutil import parser as date_parser
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import CommandError, call_command
+from django.db import DatabaseError, IntegrityError, connection, connections
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.db.models.query import QuerySet
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.http import http_date
+from rest_framework.renderers import JSONRenderer
+
+from jobs import (
+    archive, boards, breaker, changes, companies, db, export, fetchers, history, ingest, instrumentation, leases,
+    profiling, routers, scheduler, snapshots, stub_server, transport,
+)
+from jobs.benchmarks import datagen, suite
+from jobs.management.commands.check_jobs import Command as CheckJobsCommand
+from jobs.management.commands.fetch_jobs import Command as FetchJobsCommand
+from jobs.middleware import CompressionMiddleware, normalize_sql
+from jobs.models import ArchivedJob, Board, BoardState, Company, FetchRun, Job
+from jobs.postings import Posting, as_posting
+from jobs.renderers import ORJSONRenderer
+from jobs.serializers import (
+    NESTED_JOB_VALUES, CompanyJobsSerializer, NestedJobSerializer, company_jobs_rows, nested_job_rows,
+)
+from jobs.streaming import iter_json_array
+from jobs.utils import parse_timestamp
+from jobs.views import JobDetailsView
+from jobs.writer import IngestWriter
+
+
+class InstrumentationTests(SimpleTestCase):
+
+    def test_helpers_are_noops_outside_a_run(self):
+        self.assertIsNone(instrumentation.current_company())
+        with instrumentation.stage("db_upsert"):
+            instrumentation.add_postings(3)
+            instrumentation.record_error(ValueError("ignored"))
+
+    def test_nested_stages_are_exclusive(self):
+        clock = [100.0]
+        run = instrumentation.RunMetrics()
+        with mock.patch("jobs.instrumentation.time.perf_counter", lambda: clock[0]), \
+                instrumentation.activate(run), run.track_company("Acme", "greenhouse") as company:
+            with instrumentation.stage("db_upsert"):
+                clock[0] += 2
+                with instrumentation.stage("structured_parsing"):
+                    clock[0] += 3
+                clock[0] += 1
+            clock[0] += 4
+        upsert, parsing = company.stages["db_upsert"], company.stages["structured_parsing"]
+        self.assertEqual((upsert.calls, parsing.calls), (1, 1))
+        self.assertEqual((upsert.seconds, parsing.seconds), (3, 3))
+        self.assertEqual(company.wall_seconds, 10)
+
+    def test_errors_are_attributed_to_the_stage_they_escaped(self):
+        run = instrumentation.RunMetrics()
+        with instrumentation.activate(run), run.track_company("Acme", "greenhouse") as company:
+            with self.assertRaises(ValueError):
+                with instrumentation.stage("db_upsert"):
+                    with instrumentation.stage("date_parsing"):
+                        raise ValueError("bad date")
+            with self.assertRaises(ValueError) as caught:
+                with instrumentation.stage("http_fetch"):
+                    raise ValueError("boom")
+            instrumentation.record_error(caught.exception)
+        self.assertEqual(company.stages["date_parsing"].errors, 1)
+        self.assertEqual(company.stages["db_upsert"].errors, 1)
+        self.assertEqual(company.errors, [{"stage": "http_fetch", "error_class": "ValueError", "message": "boom"}])
+
+    def test_company_reported_into_from_several_threads(self):
+        # A board's fetch thread and the ingest writer both report into its CompanyMetrics
+        run = instrumentation.RunMetrics()
+        company = run.company("Acme", "greenhouse")
+
+        def report():
+            with instrumentation.reporting_to(company):
+                for _ in range(2000):
+                    instrumentation.add_upserted(2)
+                    instrumentation.record_response(200, 10)
+                    with instrumentation.stage("db_upsert"):
+                        pass
+                instrumentation.record_error(ValueError("boom"))
+
+        switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            threads = [threading.Thread(target=report) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            sys.setswitchinterval(switch_interval)
+        self.assertEqual(
+            (company.rows_upserted, company.http_requests, company.bytes_downloaded), (32000, 16000, 160000),
+        )
+        self.assertEqual(company.stages["db_upsert"].calls, 16000)
+        self.assertEqual(len(company.errors), 8)
+
+    def test_totals_and_exports(self):
+        run = instrumentation.RunMetrics()
+        with instrumentation.activate(run):
+            for name, postings in (("Acme", 3), ('Globex "EU"', 4)):
+                with run.track_company(name, "lever"):
+                    instrumentation.add_postings(postings)
+                    instrumentation.add_upserted(postings)
+                    instrumentation.add_deactivated(1)
+        run.finish()
+        totals = run.totals()
+        self.assertEqual(totals["companies"], 2)
+        self.assertEqual(totals["postings_fetched"], 7)
+        self.assertEqual(totals["rows_upserted"], 7)
+        self.assertEqual(totals["rows_deactivated"], 2)
+
+        summary = json.loads(run.to_json())
+        self.assertEqual([c["name"] for c in summary["companies"]], ["Acme", 'Globex "EU"'])
+        prom = run.to_prometheus()
+        self.assertIn('breneo_ingest_postings_fetched{company="Globex \\"EU\\"",platform="lever"} 4', prom)
+        self.assertIn("# TYPE breneo_ingest_run_duration_seconds gauge", prom)
+
+
+class FetchHistoryTests(TestCase):
+
+    def board_metrics(self, name, latency, payload, error=None):
+        metrics = instrumentation.CompanyMetrics(name, "greenhouse")
+        metrics.started_at = time.time()
+        metrics.wall_seconds = latency
+        metrics.bytes_downloaded = payload
+        metrics.http_requests = 1
+        metrics.rows_upserted = 10
+        if error is not None:
+            metrics.record_error(error, "http_fetch")
+        return metrics
+
+    def record_run(self, results):
+        run = history.start_run()
+        for name, latency, payload, error in results:
+            history.record_board_result(run, self.board_metrics(name, latency, payload, error), name.lower())
+        return history.finish_run(run, None)
+
+    def test_finish_run_aggregates_board_results(self):
+        run = self.record_run([("Acme", 1.0, 100, None), ("Globex", 2.0, 50, ConnectionError("refused"))])
+        self.assertEqual(run.status, FetchRun.STATUS_PARTIAL)
+        self.assertEqual((run.boards_total, run.boards_failed), (2, 1))
+        self.assertEqual((run.jobs_upserted, run.bytes_downloaded), (20, 150))
+        self.assertIsNotNone(run.finished_at)
+        failed = run.results.get(succeeded=False)
+        self.assertEqual((failed.error_class, failed.error_message), ("ConnectionError", "refused"))
+
+        self.assertEqual(self.record_run([("Acme", 1.0, 100, None)]).status, FetchRun.STATUS_SUCCEEDED)
+
+    def test_percentile(self):
+        self.assertIsNone(history.percentile([], 50))
+        self.assertEqual(history.percentile([7], 99), 7)
+        self.assertEqual(history.percentile([4, 1, 3, 2], 50), 2.5)
+        self.assertEqual(history.percentile(range(101), 90), 90)
+
+    def test_board_stats_endpoint(self):
+        for latency in (1.0, 2.0, 3.0):
+            self.record_run([("Acme", latency, int(latency * 100), None), ("Globex", 0.5, 10, None)])
+
+        stats = self.client.get("/api/fetch-stats", {"platform": "greenhouse", "bucket": "hour"}).json()
+        self.assertEqual(stats["bucket"], "hour")
+        self.assertEqual([board["board"] for board in stats["boards"]], ["acme", "globex"])
+        acme = stats["boards"][0]
+        self.assertEqual((acme["runs"], acme["failures"]), (3, 0))
+        self.assertEqual(acme["latency_seconds"], {"p50": 2.0, "p90": 2.8, "p99": 2.98})
+        self.assertEqual(acme["payload_bytes"]["p50"], 200)
+        self.assertEqual(sum(bucket["runs"] for bucket in acme["series"]), 3)
+
+        self.assertEqual(history.board_stats(board="globex")["boards"][0]["runs"], 3)
+        self.assertEqual(history.board_stats(platform="lever")["boards"], [])
+
+    def test_check_jobs_records_its_run(self):
+        Board.objects.all().delete()
+        Board.objects.create(name="Acme", platform="greenhouse", handle="acme")
+        with mock.patch.object(CheckJobsCommand, "fetch_company", return_value=3), \
+                mock.patch.object(CheckJobsCommand, "check_liveness", return_value=0):
+            call_command("check_jobs")
+        run = FetchRun.objects.get(command="check_jobs")
+        self.assertEqual(run.status, FetchRun.STATUS_SUCCEEDED)
+        self.assertEqual(list(run.results.values_list("board", flat=True)), ["acme"])
+
+        with mock.patch.object(CheckJobsCommand, "fetch_company", return_value=3), \
+                mock.patch.object(CheckJobsCommand, "check_liveness", side_effect=RuntimeError("boom")), \
+                self.assertRaises(RuntimeError):
+            call_command("check_jobs")
+        self.assertEqual(FetchRun.objects.filter(command="check_jobs").latest("pk").status, FetchRun.STATUS_FAILED)
+
+
+class RequestTimingTests(TestCase):
+
+    def test_normalize_sql(self):
+        self.assertEqual(
+            normalize_sql("SELECT *  FROM jobs_job\n WHERE id IN (%s, %s, %s) AND title = 'a''b' LIMIT 20"),
+            "SELECT * FROM jobs_job WHERE id IN (...) AND title = ? LIMIT ?",
+        )
+        self.assertEqual(
+            normalize_sql('SELECT "t1"."col2" FROM t1 WHERE x > -1.5'), 'SELECT "t1"."col2" FROM t1 WHERE x > ?',
+        )
+
+    def test_disabled_by_default(self):
+        self.assertNotIn("Server-Timing", self.client.get("/api/fetch-stats"))
+
+    @override_settings(REQUEST_TIMING_ENABLED=True, REQUEST_TIMING_SLOW_MS=0)
+    def test_server_timing_and_slow_log(self):
+        with self.assertLogs("jobs.middleware", "WARNING") as logs:
+            response = self.client.get("/api/fetch-stats")
+        timing = response["Server-Timing"]
+        self.assertRegex(timing, r'^db;dur=[\d.]+;desc="[1-9]\d* queries"')
+        self.assertIn("render;dur=", timing)
+        self.assertIn(f'size;desc="{len(response.content)} bytes"', timing)
+        self.assertIn("Slow request GET /api/fetch-stats", logs.output[0])
+
+    @override_settings(REQUEST_TIMING_ENABLED=True, REQUEST_TIMING_SAMPLE_RATE=0)
+    def test_unsampled_requests_go_through(self):
+        self.assertNotIn("Server-Timing", self.client.get("/api/fetch-stats"))
+
+
+class BenchmarkSuiteTests(TestCase):
+
+    def test_stats(self):
+        stats = suite._stats([i / 1000 for i in range(100, 0, -1)])
+        self.assertEqual(stats["iterations"], 100)
+        self.assertEqual(stats["min_ms"], 1)
+        self.assertEqual(stats["median_ms"], 50.5)
+        self.assertEqual(stats["mean_ms"], 50.5)
+        self.assertEqual(stats["p95_ms"], 95)
+        self.assertEqual(stats["p99_ms"], 99)
+        self.assertEqual(stats["max_ms"], 100)
+
+        single = suite._stats([0.002])
+        self.assertEqual((single["p95_ms"], single["p99_ms"], single["stdev_ms"]), (2, 2, 0.0))
+
+    def test_run_benchmark(self):
+        calls = []
+
+        def factory(ctx):
+            calls.append("setup")
+            try:
+                yield lambda: calls.append("run") or {"rows": 3}
+            finally:
+                calls.append("teardown")
+
+        bench = suite.Benchmark("fake", factory, iterations=4, warmup=2, group="test", description="")
+        stats = suite.run_benchmark(bench, suite.Context("1k", 1000, 42))
+        self.assertEqual(calls, ["setup"] + ["run"] * 6 + ["teardown"])
+        self.assertEqual(stats["iterations"], 4)
+        self.assertEqual(stats["group"], "test")
+        self.assertEqual(stats["extra"], {"rows": 3})
+
+    def test_compare(self):
+        baseline = {"benchmarks": {"a": {"median_ms": 10.0}, "b": {"median_ms": 0}, "gone": {"median_ms": 1.0}}}
+        current = {"benchmarks": {"a": {"median_ms": 7.5}, "b": {"median_ms": 1.0}, "new": {"median_ms": 2.0}}}
+        self.assertEqual(suite.compare(current, baseline), [("a", 10.0, 7.5, -25.0), ("b", 0, 1.0, None)])
+
+    def test_datagen_is_deterministic(self):
+        fields = ("company__name", "title", "location", "location_country", "description", "platform", "is_active")
+
+        def generated(seed):
+            self.assertEqual(datagen.generate(120, seed=seed), (3, 120))
+            rows = list(Job.objects.order_by("external_job_id").values_list(*fields))
+            Job.objects.all().delete()
+            Company.objects.all().delete()
+            return rows
+
+        first = generated(5)
+        self.assertEqual(generated(5), first)
+        self.assertNotEqual(generated(6), first)
+        self.assertEqual(datagen.scale_to_count("10k"), 10_000)
+        self.assertEqual(datagen.scale_to_count("2500"), 2500)
+
+
+class AtsStubTests(TestCase):
+
+    def setUp(self):
+        self.server, self.base_url = stub_server.start_in_thread(
+            config=stub_server.StubConfig(postings=5, fail_boards={"gone"}),
+        )
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.addCleanup(transport.configure)
+        self.cassette = os.path.join(tempfile.mkdtemp(), "cassette.json")
+
+    def ingest(self, handle, platform="greenhouse"):
+        ingest.ingest_company({"name": handle.title(), "platform": platform, "handle": handle})
+        return Job.objects.filter(company__name=handle.title(), is_active=True).count()
+
+    def test_redirect_transport_rewrites_to_the_stub(self):
+        redirect = transport.RedirectTransport("http://127.0.0.1:8765/stub/")
+        self.assertEqual(
+            str(redirect.rewrite(httpx.URL("https://api.lever.co/v0/postings/acme?mode=json"))),
+            "http://127.0.0.1:8765/stub/api.lever.co/v0/postings/acme?mode=json",
+        )
+
+    def test_ingests_synthetic_boards(self):
+        transport.configure(base_url=self.base_url)
+        for platform in ("greenhouse", "lever", "ashby", "smartrecruiters", "workable"):
+            with self.subTest(platform=platform):
+                self.assertEqual(self.ingest(f"acme-{platform}", platform), 5)
+        with self.assertLogs("jobs.fetchers", "ERROR"):
+            self.assertEqual(self.ingest("gone"), 0)
+        self.assertGreaterEqual(self.server.config.requests, 3)
+
+    def test_cassette_record_and_replay(self):
+        transport.configure(base_url=self.base_url, cassette=self.cassette, cassette_mode="record")
+        self.assertEqual(self.ingest("acme"), 5)
+        with open(self.cassette) as fh:
+            recorded = json.load(fh)["interactions"]
+        self.assertIn("https://boards-api.greenhouse.io/v1/boards/acme/jobs", [i["url"] for i in recorded])
+
+        self.server.shutdown()
+        Job.objects.all().delete()
+        transport.configure(cassette=self.cassette, cassette_mode="replay")
+        self.assertEqual(self.ingest("acme"), 5)
+
+        replay = transport.CassetteTransport(self.cassette, "replay")
+        with httpx.Client(transport=replay) as client, self.assertRaises(httpx.ConnectError):
+            client.get("https://boards-api.greenhouse.io/v1/boards/unrecorded/jobs")
+
+
+class ProfilingTests(SimpleTestCase):
+
+    def busy(self, seconds):
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            sum(range(100))
+
+    def test_profile_run(self):
+        out_dir = tempfile.mkdtemp()
+        run = instrumentation.RunMetrics()
+        with contextlib.redirect_stderr(io.StringIO()) as stderr, \
+                profiling.maybe_profile(out_dir, memory=True) as profiler, instrumentation.activate(run):
+            for name in ("Acme Inc", "Globex"):
+                with run.track_company(name, "greenhouse") as metrics, profiling.company(profiler, name, metrics):
+                    with instrumentation.stage("db_upsert"):
+                        self.busy(0.1)
+        self.assertIn(f"Profile written to {out_dir}", stderr.getvalue())
+
+        for path in ("profile.pstats", "companies/Acme_Inc.pstats", "companies/Globex.pstats", "memory.txt"):
+            self.assertTrue(os.path.exists(os.path.join(out_dir, path)), path)
+        with open(os.path.join(out_dir, "stacks.collapsed")) as fh:
+            stacks = fh.read().splitlines()
+        self.assertTrue(any(line.startswith("Acme_Inc;db_upsert;") for line in stacks))
+        self.assertTrue(all(line.rsplit(" ", 1)[1].isdigit() for line in stacks))
+        with open(os.path.join(out_dir, "summary.txt")) as fh:
+            summary = fh.read()
+        self.assertIn("Top functions by cumulative time", summary)
+        with open(os.path.join(out_dir, "memory.txt")) as fh:
+            self.assertIn("== Globex: current", fh.read())
+
+    def test_disabled_without_a_directory(self):
+        with profiling.maybe_profile(None) as profiler, profiling.company(profiler, "Acme"):
+            self.assertIsNone(profiler)
+
+
+class SchedulerTests(TestCase):
+
+    def setUp(self):
+        self.now = timezone.now()
+        self.companies = [
+            {"name": "Acme", "platform": "greenhouse", "handle": "acme"},
+            {"name": "Feed", "platform": "rss", "url": "https://example.com/jobs.rss"},
+        ]
+
+    def test_sync_boards_spreads_new_boards(self):
+        self.assertEqual(scheduler.sync_boards(self.companies, now=self.now), 2)
+        self.assertEqual(scheduler.sync_boards(self.companies, now=self.now), 0)
+        feed = BoardState.objects.get(platform="rss")
+        self.assertEqual((feed.board, feed.company_name), ("https://example.com/jobs.rss", "Feed"))
+        for state in BoardState.objects.all():
+            delay = (state.next_due_at - self.now).total_seconds()
+            self.assertTrue(0 <= delay <= scheduler.JITTER * scheduler.DEFAULT_INTERVAL)
+            self.assertEqual(state.interval_seconds, scheduler.DEFAULT_INTERVAL)
+
+        wait = scheduler.seconds_until_next(self.companies, now=self.now)
+        self.assertEqual(wait, min((s.next_due_at - self.now).total_seconds() for s in BoardState.objects.all()))
+        self.assertEqual(scheduler.seconds_until_next(self.companies, now=self.now + timedelta(days=1)), 0)
+        self.assertIsNone(scheduler.seconds_until_next([{"platform": "lever", "handle": "x"}]))
+
+    def test_interval_for_rate(self):
+        self.assertEqual(scheduler.interval_for_rate(0), scheduler.MAX_INTERVAL)
+        self.assertEqual(scheduler.interval_for_rate(100), scheduler.MIN_INTERVAL)
+        self.assertEqual(scheduler.interval_for_rate(scheduler.rate_for_interval(7200)), 7200)
+
+    def check(self, state, digest, hours, failed=False):
+        self.now += timedelta(hours=hours)
+        return scheduler.record_check(state, digest, failed=failed, now=self.now, jitter=0)
+
+    def test_learns_change_rate(self):
+        scheduler.sync_boards(self.companies[:1], now=self.now)
+        state = BoardState.objects.get()
+        self.assertTrue(self.check(state, "a", 1))
+        self.assertEqual(state.interval_seconds, scheduler.DEFAULT_INTERVAL)
+
+        # A board that never changes is checked less and less often
+        intervals = []
+        for _ in range(5):
+            self.assertFalse(self.check(state, "a", state.interval_seconds / 3600))
+            intervals.append(state.interval_seconds)
+        self.assertEqual(intervals, sorted(intervals))
+        self.assertGreater(intervals[-1], scheduler.DEFAULT_INTERVAL)
+        self.assertEqual(state.next_due_at, self.now + timedelta(seconds=state.interval_seconds))
+
+        # ...and one that changes on every check converges towards MIN_INTERVAL
+        for i in range(30):
+            self.assertTrue(self.check(state, f"v{i}", state.interval_seconds / 3600))
+        self.assertEqual(state.interval_seconds, scheduler.MIN_INTERVAL)
+        state.refresh_from_db()
+        self.assertEqual((state.checks, state.changes, state.content_hash), (36, 30, "v29"))
+
+    def test_failed_check_keeps_schedule(self):
+        scheduler.sync_boards(self.companies[:1], now=self.now)
+        state = BoardState.objects.get()
+        self.check(state, "a", 1)
+        rate, interval = state.change_rate, state.interval_seconds
+        self.assertFalse(self.check(state, "", 2, failed=True))
+        self.assertEqual((state.change_rate, state.interval_seconds, state.checks), (rate, interval, 1))
+        self.assertEqual(state.next_due_at, self.now + timedelta(seconds=interval))
+
+    def test_content_digest_is_order_independent(self):
+        first, second = as_posting(posting("1"), "greenhouse"), as_posting(posting("2"), "greenhouse")
+
+        def digest(*postings):
+            content = scheduler.ContentDigest()
+            for item in postings:
+                content.add(item)
+            return content.hexdigest()
+
+        self.assertEqual(digest(first, second), digest(second, first))
+        self.assertNotEqual(digest(first, second), digest(first))
+        self.assertNotEqual(digest(first), digest(as_posting(posting("1", title="Lead"), "greenhouse")))
+        self.assertEqual(len(digest()), 64)
+
+    def test_refresh_board_streams_the_board_into_ingest(self):
+        comp = self.companies[0]
+        scheduler.sync_boards([comp], now=self.now, spread=False)
+        state = BoardState.objects.get()
+
+        def refresh(ids, title="Engineer"):
+            postings = ingest.Postings(as_posting(posting(i, title), "greenhouse") for i in ids)
+            run = instrumentation.RunMetrics()
+            with mock.patch.object(ingest, "fetch_postings", return_value=postings), \
+                    instrumentation.activate(run), run.track_company("Acme", "greenhouse") as metrics:
+                return scheduler.refresh_board(comp, state, metrics, jitter=0)
+
+        self.assertTrue(refresh(["1", "2"]))
+        self.assertFalse(refresh(["2", "1"]))
+        self.assertTrue(refresh(["2", "1"], title="Lead"))
+        self.assertEqual(Job.objects.filter(title="Lead", is_active=True).count(), 2)
+        self.assertEqual((state.checks, state.changes), (3, 1))
+
+
+def board_state(platform="greenhouse", board="acme", **fields):
+    fields.setdefault("company_name", board.title())
+    fields.setdefault("next_due_at", timezone.now())
+    fields.setdefault("interval_seconds", 3600)
+    fields.setdefault("change_rate", 0.5)
+    return BoardState.objects.create(platform=platform, board=board, **fields)
+
+
+class LeaseTests(TestCase):
+
+    def setUp(self):
+        self.now = timezone.now()
+        self.companies = [
+            {"name": "Acme", "platform": "greenhouse", "handle": "acme"},
+            {"name": "Globex", "platform": "lever", "handle": "globex"},
+        ]
+        self.acme = board_state("greenhouse", "acme", next_due_at=self.now - timedelta(minutes=10))
+        self.globex = board_state("lever", "globex", next_due_at=self.now - timedelta(minutes=5))
+
+    def claimed(self, owner, limit=10, now=None):
+        return [(comp["handle"], state.pk) for comp, state in
+                leases.claim(owner, self.companies, limit=limit, lease_seconds=60, now=now or self.now)]
+
+    def test_claims_due_boards_most_overdue_first(self):
+        board_state("greenhouse", "later", next_due_at=self.now + timedelta(hours=1))
+        self.companies.append({"name": "Later", "platform": "greenhouse", "handle": "later"})
+        self.assertEqual(self.claimed("w1"), [("acme", self.acme.pk), ("globex", self.globex.pk)])
+
+        self.acme.refresh_from_db()
+        self.assertEqual(self.acme.lease_owner, "w1")
+        self.assertEqual(self.acme.lease_expires_at, self.now + timedelta(seconds=60))
+
+    def test_respects_limit(self):
+        self.assertEqual(self.claimed("w1", limit=1), [("acme", self.acme.pk)])
+        self.assertEqual(self.claimed("w2", limit=1), [("globex", self.globex.pk)])
+
+    def test_skips_leased_boards(self):
+        self.claimed("w1", limit=1)
+        self.assertEqual(self.claimed("w2"), [("globex", self.globex.pk)])
+        self.assertEqual(self.claimed("w3"), [])
+
+    def test_expired_lease_is_reclaimable(self):
+        self.claimed("w1")
+        expired = self.now + timedelta(seconds=61)
+        self.assertEqual(len(self.claimed("w2", now=expired)), 2)
+        self.acme.refresh_from_db()
+        self.assertEqual(self.acme.lease_owner, "w2")
+
+    def test_ignores_unconfigured_pairs(self):
+        # Platform and board each configured, but not together
+        board_state("greenhouse", "globex", next_due_at=self.now - timedelta(hours=1))
+        board_state("lever", "acme", next_due_at=self.now - timedelta(hours=1))
+        self.assertEqual(self.claimed("w1", limit=2), [("acme", self.acme.pk), ("globex", self.globex.pk)])
+
+    def test_claim_with_skip_locked_matches_exact_pairs(self):
+        # Most overdue, but greenhouse/globex isn't a configured board
+        board_state("greenhouse", "globex", next_due_at=self.now - timedelta(hours=1))
+        with mock.patch.object(connection.features, "has_select_for_update_skip_locked", True):
+            self.assertEqual(self.claimed("w1", limit=1), [("acme", self.acme.pk)])
+            self.assertEqual(self.claimed("w2", limit=1), [("globex", self.globex.pk)])
+
+    def test_renew_only_extends_own_leases(self):
+        self.claimed("w1")
+        later = self.now + timedelta(seconds=30)
+        self.assertEqual(leases.renew("w1", [self.acme.pk, self.globex.pk], lease_seconds=60, now=later), 2)
+        self.assertEqual(leases.renew("w2", [self.acme.pk], lease_seconds=60, now=later), 0)
+        self.acme.refresh_from_db()
+        self.assertEqual(self.acme.lease_expires_at, later + timedelta(seconds=60))
+        self.assertEqual(self.acme.heartbeat_at, later)
+        # Still held at the original expiry thanks to the renewal
+        self.assertEqual(self.claimed("w2", now=self.now + timedelta(seconds=61)), [])
+
+    def test_release_only_by_owner(self):
+        self.claimed("w1", limit=1)
+        self.assertEqual(leases.release("w2", self.acme), 0)
+        self.assertEqual(leases.release("w1", self.acme), 1)
+        self.acme.refresh_from_db()
+        self.assertEqual(self.acme.lease_owner, "")
+        self.assertIsNone(self.acme.lease_expires_at)
+        self.assertEqual(self.claimed("w2", limit=1), [("acme", self.acme.pk)])
+
+
+class BoardRegistryTests(TestCase):
+    csv = (
+        "name,platform,handle,url,enabled,priority,max_postings\n"
+        "Acme,greenhouse,acme,,true,5,\n"
+        "Globex,lever,globex,,1,0,200\n"
+        ",rss,,https://example.com/jobs.rss,no,0,\n"
+    )
+
+    def setUp(self):
+        Board.objects.all().delete()
+        self.path = os.path.join(tempfile.mkdtemp(), "boards.csv")
+        with open(self.path, "w") as fh:
+            fh.write(self.csv)
+
+    def import_boards(self, *args):
+        out = io.StringIO()
+        call_command("import_boards", self.path, *args, stdout=out)
+        return out.getvalue().strip()
+
+    def import_boards_from(self, csv):
+        with open(self.path, "w") as fh:
+            fh.write(csv)
+        return self.import_boards()
+
+    def test_import_and_enabled_boards(self):
+        self.assertEqual(self.import_boards(), "created 3, updated 0, disabled 0 board(s); 0 unchanged")
+        feed = Board.objects.get(platform="rss")
+        self.assertEqual((feed.name, feed.enabled), ("https://example.com/jobs.rss", False))
+        self.assertEqual(Board.objects.get(handle="globex").max_postings, 200)
+
+        configured = boards.enabled_boards()
+        self.assertEqual([comp["name"] for comp in configured], ["Acme", "Globex"])
+        self.assertEqual(configured[0]["handle"], "acme")
+        self.assertEqual([comp["name"] for comp in boards.enabled_boards(platform="lever")], ["Globex"])
+
+    def test_reimport_updates_and_disables(self):
+        self.import_boards()
+        with open(self.path, "w") as fh:
+            fh.write("name,platform,handle,priority\nAcme Corp,greenhouse,acme,5\n")
+        self.assertEqual(
+            self.import_boards("--disable-missing", "--dry-run"),
+            "Would have created 0, updated 1, disabled 1 board(s); 0 unchanged",
+        )
+        self.assertEqual(Board.objects.get(handle="acme").name, "Acme")
+        self.assertEqual(
+            self.import_boards("--disable-missing"), "created 0, updated 1, disabled 1 board(s); 0 unchanged",
+        )
+        self.assertEqual(Board.objects.get(handle="acme").name, "Acme Corp")
+        self.assertFalse(Board.objects.get(handle="globex").enabled)
+
+    def test_export_round_trip(self):
+        self.import_boards()
+        for fmt in ("json", "csv"):
+            with self.subTest(fmt=fmt):
+                self.path = os.path.join(tempfile.mkdtemp(), f"boards.{fmt}")
+                call_command("export_boards", "--format", fmt, "--output", self.path, stdout=io.StringIO())
+                self.assertEqual(self.import_boards(), "created 0, updated 0, disabled 0 board(s); 3 unchanged")
+
+    def test_invalid_row(self):
+        with open(self.path, "w") as fh:
+            fh.write("name,platform,handle\nAcme,,acme\n")
+        with self.assertRaisesMessage(CommandError, "Board 1: Board needs a platform and a handle or url"):
+            self.import_boards()
+        self.assertFalse(Board.objects.exists())
+
+    def test_rows_are_validated(self):
+        for rows, message in (
+            ("Acme,greenhouse,acme,,x\n", "Board 1: invalid literal for int()"),
+            (
+                "Acme,greenhouse,acme,,\nGlobex,greenhouse,acme,,\n",
+                "Board 2 (greenhouse: acme) appears more than once",
+            ),
+            ("Acme,greenhouse,acme,,\nFeed,rss,,not a url,\n", "Board 2 (rss: not a url): url: Enter a valid URL."),
+            (f"{'A' * 201},greenhouse,acme,,\n", "Board 1 (greenhouse: acme): name: Ensure this value has at most 200"),
+        ):
+            with self.subTest(message=message):
+                with self.assertRaisesMessage(CommandError, message):
+                    self.import_boards_from("name,platform,handle,url,priority\n" + rows)
+                self.assertFalse(Board.objects.exists())
+
+        # Updates are validated too
+        self.import_boards_from("name,platform,handle\nAcme,greenhouse,acme\n")
+        with self.assertRaisesMessage(CommandError, "Board 1 (greenhouse: acme): name: Ensure"):
+            self.import_boards_from(f"name,platform,handle\n{'A' * 201},greenhouse,acme\n")
+        self.assertEqual(Board.objects.get().name, "Acme")
+
+
+class BreakerTests(TestCase):
+
+    def setUp(self):
+        self.now = timezone.now()
+        self.state = board_state()
+
+    def fail(self, times=1, error="HTTPError: 503"):
+        for _ in range(times):
+            breaker.record(self.state, True, error, now=self.now)
+
+    def open(self):
+        with self.assertLogs("jobs.breaker", "WARNING"):
+            self.fail(breaker.FAILURE_THRESHOLD)
+
+    def test_opens_after_threshold(self):
+        with self.assertNoLogs("jobs.breaker", "WARNING"):
+            self.fail(breaker.FAILURE_THRESHOLD - 1)
+        self.assertEqual(self.state.breaker_state, BoardState.BREAKER_CLOSED)
+        self.assertTrue(breaker.allow(self.state, self.now))
+
+        with self.assertLogs("jobs.breaker", "WARNING"):
+            self.fail()
+        self.state.refresh_from_db()
+        self.assertEqual(self.state.breaker_state, BoardState.BREAKER_OPEN)
+        self.assertEqual(self.state.consecutive_failures, breaker.FAILURE_THRESHOLD)
+        self.assertEqual(self.state.last_error, "HTTPError: 503")
+        wait = (self.state.breaker_open_until - self.now).total_seconds()
+        self.assertGreaterEqual(wait, breaker.BASE_BACKOFF * 0.9)
+        self.assertLessEqual(wait, breaker.BASE_BACKOFF * 1.1)
+        self.assertFalse(breaker.allow(self.state, self.now))
+
+    def test_expired_open_breaker_goes_half_open(self):
+        self.open()
+        later = self.state.breaker_open_until + timedelta(seconds=1)
+        self.assertTrue(breaker.allow(self.state, later))
+        self.state.refresh_from_db()
+        self.assertEqual(self.state.breaker_state, BoardState.BREAKER_HALF_OPEN)
+
+    def test_failed_probe_reopens_with_longer_backoff(self):
+        self.open()
+        self.now = self.state.breaker_open_until + timedelta(seconds=1)
+        breaker.allow(self.state, self.now)
+
+        with self.assertLogs("jobs.breaker", "WARNING"):
+            self.assertEqual(breaker.record(self.state, True, "timeout", now=self.now), BoardState.BREAKER_OPEN)
+        wait = (self.state.breaker_open_until - self.now).total_seconds()
+        backoff = breaker.backoff_seconds(breaker.FAILURE_THRESHOLD + 1)
+        self.assertEqual(backoff, breaker.BASE_BACKOFF * 2)
+        self.assertGreaterEqual(wait, backoff * 0.9)
+        self.assertLessEqual(wait, backoff * 1.1)
+
+    def test_success_closes_and_resets(self):
+        self.open()
+        breaker.allow(self.state, self.state.breaker_open_until)
+
+        with self.assertLogs("jobs.breaker", "INFO"):
+            self.assertEqual(breaker.record(self.state, False, now=self.now), BoardState.BREAKER_CLOSED)
+        self.state.refresh_from_db()
+        self.assertEqual(self.state.consecutive_failures, 0)
+        self.assertIsNone(self.state.breaker_open_until)
+        self.assertEqual(self.state.last_error, "")
+
+    def test_backoff_is_capped(self):
+        self.assertEqual(breaker.backoff_seconds(100), breaker.MAX_BACKOFF)
+
+
+class FetchJobsTestMixin:
+    """Runs fetch_jobs over three boards, with fetching replaced by a stub that fails the boards in ``failing``."""
+    handles = ["acme", "globex", "initech"]
+
+    def setUp(self):
+        super().setUp()
+        Board.objects.all().delete()
+        for handle in self.handles:
+            Board.objects.create(name=handle.title(), platform="greenhouse", handle=handle)
+        self.failing = set()
+        self.fetched = []
+        patcher = mock.patch.object(FetchJobsCommand, "fetch_company", autospec=True, side_effect=self.fetch_company)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def fetch_company(self, command, comp, writer=None):
+        self.fetched.append(comp["handle"])
+        if comp["handle"] in self.failing:
+            instrumentation.record_error(RuntimeError("boom"))
+        return 0
+
+    def fetch_jobs(self, **options):
+        self.fetched = []
+        call_command("fetch_jobs", **options)
+        return sorted(self.fetched)
+
+
+class FetchJobsBreakerTests(FetchJobsTestMixin, TestCase):
+
+    def test_failing_board_is_skipped_until_its_breaker_lets_a_probe_through(self):
+        self.failing = {"globex"}
+        for _ in range(breaker.FAILURE_THRESHOLD - 1):
+            self.assertEqual(self.fetch_jobs(), self.handles)
+        with self.assertLogs("jobs.breaker", "WARNING"):
+            self.assertEqual(self.fetch_jobs(), self.handles)
+        self.assertEqual(self.fetch_jobs(), ["acme", "initech"])
+        state = BoardState.objects.get(board="globex")
+        self.assertEqual((state.breaker_state, state.last_error), (BoardState.BREAKER_OPEN, "RuntimeError: boom"))
+
+        BoardState.objects.filter(pk=state.pk).update(breaker_open_until=timezone.now() - timedelta(seconds=1))
+        self.failing = set()
+        with self.assertLogs("jobs.breaker", "INFO"):
+            self.assertEqual(self.fetch_jobs(), self.handles)
+        state.refresh_from_db()
+        self.assertEqual((state.breaker_state, state.consecutive_failures), (BoardState.BREAKER_CLOSED, 0))
+
+
+class WorkerTests(FetchJobsTestMixin, TestCase):
+
+    def fetch_postings(self, comp):
+        self.fetched.append(comp["handle"])
+        # Fetchers are generators
+        return ingest.Postings(as_posting(posting(f"{comp['handle']}-{i}"), "greenhouse") for i in range(2))
+
+    def test_worker_refreshes_every_due_board(self):
+        with mock.patch.object(ingest, "fetch_postings", side_effect=self.fetch_postings):
+            self.assertEqual(self.fetch_jobs(worker=True, worker_id="w1"), self.handles)
+            # Nothing is due any more
+            self.assertEqual(self.fetch_jobs(worker=True, worker_id="w2"), [])
+        states = BoardState.objects.order_by("board")
+        self.assertEqual([(state.board, state.checks) for state in states], [(handle, 1) for handle in self.handles])
+        self.assertEqual({state.lease_owner for state in states}, {""})
+        self.assertEqual(Job.objects.filter(is_active=True).count(), 6)
+        self.assertEqual([run.results.count() for run in FetchRun.objects.order_by("pk")], [3, 0])
+
+    def test_plain_run_leaves_the_schedule_alone(self):
+        self.assertEqual(self.fetch_jobs(), self.handles)
+        schedule = list(BoardState.objects.order_by("board").values_list("next_due_at", "checks"))
+        self.assertEqual(self.fetch_jobs(), self.handles)
+        self.assertEqual(list(BoardState.objects.order_by("board").values_list("next_due_at", "checks")), schedule)
+        self.assertEqual({checks for _, checks in schedule}, {0})
+
+
+class ConcurrentFetchTests(FetchJobsTestMixin, TransactionTestCase):
+
+    def test_every_board_is_recorded(self):
+        self.failing = {"globex"}
+        self.assertEqual(self.fetch_jobs(concurrency=2), self.handles)
+        fetch_run = FetchRun.objects.get()
+        self.assertEqual(fetch_run.status, FetchRun.STATUS_PARTIAL)
+        self.assertEqual(
+            sorted(fetch_run.results.values_list("board", "succeeded")),
+            [("acme", True), ("globex", False), ("initech", True)],
+        )
+
+    def test_failing_to_record_a_board_fails_the_run(self):
+        with mock.patch.object(history, "record_board_result", side_effect=DatabaseError("disk I/O error")), \
+                self.assertLogs("jobs.writer", "ERROR"), self.assertRaises(DatabaseError):
+            self.fetch_jobs(concurrency=2)
+        self.assertEqual(FetchRun.objects.get().status, FetchRun.STATUS_FAILED)
+
+
+class ResumeTests(FetchJobsTestMixin, TestCase):
+
+    def test_resume_skips_completed_boards(self):
+        self.failing = {"globex"}
+        self.assertEqual(self.fetch_jobs(), self.handles)
+        run = history.resumable_run()
+        self.assertEqual(run.status, FetchRun.STATUS_PARTIAL)
+        self.assertEqual(history.completed_boards(run), {("greenhouse", "acme"), ("greenhouse", "initech")})
+
+        self.failing = set()
+        self.assertEqual(self.fetch_jobs(resume="latest"), ["globex"])
+        run.refresh_from_db()
+        self.assertEqual(run.status, FetchRun.STATUS_SUCCEEDED)
+        self.assertEqual((run.boards_total, run.boards_failed), (3, 0))
+        self.assertEqual(FetchRun.objects.count(), 1)
+
+        # Nothing left to resume: a normal run
+        self.assertIsNone(history.resumable_run())
+        self.assertEqual(self.fetch_jobs(resume="latest"), self.handles)
+        self.assertEqual(FetchRun.objects.count(), 2)
+
+    def test_running_run_is_only_resumed_by_id(self):
+        self.failing = {"globex"}
+        self.fetch_jobs()
+        # Another fetch_jobs is still going (or was killed outright)
+        running = history.start_run("fetch_jobs")
+        self.assertIsNone(history.resumable_run())
+
+        self.failing = set()
+        self.assertEqual(self.fetch_jobs(resume="latest"), self.handles)
+        self.assertEqual(FetchRun.objects.count(), 3)
+        running.refresh_from_db()
+        self.assertEqual((running.status, running.results.count()), (FetchRun.STATUS_RUNNING, 0))
+        self.assertEqual(history.resumable_run(run_id=running.pk), running)
+
+    def test_resume_run_by_id(self):
+        self.failing = {"acme", "globex"}
+        self.fetch_jobs()
+        first = FetchRun.objects.get()
+        self.failing = {"acme"}
+        self.fetch_jobs()
+
+        self.failing = set()
+        self.assertEqual(self.fetch_jobs(resume=str(first.pk)), ["acme", "globex"])
+        with self.assertRaises(CommandError):
+            self.fetch_jobs(resume="999")
+        with self.assertRaises(CommandError):
+            self.fetch_jobs(resume="latest-ish")
+
+
+def chunked(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+class IterJsonArrayTests(SimpleTestCase):
+    document = {
+        "meta": {"total": 3, "tags": ["a", "b"]},
+        "jobs": [
+            {"id": 12345, "title": "Développeuse — Tbilisi", "salary": 1234.5},
+            {"id": 67890, "title": "日本語 🚀", "remote": True, "team": None},
+            [1, "x"],
+        ],
+        "count": 123456789,
+    }
+
+    def test_any_chunking(self):
+        data = json.dumps(self.document, ensure_ascii=False, indent=1).encode("utf-8")
+        # Every chunk size splits something: tokens, numbers, multibyte characters
+        for size in range(1, 40):
+            with self.subTest(size=size):
+                self.assertEqual(list(iter_json_array(chunked(data, size), ("jobs",))), self.document["jobs"])
+
+    def test_trailing_number_split_across_chunks(self):
+        self.assertEqual(list(iter_json_array([b"[1, 23", b"45", b"6]"])), [1, 23456])
+        self.assertEqual(list(iter_json_array([b"[12", b"3", b"]"])), [123])
+
+    def test_top_level_array(self):
+        self.assertEqual(list(iter_json_array([b"[]"])), [])
+        self.assertEqual(list(iter_json_array([b' [ {"a": 1} , 2 ] '])), [{"a": 1}, 2])
+
+    def test_nested_path_with_alternatives(self):
+        data = b'{"data": {"skip": [1, 2], "postings": [{"id": 1}]}}'
+        self.assertEqual(list(iter_json_array([data], ("data", ("jobs", "postings")))), [{"id": 1}])
+
+    def test_missing_key(self):
+        with self.assertRaisesMessage(ValueError, "No 'jobs' in JSON response"):
+            list(iter_json_array([b'{"other": []}'], ("jobs",)))
+
+    def test_null_array(self):
+        with self.assertRaisesMessage(ValueError, "jobs is null"):
+            list(iter_json_array([b'{"jobs": null}'], ("jobs",)))
+
+    def test_not_an_array(self):
+        with self.assertRaises(ValueError):
+            list(iter_json_array([b'{"jobs": {}}'], ("jobs",)))
+
+    def test_truncated_document(self):
+        with self.assertRaises(ValueError):
+            list(iter_json_array([b'[{"id": 1}, {"id"'], ()))
+
+
+def posting(ext_id, title="Engineer"):
+    return {"external_job_id": ext_id, "title": title, "apply_url": f"https://jobs.example.com/{ext_id}"}
+
+
+class StreamingIngestTests(TestCase):
+    comp = {"name": "Acme", "platform": "greenhouse", "handle": "acme"}
+
+    def setUp(self):
+        ingest.ingest_company(self.comp, jobs_data=[posting("old"), posting("kept")])
+
+    def stream(self, postings, fail=False):
+        yield from postings
+        if fail:
+            # Fetchers record their error and stop early
+            instrumentation.record_error(ConnectionError("reset"))
+
+    def ingest(self, postings, fail=False, limit=None):
+        run = instrumentation.RunMetrics()
+        with instrumentation.activate(run), run.track_company("Acme", "greenhouse") as metrics:
+            rows = ingest.ingest_company(self.comp, jobs_data=ingest.Postings(self.stream(postings, fail), limit=limit))
+        return rows, metrics, set(Job.objects.filter(is_active=True).values_list("external_job_id", flat=True))
+
+    def test_batched(self):
+        self.assertEqual(list(ingest.batched(range(5), 2)), [[0, 1], [2, 3], [4]])
+        self.assertEqual(list(ingest.batched([], 2)), [])
+
+    def test_complete_stream_deactivates_missing_jobs(self):
+        rows, metrics, active = self.ingest([posting("kept"), posting("new")])
+        self.assertEqual((rows, metrics.postings_fetched), (2, 2))
+        self.assertEqual(active, {"kept", "new"})
+
+    def test_failed_stream_deactivates_nothing(self):
+        with self.assertLogs("jobs.ingest", "WARNING"):
+            rows, metrics, active = self.ingest([posting("new")], fail=True)
+        self.assertEqual(rows, 1)
+        self.assertEqual(active, {"old", "kept", "new"})
+
+    def test_batches_written_before_a_crash_are_kept(self):
+        def stream():
+            yield from (posting(f"new-{i}") for i in range(ingest.BATCH_SIZE))
+            raise ConnectionError("reset")
+
+        with self.assertRaises(ConnectionError):
+            ingest.ingest_company(self.comp, jobs_data=stream())
+        # The first batch committed on its own, and nothing was deactivated
+        self.assertEqual(Job.objects.filter(is_active=True).count(), ingest.BATCH_SIZE + 2)
+
+    def test_max_postings_stops_early(self):
+        rows, metrics, active = self.ingest([posting("kept"), posting("new"), posting("extra")], limit=2)
+        self.assertEqual(rows, 2)
+        self.assertNotIn("extra", active)
+
+
+class DeactivationTests(TestCase):
+    comp = {"name": "Acme", "platform": "greenhouse", "handle": "acme"}
+
+    def setUp(self):
+        ingest.ingest_company(self.comp, jobs_data=[posting("stamped"), posting("kept")])
+        self.company = Company.objects.get(name="Acme")
+        # Rows from before last_seen_run existed, or saved outside ingest, have no stamp
+        Job.objects.create(company=self.company, title="Legacy", platform="greenhouse", external_job_id="legacy")
+        other = Company.objects.create(name="Globex")
+        Job.objects.create(company=other, title="Other", platform="greenhouse", external_job_id="other")
+
+    def ingest(self, postings, **kwargs):
+        run = instrumentation.RunMetrics()
+        with instrumentation.activate(run), run.track_company("Acme", "greenhouse") as metrics:
+            ingest.ingest_company(self.comp, jobs_data=postings, **kwargs)
+        return metrics
+
+    def active(self):
+        return set(Job.objects.filter(is_active=True).values_list("external_job_id", flat=True))
+
+    def test_rows_not_stamped_by_the_pass_are_deactivated(self):
+        metrics = self.ingest([posting("kept")])
+        self.assertEqual(self.active(), {"kept", "other"})
+        self.assertEqual(metrics.rows_deactivated, 2)
+        # Already inactive rows are left alone, and not counted again
+        metrics = self.ingest([posting("kept")])
+        self.assertEqual(metrics.rows_deactivated, 0)
+
+    def test_seen_rows_stay_active_with_the_new_stamp(self):
+        before = Job.objects.get(external_job_id="kept")
+        self.ingest([posting("kept"), posting("stamped", title="Senior Engineer")])
+        self.assertEqual(self.active(), {"kept", "stamped", "other"})
+        stamps = set(Job.objects.filter(company=self.company, is_active=True).values_list("last_seen_run", flat=True))
+        self.assertEqual(len(stamps), 1)
+        self.assertNotEqual(stamps, {before.last_seen_run})
+        # A changed row gets a new change_seq, an unchanged one keeps its own
+        self.assertGreater(Job.objects.get(external_job_id="stamped").change_seq, before.change_seq)
+        self.assertEqual(Job.objects.get(external_job_id="kept").change_seq, before.change_seq)
+
+    def test_deactivated_rows_get_a_new_change_seq(self):
+        before = changes.next_seq()
+        self.ingest([posting("kept"), posting("stamped")])
+        legacy = Job.objects.get(external_job_id="legacy")
+        self.assertFalse(legacy.is_active)
+        self.assertGreater(legacy.change_seq, before)
+        self.assertLess(Job.objects.get(external_job_id="other").change_seq or 0, before)
+
+    def test_incomplete_pass_deactivates_nothing(self):
+        with self.assertLogs("jobs.ingest", "WARNING"):
+            metrics = self.ingest([posting("kept")], complete=False)
+        self.assertEqual(self.active(), {"stamped", "kept", "legacy", "other"})
+        self.assertEqual(metrics.rows_deactivated, 0)
+
+    def test_pass_with_failed_rows_deactivates_nothing(self):
+        board_pass = ingest.BoardPass()
+        board_pass.seen, board_pass.failed = 1, 1
+        with self.assertLogs("jobs.ingest", "WARNING"):
+            ingest.deactivate_missing(self.comp, self.company, board_pass, complete=True)
+        self.assertEqual(self.active(), {"stamped", "kept", "legacy", "other"})
+
+
+class CompanyResolverTests(TestCase):
+
+    def test_name_variants_resolve_to_one_company(self):
+        acme = Company.objects.create(name="Acme Corp", logo="https://example.com/acme.png")
+        resolved = companies.CompanyResolver().resolve({
+            "Acme Corp": {}, "  ACME   corp ": {}, "acme\tcorp": {}, "": {},
+        })
+        self.assertEqual(set(resolved), {"Acme Corp", "  ACME   corp ", "acme\tcorp"})
+        self.assertEqual({company.id for company in resolved.values()}, {acme.id})
+        self.assertEqual(Company.objects.count(), 1)
+
+    def test_one_query_per_batch(self):
+        resolver = companies.CompanyResolver()
+        names = {f"Company {i}": {"platform": "jobsge", "logo": "https://example.com/logo.png"} for i in range(50)}
+        # Load, create the missing companies, read back their ids
+        with self.assertNumQueries(3):
+            resolved = resolver.resolve(names)
+        self.assertEqual(len({company.id for company in resolved.values()}), 50)
+        with self.assertNumQueries(0):
+            self.assertEqual(resolver.resolve({"company 7": {}})["company 7"], resolved["Company 7"])
+
+    def test_missing_logos_are_filled_in(self):
+        acme = Company.objects.create(name="Acme")
+        resolved = companies.CompanyResolver().resolve({"Acme": {"logo": "https://example.com/acme.png"}})
+        self.assertEqual(resolved["Acme"].logo, "https://example.com/acme.png")
+        acme.refresh_from_db()
+        self.assertEqual(acme.logo, "https://example.com/acme.png")
+
+    def test_company_created_since_the_load_is_reused(self):
+        resolver = companies.CompanyResolver()
+        resolver.resolve({})
+        # Another process creates the company after this resolver loaded
+        acme = Company.objects.create(name="Acme", logo="https://example.com/acme.png")
+        resolved = resolver.resolve({"Acme": {"platform": "greenhouse"}})
+        self.assertEqual(resolved["Acme"].id, acme.id)
+        self.assertEqual(Company.objects.count(), 1)
+
+
+class PostingTests(SimpleTestCase):
+
+    def test_from_dict(self):
+        legacy = as_posting({
+            "title": "Engineer", "apply_link": "https://example.com/1", "posting_date": "2025-06-10", "source": "rss",
+        })
+        self.assertEqual(legacy.external_job_id, "https://example.com/1")
+        self.assertEqual((legacy.apply_url, legacy.posted_at, legacy.platform), ("https://example.com/1", "2025-06-10", "rss"))
+        self.assertEqual(legacy.raw, {})
+        self.assertEqual(as_posting({"id": 42, "title": "QA"}, "lever").external_job_id, "42")
+        self.assertEqual(as_posting({"id": 42}, "lever").platform, "lever")
+        self.assertIs(as_posting(legacy), legacy)
+
+    def test_slotted(self):
+        posting = Posting(title="Engineer", apply_url="https://example.com/2")
+        self.assertEqual(posting.external_job_id, "https://example.com/2")
+        with self.assertRaises(AttributeError):
+            posting.posting_date = "2025-06-10"
+
+    def test_fetch_postings_uses_the_registry(self):
+        calls = []
+
+        def fetch_feed(target, company_name, selector=None):
+            calls.append((target, company_name, selector))
+            yield Posting(external_job_id="1", title="Engineer")
+
+        registry = {"feed": fetchers.Fetcher(fetch_feed, source="url", options=("selector",))}
+        with mock.patch.dict(fetchers.FETCHERS, registry):
+            comp = {"name": "Acme", "platform": "feed", "handle": "acme", "url": "https://example.com/jobs", "selector": "a.job"}
+            self.assertEqual([p.title for p in ingest.fetch_postings(comp)], ["Engineer"])
+            list(ingest.fetch_postings({"name": "Acme", "platform": "feed", "handle": "acme"}))
+        self.assertEqual(calls, [("https://example.com/jobs", "Acme", "a.job"), ("acme", "Acme", None)])
+
+        with self.assertLogs("jobs.ingest", "WARNING"):
+            self.assertIsNone(ingest.fetch_postings({"name": "Acme", "platform": "unknown"}))
+        for platform in ("greenhouse", "lever", "ashby", "workable", "smartrecruiters", "rss", "career_page", "jobs.ge"):
+            self.assertIn(platform, fetchers.FETCHERS)
+
+
+class ParseTimestampTests(SimpleTestCase):
+
+    def assertMatchesDateutil(self, value, platform=None):
+        expected = date_parser.parse(value)
+        if expected.tzinfo is None:
+            expected = expected.replace(tzinfo=dt_timezone.utc)
+        parsed = parse_timestamp(value, platform)
+        self.assertEqual(parsed, expected)
+        self.assertIsNotNone(parsed.tzinfo)
+
+    def test_strings_match_dateutil(self):
+        cases = [
+            ("2025-06-10T09:30:00Z", None),
+            ("2025-06-10T09:30:00.000Z", "smartrecruiters"),
+            ("2025-06-10T09:30:00.123456+04:00", "greenhouse"),
+            ("2025-06-10T09:30:00-05:30", "ashby"),
+            ("2025-06-10 09:30:00", None),
+            ("2025-06-10", None),
+            ("Tue, 10 Jun 2025 09:30:00 GMT", "rss"),
+            ("Tue, 10 Jun 2025 09:30:00 +0400", "workable"),
+            ("Tue, 10 Jun 2025 09:30:00 GMT", "greenhouse"),
+            ("2025-06-10T09:30:00Z", "rss"),
+            ("June 10, 2025 9:30 AM", None),
+        ]
+        for value, platform in cases:
+            with self.subTest(value=value, platform=platform):
+                self.assertMatchesDateutil(value, platform)
+
+    def test_generated_upstream_timestamps(self):
+        rng = random.Random(7)
+        now = timezone.now()
+        for platform in datagen.PLATFORMS + ["rss"]:
+            for _ in range(20):
+                value = datagen.upstream_timestamp(rng, platform, now)
+                with self.subTest(value=value, platform=platform):
+                    if isinstance(value, int):
+                        self.assertEqual(parse_timestamp(value, platform).timestamp(), value / 1000)
+                    else:
+                        self.assertMatchesDateutil(value, platform)
+
+    def test_epoch_seconds_and_milliseconds(self):
+        expected = datetime(2025, 6, 10, 9, 30, tzinfo=dt_timezone.utc)
+        seconds = int(expected.timestamp())
+        for value in (seconds, seconds * 1000, str(seconds), str(seconds * 1000), float(seconds)):
+            with self.subTest(value=value):
+                self.assertEqual(parse_timestamp(value, "lever"), expected)
+
+    def test_passthrough_and_garbage(self):
+        naive = datetime(2025, 6, 10, 9, 30)
+        self.assertEqual(parse_timestamp(naive), naive.replace(tzinfo=dt_timezone.utc))
+        for value in (None, "", 0, True, "not a date", "2025-13-45", "9" * 30):
+            with self.subTest(value=value):
+                self.assertIsNone(parse_timestamp(value))
+
+
+class IngestWriterTests(TransactionTestCase):
+
+    def create_company(self, name):
+        return Company.objects.create(name=name).name
+
+    def test_queued_writes_commit_in_one_transaction(self):
+        writer = IngestWriter()
+        futures = [writer.submit(self.create_company, name, size=10) for name in ("Acme", "Globex", "Initech")]
+        with writer:
+            pass
+        self.assertEqual([future.result() for future in futures], ["Acme", "Globex", "Initech"])
+        self.assertEqual(writer.transactions, 1)
+        self.assertEqual(Company.objects.count(), 3)
+
+    def test_groups_are_capped_by_postings(self):
+        writer = IngestWriter(group_postings=20)
+        futures = [writer.submit(self.create_company, f"Company {i}", size=10) for i in range(5)]
+        with writer:
+            pass
+        self.assertEqual(len([future.result() for future in futures]), 5)
+        self.assertEqual(writer.transactions, 3)
+
+    def test_exceptions_reach_the_caller(self):
+        with IngestWriter() as writer:
+            writer.submit(self.create_company, "Acme").result()
+            with self.assertLogs("jobs.writer", "ERROR"), self.assertRaises(IntegrityError):
+                writer.submit(self.create_company, "Acme").result()
+        self.assertEqual(Company.objects.count(), 1)
+
+    def test_failed_write_only_rolls_back_itself(self):
+        writer = IngestWriter()
+        futures = [writer.submit(self.create_company, name) for name in ("Acme", "Acme", "Globex")]
+        with self.assertLogs("jobs.writer", "ERROR"), writer:
+            pass
+        self.assertEqual(futures[0].result(), "Acme")
+        with self.assertRaises(IntegrityError):
+            futures[1].result()
+        self.assertEqual(futures[2].result(), "Globex")
+        self.assertEqual(writer.transactions, 1)
+        self.assertEqual(sorted(Company.objects.values_list("name", flat=True)), ["Acme", "Globex"])
+
+    def test_ingest_through_the_writer(self):
+        comp = {"name": "Acme", "platform": "greenhouse", "handle": "acme"}
+        run = instrumentation.RunMetrics()
+        with IngestWriter() as writer, instrumentation.activate(run), \
+                run.track_company("Acme", "greenhouse") as metrics:
+            rows = ingest.ingest_company(comp, jobs_data=[posting("1"), posting("2")], writer=writer)
+        self.assertEqual(rows, 2)
+        self.assertEqual(metrics.rows_upserted, 2)
+        self.assertEqual(Job.objects.filter(company__name="Acme", is_active=True).count(), 2)
+
+
+class StorageProfileTests(SimpleTestCase):
+
+    def connect(self):
+        settings_dict = dict(connections.databases["default"], NAME=os.path.join(tempfile.mkdtemp(), "db.sqlite3"))
+        connection = DatabaseWrapper(settings_dict, alias="profile-test")
+        self.addCleanup(connection.close)
+        return connection
+
+    def pragma(self, connection, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f"PRAGMA {name}")
+            return cursor.fetchone()[0]
+
+    def test_profiles(self):
+        self.assertEqual(db.pragmas("default"), {})
+        self.assertEqual(db.pragmas("production")["journal_mode"], "WAL")
+        with self.assertRaises(ImproperlyConfigured):
+            db.pragmas("fast")
+        with override_settings(DB_PROFILE="production"):
+            self.assertIs(db.pragmas(), db.PROFILES["production"])
+
+    def test_apply_and_undo_production_profile(self):
+        connection = self.connect()
+        db.apply_profile(connection, "production")
+        self.assertEqual(self.pragma(connection, "journal_mode"), "wal")
+        self.assertEqual(self.pragma(connection, "synchronous"), 1)
+        self.assertEqual(self.pragma(connection, "busy_timeout"), 10000)
+
+        db.apply_pragmas(connection, db.SQLITE_DEFAULTS)
+        self.assertEqual(self.pragma(connection, "journal_mode"), "delete")
+        self.assertEqual(self.pragma(connection, "synchronous"), 2)
+
+
+class ReadReplicaTests(TransactionTestCase):
+    """
+    Runs with a "replica" alias that mirrors "default" under test, like the
+    one settings.py adds for DB_READ_REPLICA.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        connections.settings[routers.REPLICA] = {
+            **connections[routers.PRIMARY].settings_dict,
+            "TEST": {"MIRROR": routers.PRIMARY},
+        }
+
+    @classmethod
+    def tearDownClass(cls):
+        connections[routers.REPLICA].close()
+        del connections[routers.REPLICA]
+        del connections.settings[routers.REPLICA]
+        super().tearDownClass()
+
+    def setUp(self):
+        self.company = Company.objects.create(name="Acme")
+        self.job = Job.objects.create(company=self.company, title="Engineer", platform="greenhouse", external_job_id="gh-1")
+
+    def make_stale(self):
+        Job.objects.filter(pk=self.job.pk).update(fetched_at=timezone.now() - timedelta(minutes=5))
+
+    def job_queries(self, alias, url):
+        with CaptureQueriesContext(connections[alias]) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return [query["sql"] for query in queries if '"jobs_job"' in query["sql"]]
+
+    def test_reads_go_to_the_replica_only_when_asked(self):
+        self.assertEqual(Job.objects.all().db, routers.PRIMARY)
+        with routers.reading_replica():
+            self.assertEqual(Job.objects.all().db, routers.REPLICA)
+            self.assertEqual(Job.objects.using(routers.PRIMARY).db, routers.PRIMARY)
+            self.assertEqual(self.job.company.jobs.all().db, routers.REPLICA)
+        self.assertEqual(Job.objects.all().db, routers.PRIMARY)
+
+    def test_writes_go_to_the_primary(self):
+        router = routers.ReadReplicaRouter()
+        with routers.reading_replica():
+            self.assertEqual(router.db_for_write(Job), routers.PRIMARY)
+            self.assertEqual(Job.objects.filter(pk=self.job.pk).update(title="Lead"), 1)
+            self.assertTrue(router.allow_migrate(routers.PRIMARY, "jobs"))
+            self.assertFalse(router.allow_migrate(routers.REPLICA, "jobs"))
+
+    def test_api_reads_use_the_replica(self):
+        self.make_stale()
+        url = f"/api/job-details?job_id={self.job.pk}"
+        self.assertEqual(self.job_queries(routers.PRIMARY, url), [])
+        self.assertEqual(len(self.job_queries(routers.REPLICA, url)), 1)
+        self.assertTrue(self.job_queries(routers.REPLICA, "/api/search"))
+
+    @override_settings(REPLICA_LAG_SECONDS=60)
+    def test_recently_written(self):
+        now = timezone.now()
+        self.assertTrue(routers.recently_written(now - timedelta(seconds=30)))
+        self.assertFalse(routers.recently_written(now - timedelta(seconds=90)))
+        self.assertFalse(routers.recently_written(None))
+
+    def test_recently_written_job_falls_back_to_the_primary(self):
+        url = f"/api/job-details?job_id={self.job.external_job_id}"
+        self.assertEqual(len(self.job_queries(routers.PRIMARY, url)), 1)
+        self.assertEqual(self.client.get(url).json()["title"], "Engineer")
+
+    def test_missing_job_falls_back_to_the_primary(self):
+        self.make_stale()
+        searched = []
+
+        def find_job(jobs, job_id):
+            searched.append(jobs.db)
+            return self.job if jobs.db == routers.PRIMARY else None
+
+        with mock.patch.object(JobDetailsView, "find_job", side_effect=find_job):
+            response = self.client.get("/api/job-details?job_id=gh-1")
+        self.assertEqual(response.json()["title"], "Engineer")
+        self.assertEqual(searched, [routers.REPLICA, routers.PRIMARY])
+
+    def test_export_stays_on_the_replica_after_dispatch(self):
+        response = self.client.get("/api/export")
+        # The body is produced after the view returned, outside reading_replica()
+        with CaptureQueriesContext(connections[routers.PRIMARY]) as primary, \
+                CaptureQueriesContext(connections[routers.REPLICA]) as replica:
+            lines = b"".join(response.streaming_content).splitlines()
+        self.assertEqual([json.loads(line)["id"] for line in lines], [self.job.pk])
+        self.assertEqual(len(primary), 0)
+        self.assertEqual(len(replica), 1)
+
+    def test_read_only_connections_keep_the_journal_mode(self):
+        replica = dict(connections[routers.REPLICA].settings_dict, NAME="file:/tmp/replica.sqlite3?mode=ro")
+        self.assertTrue(db.read_only(mock.Mock(settings_dict=replica)))
+        self.assertFalse(db.read_only(connections[routers.PRIMARY]))
+
+
+class ArchiveTests(TestCase):
+
+    def setUp(self):
+        self.comp = {"name": "Acme", "platform": "greenhouse", "handle": "acme"}
+        rng = random.Random(0)
+        now = timezone.now()
+        self.postings = [datagen.posting_dict(rng, "Acme", "greenhouse", i, now) for i in range(3)]
+        ingest.ingest_company(self.comp, jobs_data=self.postings)
+        self.gone = Job.objects.get(external_job_id=self.postings[0]["external_job_id"])
+        # The board stops listing the first posting
+        ingest.ingest_company(self.comp, jobs_data=self.postings[1:])
+        self.assertFalse(Job.objects.get(pk=self.gone.pk).is_active)
+        Job.objects.filter(pk=self.gone.pk).update(fetched_at=now - timedelta(days=archive.RETENTION_DAYS + 1))
+
+    def test_archives_only_long_inactive_jobs(self):
+        self.assertEqual(archive.archive_inactive(compress=True), 1)
+        self.assertFalse(Job.objects.filter(pk=self.gone.pk).exists())
+        self.assertEqual(Job.objects.filter(is_active=True).count(), 2)
+        row = ArchivedJob.objects.get()
+        self.assertEqual(row.original_id, self.gone.pk)
+        self.assertIsNone(row.description)
+        self.assertEqual(zlib.decompress(row.description_compressed).decode("utf-8"), self.gone.description)
+
+    def test_reappearing_job_is_restored_under_its_old_id(self):
+        archive.archive_inactive()
+        before = changes.next_seq()
+
+        ingest.ingest_company(self.comp, jobs_data=self.postings)
+        job = Job.objects.get(external_job_id=self.postings[0]["external_job_id"])
+        self.assertEqual(job.pk, self.gone.pk)
+        self.assertTrue(job.is_active)
+        self.assertEqual(job.title, self.postings[0]["title"])
+        self.assertGreater(job.change_seq, before)
+        self.assertFalse(ArchivedJob.objects.exists())
+        self.assertEqual(Job.objects.filter(is_active=True).count(), 3)
+
+    def test_archive_jobs_command(self):
+        out = io.StringIO()
+        call_command("archive_jobs", "--purge-raw-days", "0", stdout=out)
+        self.assertIn("Archived 1 job(s)", out.getvalue())
+        self.assertEqual(ArchivedJob.objects.get().original_id, self.gone.pk)
+        with self.assertRaises(CommandError):
+            call_command("archive_jobs", "--days", "-1")
+
+    def test_purge_raw_keeps_active_jobs(self):
+        Job.objects.filter(pk=self.gone.pk).update(raw={"id": "gone"})
+        before = changes.current_seq()
+        self.assertEqual(archive.purge_raw(), 1)
+        purged = Job.objects.get(pk=self.gone.pk)
+        self.assertIsNone(purged.raw)
+        self.assertGreater(purged.change_seq, before)
+        self.assertFalse(Job.objects.filter(is_active=True, raw=None).exists())
+        # Nothing left to purge: the data version stays
+        self.assertEqual(archive.purge_raw(), 0)
+        self.assertEqual(changes.current_seq(), purged.change_seq)
+
+    def test_archiving_bumps_the_data_version(self):
+        url = f"/api/job-details?job_id={self.gone.external_job_id}"
+        etag = self.client.get(url)["ETag"]
+        archive.archive_inactive()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 404)
+        before = changes.current_seq()
+        self.assertEqual(archive.archive_inactive(), 0)
+        self.assertEqual(changes.current_seq(), before)
+
+
+class ChangesTests(TestCase):
+
+    def create_jobs(self, seqs):
+        company = Company.objects.create(name="Acme")
+        return [
+            Job.objects.create(
+                title=f"Job {i}", company=company, platform="greenhouse", external_job_id=str(i), change_seq=seq,
+            ).pk
+            for i, seq in enumerate(seqs)
+        ]
+
+    def test_parse_cursor(self):
+        self.assertEqual(changes.parse_cursor(""), (0, 0))
+        self.assertEqual(changes.parse_cursor(None), (0, 0))
+        self.assertEqual(changes.parse_cursor("5"), (5, None))
+        self.assertEqual(changes.parse_cursor(" 5:10 "), (5, 10))
+        self.assertEqual(changes.parse_cursor(changes.format_cursor(7, 3)), (7, 3))
+        for value in ("x", "5:x", "-1", "5:-2", "5:10:1", ":3"):
+            with self.subTest(value=value), self.assertRaises(ValueError):
+                changes.parse_cursor(value)
+
+    def test_next_seq(self):
+        first = changes.next_seq()
+        self.assertEqual(changes.next_seq(), first + 1)
+        self.assertEqual(changes.current_seq(), first + 1)
+        self.assertEqual(changes.data_version()[0], first + 1)
+
+    def test_pages_across_shared_change_seq(self):
+        ids = self.create_jobs([1, 1, 1, 2, 3, 3])
+        seen, cursor, pages = [], (0, 0), 0
+        while True:
+            page = changes.changes_after(cursor, limit=2)
+            if not page:
+                break
+            pages += 1
+            seen += [job.pk for job in page]
+            last = page[-1]
+            cursor = changes.parse_cursor(changes.format_cursor(last.change_seq, last.pk))
+        self.assertEqual(seen, ids)
+        self.assertEqual(pages, 3)
+
+        # A bare sequence number means everything changed after it
+        self.assertEqual([job.pk for job in changes.changes_after((1, None))], ids[3:])
+        self.assertEqual([job.pk for job in changes.changes_after((3, None))], [])
+
+    def test_rows_saved_one_by_one_get_their_own_change_seq(self):
+        bulk_create = Job.objects.bulk_create
+
+        def fail_batches(jobs, **kwargs):
+            if len(jobs) > 1:
+                raise IntegrityError("batch failed")
+            return bulk_create(jobs, **kwargs)
+
+        before = changes.next_seq()
+        comp = {"name": "Acme", "platform": "greenhouse", "handle": "acme"}
+        with mock.patch.object(Job.objects, "bulk_create", side_effect=fail_batches), \
+                self.assertLogs("jobs.ingest", "WARNING"):
+            self.assertEqual(ingest.ingest_company(comp, jobs_data=[posting("1"), posting("2")]), 2)
+        # The batch's number was rolled back with it: each row took a fresh one
+        seqs = sorted(Job.objects.values_list("change_seq", flat=True))
+        self.assertEqual(seqs, [before + 1, before + 2])
+        self.assertEqual(changes.current_seq(), before + 2)
+
+    def test_changes_endpoint(self):
+        ids = self.create_jobs([1, 2, 3])
+        Job.objects.filter(pk=ids[1]).update(is_active=False)
+        first = self.client.get("/api/changes?limit=2").json()
+        self.assertEqual([job["id"] for job in first["results"]], ids[:2])
+        self.assertFalse(first["results"][1]["is_active"])
+        self.assertTrue(first["has_more"])
+        rest = self.client.get("/api/changes", {"since": first["next_cursor"]}).json()
+        self.assertEqual([job["id"] for job in rest["results"]], ids[2:])
+        self.assertFalse(rest["has_more"])
+        # Nothing new: the cursor comes back unchanged
+        done = self.client.get("/api/changes", {"since": rest["next_cursor"]}).json()
+        self.assertEqual((done["results"], done["next_cursor"]), ([], rest["next_cursor"]))
+        self.assertEqual(self.client.get("/api/changes?since=x").status_code, 400)
+
+
+class ExportTests(TestCase):
+
+    def setUp(self):
+        company = Company.objects.create(name="Acme")
+        self.active = [
+            Job.objects.create(
+                title=f"Job {i}", company=company, platform="greenhouse", external_job_id=str(i),
+                description="Line one\nLine two", posted_at=timezone.now(),
+            ).pk
+            for i in range(3)
+        ]
+        Job.objects.create(title="Gone", company=company, platform="greenhouse", external_job_id="gone", is_active=False)
+
+    def records(self, body):
+        return [json.loads(line) for line in body.decode("utf-8").splitlines()]
+
+    def test_one_active_job_per_line(self):
+        response = self.client.get("/api/export")
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        records = self.records(b"".join(response.streaming_content))
+        self.assertEqual([record["id"] for record in records], self.active)
+        self.assertEqual(records[0]["description"], "Line one\nLine two")
+        self.assertEqual(records[0]["company_name"], "Acme")
+        self.assertNotIn("raw", records[0])
+
+    def test_gzip_decompresses_to_the_same_lines(self):
+        plain = b"".join(self.client.get("/api/export").streaming_content)
+        response = self.client.get("/api/export?gzip=1")
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="jobs.ndjson.gz"')
+        self.assertEqual(gzip.decompress(b"".join(response.streaming_content)), plain)
+
+    def test_rows_are_read_in_chunks(self):
+        with mock.patch.object(QuerySet, "iterator", autospec=True, side_effect=QuerySet.iterator) as iterator, \
+                mock.patch.object(export, "BUFFER_BYTES", 1):
+            chunks = list(export.iter_ndjson(export.active_jobs(), chunk_size=2))
+        iterator.assert_called_once_with(mock.ANY, chunk_size=2)
+        self.assertEqual(len(chunks), 3)
+
+    def test_export_jobs_command(self):
+        path = os.path.join(tempfile.mkdtemp(), "jobs.ndjson.gz")
+        out = io.StringIO()
+        call_command("export_jobs", "--output", path, "--chunk-size", "1", stdout=out)
+        self.assertIn(f"Active jobs written to {path}", out.getvalue())
+        with gzip.open(path, "rb") as fh:
+            self.assertEqual([record["id"] for record in self.records(fh.read())], self.active)
+        with self.assertRaises(CommandError):
+            call_command("export_jobs", "--chunk-size", "0")
+
+
+@override_settings(MEDIA_URL="/media/", SNAPSHOT_SEARCH_PAGES=2)
+class SnapshotTests(TestCase):
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root))
+        self.enterContext(mock.patch.object(snapshots, "_manifest_cache", (None, None)))
+        comp = {"name": "Acme", "platform": "greenhouse", "handle": "acme"}
+        ingest.ingest_company(comp, jobs_data=[posting(str(i)) for i in range(25)])
+
+    def get_without_job_queries(self, url, **headers):
+        # Answered from the snapshot: nothing but the version check runs
+        with CaptureQueriesContext(connections["default"]) as queries:
+            response = self.client.get(url, **headers)
+        self.assertFalse([query["sql"] for query in queries if '"jobs_job"' in query["sql"]])
+        return response
+
+    def live(self, url):
+        with override_settings(SNAPSHOT_MODE="off"):
+            return self.client.get(url).content
+
+    def test_build_writes_the_rendered_responses(self):
+        manifest = snapshots.build()
+        self.assertEqual(manifest["version"], changes.current_seq())
+        self.assertEqual(manifest["names"], ["directory", "search-page-1", "search-page-2"])
+        directory = snapshots.root() / str(manifest["version"])
+        for name, url in (("directory", "/api/"), ("search-page-2", "/api/search?page=2")):
+            body = (directory / f"{name}.json").read_bytes()
+            self.assertEqual(body, self.live(url))
+            self.assertEqual(gzip.decompress((directory / f"{name}.json.gz").read_bytes()), body)
+        self.assertEqual(snapshots.read_manifest(), manifest)
+        # Nothing changed since
+        self.assertIsNone(snapshots.build())
+
+    def test_prune_keeps_the_newest_versions(self):
+        versions = []
+        for _ in range(snapshots.KEEP_VERSIONS + 2):
+            changes.next_seq()
+            versions.append(snapshots.build()["version"])
+        kept = sorted(int(path.name) for path in snapshots.root().iterdir() if path.name.isdigit())
+        self.assertEqual(kept, versions[-snapshots.KEEP_VERSIONS:])
+        self.assertEqual(snapshots.read_manifest()["version"], versions[-1])
+
+    def test_concurrent_builds(self):
+        manifest = snapshots.build()
+        base = snapshots.root()
+        # Another worker published this version while this one was rendering it
+        with mock.patch.object(snapshots, "read_manifest", return_value=None):
+            manifest = snapshots.build()
+        # ...or a newer one: its manifest stays
+        newer = dict(manifest, version=manifest["version"] + 1)
+        with mock.patch.object(snapshots, "read_manifest", side_effect=[None, newer]):
+            self.assertIsNone(snapshots.build(force=True))
+        self.assertEqual(snapshots.read_manifest(), manifest)
+        self.assertEqual([path.name for path in base.iterdir() if path.is_dir()], [str(manifest["version"])])
+        self.assertFalse([path for path in base.iterdir() if path.name.endswith(".tmp")])
+
+    def test_prune_removes_staging_left_by_dead_builds(self):
+        snapshots.build()
+        base = snapshots.root()
+        dead, running = base / "7.dead.tmp", base / "7.running.tmp"
+        dead.mkdir()
+        running.mkdir()
+        long_ago = time.time() - snapshots.STALE_STAGING_SECONDS - 1
+        os.utime(dead, (long_ago, long_ago))
+        snapshots.prune()
+        self.assertFalse(dead.exists())
+        self.assertTrue(running.exists())
+
+    @override_settings(SNAPSHOT_MODE="redirect")
+    def test_redirect_mode(self):
+        version = snapshots.build()["version"]
+        response = self.get_without_job_queries("/api/search")
+        self.assertRedirects(
+            response, f"/media/snapshots/{version}/search-page-1.json", fetch_redirect_response=False,
+        )
+        self.assertEqual(self.client.get("/api/search?query=engineer").status_code, 200)
+
+    @override_settings(SNAPSHOT_MODE="serve")
+    def test_serve_mode(self):
+        snapshots.build()
+        response = self.get_without_job_queries("/api/", HTTP_ACCEPT_ENCODING="gzip, deflate")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertEqual(gzip.decompress(b"".join(response.streaming_content)), self.live("/api/"))
+        plain = self.client.get("/api/search?page=2")
+        self.assertEqual(b"".join(plain.streaming_content), self.live("/api/search?page=2"))
+        # Filtered and deeper pages are answered live
+        self.assertFalse(self.client.get("/api/search?page=3").streaming)
+        self.assertFalse(self.client.get("/api/search?country=us").streaming)
+        # ...and so is an empty filter, which the response echoes back
+        empty = self.client.get("/api/search?date_posted=")
+        self.assertFalse(empty.streaming)
+        self.assertEqual(empty.json()["filters"]["date_posted"], "")
+
+    @override_settings(SNAPSHOT_MODE="serve")
+    def test_serve_mode_negotiates_brotli(self):
+        # brotli isn't a dependency: build with a stand-in
+        with mock.patch.object(snapshots, "brotli", mock.Mock(compress=zlib.compress)):
+            snapshots.build()
+        response = self.get_without_job_queries("/api/", HTTP_ACCEPT_ENCODING="gzip, deflate, br")
+        self.assertEqual(response["Content-Encoding"], "br")
+        self.assertEqual(zlib.decompress(b"".join(response.streaming_content)), self.live("/api/"))
+        gzipped = self.client.get("/api/", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(gzipped["Content-Encoding"], "gzip")
+
+        # Built without brotli: gzip it is
+        changes.next_seq()
+        with mock.patch.object(snapshots, "brotli", None):
+            snapshots.build()
+        response = self.get_without_job_queries("/api/", HTTP_ACCEPT_ENCODING="br, gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(b"".join(response.streaming_content)), self.live("/api/"))
+
+    @override_settings(SNAPSHOT_MODE="serve")
+    def test_outdated_snapshot_is_not_served(self):
+        snapshots.build()
+        changes.next_seq()
+        response = self.client.get("/api/")
+        self.assertFalse(response.streaming)
+        self.assertEqual(response.content, self.live("/api/"))
+        # A build failure is logged, not raised
+        with mock.patch.object(snapshots, "build", side_effect=OSError("disk full")), \
+                self.assertLogs("jobs.snapshots", "ERROR"):
+            self.assertIsNone(snapshots.refresh())
+
+
+class FastPathTests(TestCase):
+    """The list endpoints' .values() rows + ORJSONRenderer match the serializers + JSONRenderer byte for byte."""
+
+    def setUp(self):
+        acme = Company.objects.create(name="Acme", domain="acme.com", logo="https://img.logo.dev/name/Acme?token=x")
+        globex = Company.objects.create(name="Globex Corp", logo="https://example.com/globex.png")
+        Company.objects.create(name="Initech")  # no active jobs
+        posted = datetime(2025, 6, 10, 9, 30, 15, 123456, tzinfo=dt_timezone.utc)
+        for company, title, description, posted_at, raw in (
+            (acme, "Engineer", "Line\u2028separator and\u2029paragraph", posted, {"id": 1, "tags": ["a\u2028b"]}),
+            (acme, "დეველოპერი", "თბილისი – €100 😀", posted.replace(microsecond=0), None),
+            (globex, 'Analyst "EU"', None, None, {"nested": {"float": 1.5, "none": None}}),
+        ):
+            Job.objects.create(
+                company=company, title=title, description=description, posted_at=posted_at, raw=raw,
+                platform="greenhouse", external_job_id=title, location="Tbilisi",
+            )
+        Job.objects.create(company=globex, title="Gone", platform="greenhouse", external_job_id="gone", is_active=False)
+
+    def assertRendersLike(self, rows, expected):
+        body = ORJSONRenderer().render(rows)
+        self.assertEqual(body, JSONRenderer().render(expected))
+        return body
+
+    def test_nested_job_rows(self):
+        jobs = Job.objects.filter(is_active=True).order_by("id")
+        body = self.assertRendersLike(
+            nested_job_rows(jobs.values(*NESTED_JOB_VALUES)),
+            NestedJobSerializer(jobs.select_related("company"), many=True).data,
+        )
+        self.assertIn(b"\\u2028", body)
+        self.assertNotIn("\u2029".encode("utf-8"), body)
+        self.assertIn(b'"2025-06-10T09:30:15.123456Z"', body)
+
+    def test_company_jobs_rows(self):
+        companies = Company.objects.filter(jobs__is_active=True).distinct().order_by("id")
+        job_rows = Job.objects.filter(is_active=True).values(*NESTED_JOB_VALUES, "company_id")
+        self.assertRendersLike(
+            company_jobs_rows(companies.values("id", "name", "domain", "logo", "platform"), job_rows),
+            CompanyJobsSerializer(companies, many=True).data,
+        )
+
+    def test_falls_back_to_json_renderer(self):
+        for data in ({"big": 2 ** 70}, {1: "non-string key"}):
+            with self.subTest(data=data):
+                self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+        context = {"indent": 2}
+        self.assertEqual(
+            ORJSONRenderer().render({"a": [1]}, renderer_context=context),
+            JSONRenderer().render({"a": [1]}, renderer_context=context),
+        )
+        self.assertEqual(ORJSONRenderer().render(None), b"")
+
+
+class DataVersionTests(TestCase):
+
+    def setUp(self):
+        company = Company.objects.create(name="Acme")
+        self.job = Job.objects.create(company=company, title="Engineer", platform="greenhouse", external_job_id="gh-1")
+        self.seq = changes.next_seq()
+        self.etag = f'W/"v{self.seq}"'
+
+    def test_etag_and_last_modified(self):
+        updated_at = changes.data_version()[1]
+        for url in ("/api/", "/api/search", f"/api/job-details?job_id={self.job.pk}", "/api/changes", "/api/export"):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response["ETag"], self.etag)
+                self.assertEqual(response["Last-Modified"], http_date(int(updated_at.timestamp())))
+                self.assertEqual(response["Cache-Control"], "no-cache")
+
+    def test_matching_validators_get_a_304_without_running_the_view(self):
+        last_modified = self.client.get("/api/search")["Last-Modified"]
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/search", HTTP_IF_NONE_MATCH=self.etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], self.etag)
+        self.assertEqual(self.client.get("/api/search", HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+        self.assertEqual(self.client.get("/api/search", HTTP_IF_NONE_MATCH='W/"v0"').status_code, 200)
+
+        changes.next_seq()
+        response = self.client.get("/api/search", HTTP_IF_NONE_MATCH=self.etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["ETag"], f'W/"v{self.seq + 1}"')
+
+    def test_date_posted_windows_are_not_versioned(self):
+        for window in ("today", "week", "month"):
+            with self.subTest(window=window):
+                response = self.client.get("/api/search", {"date_posted": window}, HTTP_IF_NONE_MATCH=self.etag)
+                self.assertEqual(response.status_code, 200)
+                self.assertFalse(response.has_header("ETag"))
+                self.assertFalse(response.has_header("Last-Modified"))
+        self.assertEqual(self.client.get("/api/search?date_posted=all")["ETag"], self.etag)
+
+    def test_errors_are_not_versioned(self):
+        response = self.client.get("/api/job-details?job_id=missing")
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(response.has_header("ETag"))
+
+
+class CompressionTests(SimpleTestCase):
+    body = json.dumps([{"id": i, "title": "Engineer"} for i in range(50)]).encode()
+
+    def compress(self, response, accept_encoding="gzip, deflate, br"):
+        request = RequestFactory().get("/api/search", HTTP_ACCEPT_ENCODING=accept_encoding)
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def json_response(self, body=None, **headers):
+        return HttpResponse(self.body if body is None else body, content_type="application/json", headers=headers)
+
+    def test_gzip(self):
+        with mock.patch("jobs.middleware.brotli", None):
+            response = self.compress(self.json_response(ETag='"v1"'))
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+        self.assertEqual(response["ETag"], 'W/"v1"')
+        self.assertEqual(gzip.decompress(response.content), self.body)
+
+    def test_brotli_when_accepted(self):
+        brotli = mock.Mock(compress=lambda data, quality: zlib.compress(data))
+        with mock.patch("jobs.middleware.brotli", brotli):
+            response = self.compress(self.json_response(ETag='"v1"'))
+            self.assertEqual(response["Content-Encoding"], "br")
+            self.assertEqual(response["Vary"], "Accept-Encoding")
+            self.assertEqual(response["ETag"], 'W/"v1"')
+            self.assertEqual(zlib.decompress(response.content), self.body)
+            self.assertEqual(response["Content-Length"], str(len(response.content)))
+
+            # "br" has to be a token of its own
+            response = self.compress(self.json_response(), accept_encoding="gzip, sbr")
+            self.assertEqual(response["Content-Encoding"], "gzip")
+            self.assertEqual(response["Vary"], "Accept-Encoding")
+
+    def test_left_alone(self):
+        brotli = mock.Mock(compress=lambda data, quality: zlib.compress(data))
+        with mock.patch("jobs.middleware.brotli", brotli):
+            small = self.compress(self.json_response(b'{"id": 1}'))
+            self.assertFalse(small.has_header("Content-Encoding"))
+            self.assertEqual(small.content, b'{"id": 1}')
+            html = self.compress(HttpResponse(self.body, content_type="text/html"))
+            self.assertFalse(html.has_header("Content-Encoding"))
+            encoded = self.compress(self.json_response(**{"Content-Encoding": "gzip"}))
+            self.assertEqual(encoded.content, self.body)
+            identity = self.compress(self.json_response(), accept_encoding="")
+            self.assertFalse(identity.has_header("Content-Encoding"))
+            self.assertEqual(identity["Vary"], "Accept-Encoding")
+
+    def test_streaming_is_gzipped(self):
+        response = self.compress(StreamingHttpResponse([self.body, b"\n"], content_type="application/x-ndjson"))
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(b"".join(response.streaming_content)), self.body + b"\n")
+
+
+class CheckLivenessTests(TestCase):
+
+    def setUp(self):
+        company = Company.objects.create(name="Acme")
+        for ext_id in ("live", "gone", "unreachable", "fresh"):
+            Job.objects.create(
+                company=company, title=ext_id, platform="greenhouse", external_job_id=ext_id,
+                apply_url=f"https://jobs.example.com/{ext_id}",
+            )
+        Job.objects.exclude(external_job_id="fresh").update(fetched_at=timezone.now() - timedelta(days=8))
+
+    def head(self, url, timeout):
+        if url.endswith("unreachable"):
+            raise requests.ConnectionError("unreachable")
+        return mock.Mock(status_code=404 if url.endswith("gone") else 200)
+
+    def test_dead_jobs_are_deactivated_with_a_change_seq(self):
+        before = changes.next_seq()
+        run = instrumentation.RunMetrics()
+        with mock.patch("jobs.management.commands.check_jobs.requests.head", side_effect=self.head) as head, \
+                instrumentation.activate(run), run.track_company("liveness-check", "http") as metrics:
+            self.assertEqual(CheckJobsCommand().check_liveness(), 3)
+        # Jobs fetched in the last week aren't checked
+        self.assertNotIn(mock.call("https://jobs.example.com/fresh", timeout=5), head.call_args_list)
+        self.assertEqual(metrics.rows_deactivated, 2)
+        self.assertEqual(
+            set(Job.objects.filter(is_active=True).values_list("external_job_id", flat=True)), {"live", "fresh"},
+        )
+        for job in Job.objects.filter(is_active=False):
+            self.assertGreater(job.change_seq, before)
+            self.assertGreater(job.fetched_at, timezone.now() - timedelta(minutes=1))
+        self.assertLess(Job.objects.get(external_job_id="live").fetched_at, timezone.now() - timedelta(days=7))
+        self.assertEqual(
+            [job["id"] for job in self.client.get("/api/changes", {"since": before}).json()["results"]],
+            list(Job.objects.filter(is_active=False).order_by("id").values_list("id", flat=True)),
+        )
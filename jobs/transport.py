@@ -0,0 +1,201 @@
+"""
+HTTP transport layer for the fetchers.
+
+All outbound fetcher traffic goes through one shared ``httpx.Client`` (which
+also gives us connection pooling across boards). Its transport can be swapped
+to run ingestion without the real ATS endpoints:
+
+- ``RedirectTransport`` sends every request to a local stand-in server (see
+  ``jobs.stub_server``), keeping the original host as the first path segment:
+  ``https://api.lever.co/v0/postings/x`` -> ``http://127.0.0.1:8765/api.lever.co/v0/postings/x``.
+- ``CassetteTransport`` records real responses to a JSON cassette file, or
+  replays them from it without touching the network.
+"""
+import base64
+import hashlib
+import json
+import os
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+import httpx
+
+_lock = threading.Lock()
+_client = None
+_config = {"base_url": None, "cassette": None, "cassette_mode": None}
+_timeout = ContextVar("fetch_timeout", default=None)
+
+
+class RedirectTransport(httpx.BaseTransport):
+    """Rewrite every request to ``base_url``/<original host>/<original path>."""
+
+    def __init__(self, base_url, inner=None):
+        self.base = httpx.URL(base_url)
+        self.inner = inner or httpx.HTTPTransport()
+
+    def rewrite(self, url):
+        prefix = self.base.raw_path.decode().rstrip("/")
+        path = f"{prefix}/{url.host}{url.raw_path.decode()}"
+        return httpx.URL(
+            scheme=self.base.scheme,
+            host=self.base.host,
+            port=self.base.port,
+            raw_path=path.encode(),
+        )
+
+    def handle_request(self, request):
+        request.url = self.rewrite(request.url)
+        request.headers["Host"] = request.url.netloc.decode()
+        return self.inner.handle_request(request)
+
+    def close(self):
+        self.inner.close()
+
+
+def cassette_key(method, url, body=b""):
+    key = f"{method} {url}"
+    if body:
+        key += " " + hashlib.sha1(body).hexdigest()[:16]
+    return key
+
+
+class CassetteTransport(httpx.BaseTransport):
+    """
+    Record responses into, or replay them from, a JSON cassette.
+
+    mode='record' forwards to ``inner`` and stores each response (latest wins);
+    mode='replay' never touches the network and raises ``httpx.ConnectError``
+    for requests that were not recorded, so fetchers treat them as failures.
+    """
+
+    def __init__(self, path, mode="replay", inner=None):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self.inner = inner or httpx.HTTPTransport()
+        self.interactions = load_cassette(path) if os.path.exists(path) else {}
+        self._lock = threading.Lock()
+
+    def handle_request(self, request):
+        body = request.read()
+        url = str(request.url)  # before any inner transport rewrites it
+        key = cassette_key(request.method, url, body)
+
+        if self.mode == "replay":
+            entry = self.interactions.get(key)
+            if entry is None:
+                raise httpx.ConnectError(f"No recorded response for {key}", request=request)
+            return httpx.Response(
+                status_code=entry["status"],
+                headers=entry["headers"],
+                content=decode_body(entry),
+                request=request,
+            )
+
+        response = self.inner.handle_request(request)
+        content = response.read()
+        with self._lock:
+            self.interactions[key] = encode_body({
+                "method": request.method,
+                "url": url,
+                "request_body": body.decode("utf-8", "replace"),
+                "status": response.status_code,
+                "headers": {
+                    k: v for k, v in response.headers.items()
+                    if k.lower() not in ("content-encoding", "content-length", "transfer-encoding")
+                },
+            }, content)
+            self.save()
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=response.headers,
+            content=content,
+            request=request,
+        )
+
+    def save(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as fh:
+            json.dump({"interactions": list(self.interactions.values())}, fh)
+        os.replace(tmp_path, self.path)
+
+    def close(self):
+        self.inner.close()
+
+
+def encode_body(entry, content):
+    try:
+        entry["body"] = content.decode("utf-8")
+        entry["encoding"] = "utf-8"
+    except UnicodeDecodeError:
+        entry["body"] = base64.b64encode(content).decode("ascii")
+        entry["encoding"] = "base64"
+    return entry
+
+
+def decode_body(entry):
+    if entry.get("encoding") == "base64":
+        return base64.b64decode(entry["body"])
+    return entry.get("body", "").encode("utf-8")
+
+
+def load_cassette(path):
+    """Cassette file -> {key: interaction}."""
+    with open(path) as fh:
+        data = json.load(fh)
+    interactions = {}
+    for entry in data.get("interactions", []):
+        body = entry.get("request_body", "").encode("utf-8")
+        interactions[cassette_key(entry["method"], entry["url"], body)] = entry
+    return interactions
+
+
+# ---------------------------
+# Shared client
+# ---------------------------
+
+def configure(base_url=None, cassette=None, cassette_mode="replay"):
+    """
+    Point all fetchers at a stub server and/or a cassette. Call with no
+    arguments to go back to talking to the real endpoints.
+    """
+    global _client
+    with _lock:
+        _config.update(base_url=base_url, cassette=cassette, cassette_mode=cassette_mode)
+        if _client is not None:
+            _client.close()
+            _client = None
+
+
+def build_transport():
+    transport = httpx.HTTPTransport(retries=0)
+    if _config["base_url"]:
+        transport = RedirectTransport(_config["base_url"], transport)
+    if _config["cassette"]:
+        transport = CassetteTransport(_config["cassette"], _config["cassette_mode"] or "replay", transport)
+    return transport
+
+
+def get_client():
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                _client = httpx.Client(transport=build_transport())
+    return _client
+
+
+@contextmanager
+def timeout(seconds):
+    """Override the timeout of every fetcher request made inside the block (None: keep defaults)."""
+    token = _timeout.set(seconds)
+    try:
+        yield
+    finally:
+        _timeout.reset(token)
+
+
+def effective_timeout(default):
+    return _timeout.get() or default
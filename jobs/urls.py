@@ -1,8 +1,11 @@
 from django.urls import path
-from .views import JobsGroupedByCompany, JobSearchView, JobDetailsView
+from .views import JobsGroupedByCompany, JobSearchView, JobDetailsView, JobChangesView, JobExportView, FetchStatsView
 
 urlpatterns = [
     path('', JobsGroupedByCompany.as_view(), name='jobs_grouped_by_company'),  # /api/ will point here
     path('search', JobSearchView.as_view(), name='job_search'),  # /api/search
     path('job-details', JobDetailsView.as_view(), name='job_details'),  # /api/job-details
+    path('changes', JobChangesView.as_view(), name='job_changes'),  # /api/changes
+    path('export', JobExportView.as_view(), name='job_export'),  # /api/export
+    path('fetch-stats', FetchStatsView.as_view(), name='fetch_stats'),  # /api/fetch-stats
 ]
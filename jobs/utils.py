@@ -1,16 +1,72 @@
-import httpx
+from datetime import datetime, timezone as dt_timezone
+from email.utils import parsedate_to_datetime
 from urllib.parse import urlparse
 from dateutil import parser as date_parser
 from bs4 import BeautifulSoup
 import re
+from . import instrumentation, transport
 
-def parse_date(s):
-    if not s:
+# Platforms whose timestamps are RFC 2822 ("Tue, 10 Jun 2025 09:30:00 GMT")
+RFC2822_PLATFORMS = {"rss", "workable"}
+# Epoch values above this are milliseconds (it is the year 5138 in seconds)
+EPOCH_MS_THRESHOLD = 10 ** 11
+
+
+def _aware(value):
+    return value if value.tzinfo else value.replace(tzinfo=dt_timezone.utc)
+
+
+def _from_epoch(value):
+    if value > EPOCH_MS_THRESHOLD:
+        value /= 1000
+    return datetime.fromtimestamp(value, tz=dt_timezone.utc)
+
+
+def _from_rfc2822(value):
+    try:
+        return parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
         return None
+
+
+def _from_iso(value):
     try:
-        return date_parser.parse(s)
-    except Exception:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return None
+
+
+def parse_timestamp(value, platform=None):
+    """
+    Parse an upstream timestamp into an aware datetime (UTC when it has no
+    offset), or None. Datetimes pass through and epoch seconds/milliseconds
+    (Lever) are converted directly; strings try ``datetime.fromisoformat`` and
+    RFC 2822, in the order likely for ``platform``, and only fall back to
+    dateutil when both fail.
+    """
+    if not value:
         return None
+    if isinstance(value, datetime):
+        return _aware(value)
+    with instrumentation.stage("date_parsing"):
+        try:
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                return _from_epoch(value)
+            value = str(value).strip()
+            if value.isdigit():
+                return _from_epoch(int(value))
+            if platform in RFC2822_PLATFORMS:
+                parsed = _from_rfc2822(value) or _from_iso(value)
+            else:
+                parsed = _from_iso(value) or _from_rfc2822(value)
+            return _aware(parsed or date_parser.parse(value))
+        except (ValueError, OverflowError, OSError):
+            return None
+
+
+def parse_date(s):
+    """parse_timestamp without a platform hint."""
+    return parse_timestamp(s)
 
 def robots_allowed(url, user_agent="*"):
     """
@@ -20,7 +76,7 @@ def robots_allowed(url, user_agent="*"):
     try:
         parsed = urlparse(url)
         robots_url = f"{parsed.scheme}://{parsed.netloc}/robots.txt"
-        r = httpx.get(robots_url, timeout=5)
+        r = transport.get_client().get(robots_url, timeout=5)
         if r.status_code != 200:
             return True  # assume allowed when robots missing
         txt = r.text.lower()
@@ -12,30 +12,90 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from django.db.models import Q, Prefetch
+from django.db.models import Q
+from django.http import StreamingHttpResponse
 from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
 from datetime import timedelta
 from urllib.parse import unquote
 import base64
 from .models import Company, Job
-from .serializers import CompanyJobsSerializer, NestedJobSerializer
+from .serializers import (
+    NESTED_JOB_VALUES, JobChangeSerializer, NestedJobSerializer, company_jobs_rows, nested_job_rows,
+)
+from . import changes, export, history, routers, snapshots
+from .middleware import timed
 
-class JobsGroupedByCompany(APIView):
+
+class ReplicaReadMixin:
+    """Reads made while handling the request go to the read replica, if one is configured."""
+
+    def dispatch(self, request, *args, **kwargs):
+        with routers.reading_replica():
+            return super().dispatch(request, *args, **kwargs)
+
+
+class DataVersionMixin:
+    """
+    GET responses carry a weak ETag and a Last-Modified for the data version
+    (changes.data_version), which every write to jobs bumps: ingestion,
+    check_jobs' liveness check and archive_jobs. A request whose
+    If-None-Match/If-Modified-Since still matches it gets a 304 Not Modified
+    without running the view. Cache-Control: no-cache has clients and proxies
+    revalidate every time instead of guessing how long a response stays fresh.
+    """
+
+    def versioned(self, request):
+        """Whether the response depends on nothing but the job data and the query string."""
+        return True
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD') or not self.versioned(request):
+            return super().dispatch(request, *args, **kwargs)
+
+        # Read before the data, so a concurrent ingestion can only make the tag older than the body
+        seq, updated_at = changes.data_version()
+        etag = f'W/"v{seq}"'
+        last_modified = int(updated_at.timestamp()) if updated_at else None
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = super().dispatch(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+        response.headers.setdefault('ETag', etag)
+        if last_modified is not None:
+            response.headers.setdefault('Last-Modified', http_date(last_modified))
+        if not response.has_header('Cache-Control'):
+            patch_cache_control(response, no_cache=True)
+        return response
+
+
+class JobsGroupedByCompany(ReplicaReadMixin, DataVersionMixin, APIView):
     """
     Returns jobs grouped by company.
     Only returns companies that have active jobs.
     """
 
     def get(self, request):
-        # Prefetch only active jobs and filter companies that have at least one active job
-        companies = Company.objects.prefetch_related(
-            Prefetch('jobs', queryset=Job.objects.filter(is_active=True))
-        ).filter(jobs__is_active=True).distinct()
-        serializer = CompanyJobsSerializer(companies, many=True)
-        return Response(serializer.data)
+        # Prerendered after each ingestion run (see jobs/snapshots.py)
+        snapshot = snapshots.response(snapshots.DIRECTORY, request)
+        if snapshot is not None:
+            return snapshot
+
+        # Companies that have at least one active job, and all active jobs in
+        # two queries; grouped into CompanyJobsSerializer's shape from plain rows
+        companies = list(
+            Company.objects.filter(jobs__is_active=True).distinct()
+            .values('id', 'name', 'domain', 'logo', 'platform')
+        )
+        job_rows = list(Job.objects.filter(is_active=True).values(*NESTED_JOB_VALUES, 'company_id'))
+        with timed("serialize"):
+            data = company_jobs_rows(companies, job_rows)
+        return Response(data)
 
 
-class JobSearchView(APIView):
+class JobSearchView(ReplicaReadMixin, DataVersionMixin, APIView):
     """
     Search endpoint for jobs with filtering and pagination.
     By default (no query parameters), shows all active jobs with pagination.
@@ -47,6 +107,10 @@ class JobSearchView(APIView):
     - num_pages: Number of results per page (default: 20, max: 100)
     """
 
+    def versioned(self, request):
+        # 'today', 'week' and 'month' windows move with the clock, not only with ingestion
+        return request.GET.get('date_posted', 'all').strip().lower() in ('', 'all')
+
     def get(self, request):
         from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
         
@@ -72,8 +136,15 @@ class JobSearchView(APIView):
         except (ValueError, TypeError):
             num_pages = 20
         
-        # Start with active jobs only, prefetch company for better performance
-        jobs = Job.objects.filter(is_active=True).select_related('company')
+        # The unfiltered first pages are prerendered after each ingestion run (see jobs/snapshots.py).
+        # An empty date_posted isn't one of them: its response echoes '' back where theirs has None
+        if not query and not country and date_posted == 'all' and num_pages == 20:
+            snapshot = snapshots.response(snapshots.search_page(page), request)
+            if snapshot is not None:
+                return snapshot
+        
+        # Start with active jobs only, as NestedJobSerializer's fields (company name/logo joined in)
+        jobs = Job.objects.filter(is_active=True).values(*NESTED_JOB_VALUES)
         
         # Apply filters only if provided
         # Filter by query (job title, description, and company name)
@@ -149,12 +220,13 @@ class JobSearchView(APIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
         
-        # Serialize jobs
-        serializer = NestedJobSerializer(page_obj.object_list, many=True)
+        # Serialize jobs (NestedJobSerializer's output, without its per-field overhead)
+        with timed("serialize"):
+            results = nested_job_rows(page_obj.object_list)
         
         # Prepare response
         response_data = {
-            'results': serializer.data,
+            'results': results,
             'pagination': {
                 'page': page,
                 'num_pages': num_pages,
@@ -173,7 +245,7 @@ class JobSearchView(APIView):
         return Response(response_data)
 
 
-class JobDetailsView(APIView):
+class JobDetailsView(ReplicaReadMixin, DataVersionMixin, APIView):
     """
     Get detailed information for a specific job.
     Query parameters:
@@ -203,29 +275,132 @@ class JobDetailsView(APIView):
         except Exception:
             pass
         
-        # Try to find job by primary key first
-        try:
-            job = Job.objects.select_related('company').get(id=int(job_id))
-        except (ValueError, Job.DoesNotExist):
-            # If not found by primary key, try external_job_id
-            try:
-                # Try exact match on external_job_id
-                job = Job.objects.select_related('company').get(external_job_id=job_id)
-            except Job.DoesNotExist:
-                # Try with platform if job_id contains platform info
-                # Or try case-insensitive match
-                job = Job.objects.select_related('company').filter(
-                    Q(external_job_id__iexact=job_id) |
-                    Q(external_job_id__icontains=job_id)
-                ).first()
-                
-                if not job:
-                    return Response(
-                        {'error': 'Job not found'},
-                        status=status.HTTP_404_NOT_FOUND
-                    )
+        job = self.find_job(Job.objects, job_id)
+        if routers.replica_configured() and (job is None or routers.recently_written(job.fetched_at)):
+            # Just ingested: the replica may not have it (or its latest version) yet
+            job = self.find_job(Job.objects.using(routers.PRIMARY), job_id) or job
+        if not job:
+            return Response(
+                {'error': 'Job not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
         
         # Serialize job details
         serializer = NestedJobSerializer(job)
+        with timed("serialize"):
+            data = serializer.data
         
-        return Response(serializer.data)
+        return Response(data)
+
+    @staticmethod
+    def find_job(jobs, job_id):
+        """The job with primary key or external_job_id ``job_id`` in ``jobs``, or None."""
+        jobs = jobs.select_related('company')
+        # Try to find job by primary key first
+        try:
+            return jobs.get(id=int(job_id))
+        except (ValueError, Job.DoesNotExist):
+            pass
+        # If not found by primary key, try external_job_id
+        try:
+            # Try exact match on external_job_id
+            return jobs.get(external_job_id=job_id)
+        except Job.DoesNotExist:
+            # Try with platform if job_id contains platform info
+            # Or try case-insensitive match
+            return jobs.filter(
+                Q(external_job_id__iexact=job_id) |
+                Q(external_job_id__icontains=job_id)
+            ).first()
+
+
+class JobChangesView(ReplicaReadMixin, DataVersionMixin, APIView):
+    """
+    Jobs created, updated or deactivated after a cursor, for incremental sync.
+    Query parameters:
+    - since: next_cursor from the previous page (default: from the beginning)
+    - limit: Number of changes per page (default: 100, max: 1000)
+    Keep following next_cursor while has_more is true, then store it for the
+    next sync. Deactivated jobs are included with is_active false.
+    """
+
+    def get(self, request):
+        since = request.query_params.get('since', '').strip()
+        try:
+            cursor = changes.parse_cursor(since)
+        except ValueError:
+            return Response(
+                {'error': 'Invalid since cursor'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            limit = int(request.query_params.get('limit', changes.PAGE_SIZE))
+        except (ValueError, TypeError):
+            limit = changes.PAGE_SIZE
+        limit = min(max(limit, 1), changes.MAX_PAGE_SIZE)
+
+        # One extra row tells whether there is another page
+        jobs = changes.changes_after(cursor, limit + 1)
+        has_more = len(jobs) > limit
+        jobs = jobs[:limit]
+        serializer = JobChangeSerializer(jobs, many=True)
+        with timed("serialize"):
+            results = serializer.data
+
+        return Response({
+            'results': results,
+            'next_cursor': changes.format_cursor(jobs[-1].change_seq, jobs[-1].id) if jobs else since,
+            'has_more': has_more,
+        })
+
+
+class JobExportView(ReplicaReadMixin, DataVersionMixin, APIView):
+    """
+    Streams every active job as NDJSON (one JSON object per line), without
+    building the response in memory.
+    Query parameters:
+    - gzip: '1' to download it gzip-compressed as jobs.ndjson.gz (optional)
+    """
+
+    def get(self, request):
+        jobs = export.active_jobs()
+        # The body is read after dispatch() returns: pin the database the router picks now
+        jobs = jobs.using(jobs.db)
+        chunks = export.iter_ndjson(jobs)
+        if request.query_params.get('gzip', '').strip().lower() in ('1', 'true', 'yes'):
+            response = StreamingHttpResponse(export.gzipped(chunks), content_type='application/gzip')
+            response['Content-Disposition'] = 'attachment; filename="jobs.ndjson.gz"'
+        else:
+            response = StreamingHttpResponse(chunks, content_type='application/x-ndjson')
+        return response
+
+
+class FetchStatsView(APIView):
+    """
+    Per-board fetch latency/payload percentiles over time, from FetchRun history.
+    Query parameters:
+    - days: Look-back window in days (default: 7, max: 90)
+    - bucket: Time bucket for the series ('day' or 'hour', default: 'day')
+    - platform: Only boards on this platform (optional)
+    - board: Only this board handle/URL (optional)
+    """
+
+    def get(self, request):
+        try:
+            days = int(request.query_params.get('days', 7))
+        except (ValueError, TypeError):
+            days = 7
+        days = min(max(days, 1), 90)
+
+        bucket = request.query_params.get('bucket', 'day').strip().lower()
+        if bucket not in ('day', 'hour'):
+            bucket = 'day'
+
+        stats = history.board_stats(
+            days=days,
+            platform=request.query_params.get('platform', '').strip() or None,
+            board=request.query_params.get('board', '').strip() or None,
+            bucket=bucket,
+        )
+        return Response(stats)
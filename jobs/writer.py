@@ -0,0 +1,118 @@
+"""
+Single-writer ingestion for concurrent fetching.
+
+When several boards are fetched at once, fetch threads that write their own
+rows end up fighting over the database write lock; on SQLite the losers get
+"database is locked" and everything serializes anyway. Instead, fetch threads
+hand their writes to one ``IngestWriter`` thread over a bounded queue.
+
+- A full queue blocks the fetchers, which is the backpressure: no more than
+  ``QUEUE_SIZE`` batches are ever waiting in memory.
+- The writer commits whatever has queued up, up to ``GROUP_POSTINGS``
+  postings, in one transaction. Each write runs in its own savepoint, so a
+  failed write only rolls back itself.
+
+On PostgreSQL the same path simply means fewer, larger transactions.
+"""
+import logging
+import queue
+import threading
+from concurrent.futures import Future
+
+from django.db import connection, transaction
+
+from . import instrumentation
+
+logger = logging.getLogger(__name__)
+
+# Writes (mostly posting batches) that may wait for the writer
+QUEUE_SIZE = 16
+# A transaction takes no further writes once it holds this many postings
+GROUP_POSTINGS = 2000
+
+_STOP = object()
+
+
+class IngestWriter(threading.Thread):
+    """
+    Runs queued DB writes on its own thread, grouped into transactions. Use
+    as a context manager: the writer is started on entry, and on exit it
+    finishes everything queued and closes its DB connection.
+    """
+
+    def __init__(self, queue_size=QUEUE_SIZE, group_postings=GROUP_POSTINGS):
+        super().__init__(name="ingest-writer", daemon=True)
+        self.queue = queue.Queue(queue_size)
+        self.group_postings = group_postings
+        self.transactions = 0
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def submit(self, func, *args, size=0):
+        """
+        Queue ``func(*args)`` to run on the writer thread, blocking while the
+        queue is full. ``size`` is the number of postings it writes. Returns a
+        Future, resolved once the transaction it ran in has committed. Whatever
+        is reported inside ``func`` goes to the caller's current company.
+        """
+        future = Future()
+        self.queue.put((future, func, args, size, instrumentation.current_company()))
+        return future
+
+    def close(self):
+        if self.is_alive():
+            self.queue.put(_STOP)
+            self.join()
+
+    def run(self):
+        try:
+            stopping = False
+            while not stopping:
+                item = self.queue.get()
+                if item is _STOP:
+                    break
+                group, size = [item], item[3]
+                while size < self.group_postings:
+                    try:
+                        item = self.queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is _STOP:
+                        stopping = True
+                        break
+                    group.append(item)
+                    size += item[3]
+                self.write(group)
+        finally:
+            connection.close()
+
+    def write(self, group):
+        outcomes = []
+        try:
+            with transaction.atomic():
+                for future, func, args, size, company in group:
+                    # Each write gets its own savepoint, so one that fails
+                    # doesn't take the rest of the group down with it
+                    try:
+                        with transaction.atomic(), instrumentation.reporting_to(company):
+                            outcomes.append((func(*args), None))
+                    except Exception as exc:
+                        logger.exception("Ingest write %s failed", getattr(func, "__qualname__", func))
+                        outcomes.append((None, exc))
+        except Exception as exc:
+            # The commit itself failed: every write in the group is lost
+            logger.exception("Ingest writer transaction of %d write(s) failed", len(group))
+            for future, *_ in group:
+                future.set_exception(exc)
+            return
+        self.transactions += 1
+        for (future, *_), (result, exc) in zip(group, outcomes):
+            if exc is None:
+                future.set_result(result)
+            else:
+                future.set_exception(exc)